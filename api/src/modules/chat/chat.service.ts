@@ -100,17 +100,20 @@ export const addMessage = async (
 
     logger.info(`Pushing research task to Redis for request ${result.researchRequest.id}`);
     try {
-      await redisClient.rpush(
-        "research_tasks",
-        JSON.stringify({
-          requestId: result.researchRequest.id,
-          userId: userId,
-          chatId: chatId,
-          query: content,
-          history: history,
-          config: config || {},
-        })
-      );
+      const task = JSON.stringify({
+        requestId: result.researchRequest.id,
+        userId: userId,
+        chatId: chatId,
+        query: content,
+        history: history,
+        config: config || {},
+      });
+      if (process.env.TASK_SOURCE === "stream") {
+        // Workers consume the stream through a consumer group and acknowledge after processing
+        await redisClient.xadd(process.env.TASK_STREAM || "research_tasks_stream", "*", "data", task);
+      } else {
+        await redisClient.rpush(process.env.TASK_LIST || "research_tasks", task);
+      }
       logger.info("Successfully pushed task to Redis");
     } catch (error) {
       logger.error(error, "Failed to push task to Redis");
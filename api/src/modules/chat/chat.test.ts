@@ -184,6 +184,38 @@ describe("Chat & Research Modules", () => {
           expect(updatedRequest?.researchResult[0].content).toEqual({ summary: "Analysis complete" });
       });
 
+      it("should allow worker to add several research results at once", async () => {
+          const res = await request(app)
+              .post(`/api/research/worker/results`)
+              .set("x-worker-secret", process.env.WORKER_SECRET!)
+              .send({ results: [
+                  { requestId, content: { title: "Section 1" } },
+                  { requestId, content: { title: "Section 2" } }
+              ] });
+
+          expect(res.status).toBe(200);
+          expect(res.body.data.count).toBe(2);
+
+          const updatedRequest = await prisma.researchRequest.findUnique({
+              where: { id: requestId },
+              include: { researchResult: true }
+          });
+          expect(updatedRequest?.status).toBe("COMPLETED");
+          expect(updatedRequest?.researchResult).toHaveLength(2);
+      });
+
+      it("should reject a batch with an unknown research request", async () => {
+          const res = await request(app)
+              .post(`/api/research/worker/results`)
+              .set("x-worker-secret", process.env.WORKER_SECRET!)
+              .send({ results: [
+                  { requestId, content: { title: "Section 1" } },
+                  { requestId: "00000000-0000-0000-0000-000000000000", content: { title: "Section 2" } }
+              ] });
+
+          expect(res.status).toBe(404);
+      });
+
       it("should allow getting research request details", async () => {
           const res = await request(app)
               .get(`/api/research/${requestId}`)
@@ -2,16 +2,18 @@ import { Router } from "express";
 import { authHandler } from "../../middleware/authHandler";
 import { workerAuth } from "../../middleware/workerAuth";
 import { validate } from "../../middleware/validate";
-import { createResearchResultSchema } from "./research.validation";
+import { createResearchResultSchema, createResearchResultsSchema } from "./research.validation";
 import {
   getResearchRequestController,
   retryResearchRequestController,
   addResearchResultController,
+  addResearchResultsController,
 } from "./research.controller";
 
 const router = Router();
 
 router.post("/worker/result/:requestId", workerAuth, validate(createResearchResultSchema), addResearchResultController);
+router.post("/worker/results", workerAuth, validate(createResearchResultsSchema), addResearchResultsController);
 
 router.get("/:requestId", authHandler, getResearchRequestController);
 router.post("/:requestId/retry", authHandler, retryResearchRequestController);
@@ -22,6 +22,30 @@ export const addResearchResult = async (requestId: string, content: any) => {
   });
 };
 
+export const addResearchResults = async (results: { requestId: string; content: any }[]) => {
+  const requestIds = [...new Set(results.map((result) => result.requestId))];
+  const found = await prisma.researchRequest.findMany({
+    where: { id: { in: requestIds } },
+    select: { id: true },
+  });
+  if (found.length !== requestIds.length) throw new AppError(404, "Research request not found");
+
+  return await prisma.$transaction(async (tx: any) => {
+    await tx.researchRequest.updateMany({
+      where: { id: { in: requestIds } },
+      data: { status: "COMPLETED" },
+    });
+
+    const created = await tx.researchResult.createMany({
+      data: results.map((result) => ({
+        researchRequestId: result.requestId,
+        content: result.content,
+      })),
+    });
+    return created.count;
+  });
+};
+
 export const getResearchRequestById = async (requestId: string) => {
   const request = await prisma.researchRequest.findUnique({
     where: { id: requestId },
@@ -5,3 +5,17 @@ export const createResearchResultSchema = z.object({
     content: z.record(z.string(), z.any()), // JSON content
   }),
 });
+
+export const createResearchResultsSchema = z.object({
+  body: z.object({
+    results: z
+      .array(
+        z.object({
+          requestId: z.string(),
+          content: z.record(z.string(), z.any()),
+        })
+      )
+      .min(1)
+      .max(100),
+  }),
+});
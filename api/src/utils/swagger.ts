@@ -3,7 +3,7 @@ import { z } from 'zod';
 import { loginSchema } from '../modules/auth/auth.validation';
 import { createUserSchema, updateUserSchema } from '../modules/users/users.validation';
 import { createChatSchema, updateChatSchema, createMessageSchema, createWorkerMessageSchema } from '../modules/chat/chat.validation';
-import { createResearchResultSchema } from '../modules/research/research.validation';
+import { createResearchResultSchema, createResearchResultsSchema } from '../modules/research/research.validation';
 import { updateOrganizationSchema, createInvitationSchema, updateMemberRoleSchema } from '../modules/organizations/organizations.validation';
 
 extendZodWithOpenApi(z);
@@ -709,6 +709,35 @@ registry.registerPath({
   }
 });
 
+registry.registerPath({
+  method: 'post',
+  path: '/research/worker/results',
+  tags: ['Research'],
+  summary: 'Submit several research results in one call (Worker)',
+  request: {
+    body: {
+      content: {
+        'application/json': {
+          schema: createResearchResultsSchema.shape.body
+        }
+      }
+    }
+  },
+  responses: {
+    200: {
+      description: 'Results submitted',
+      content: {
+        'application/json': {
+          schema: z.object({
+            success: z.boolean(),
+            data: z.object({ count: z.number() })
+          })
+        }
+      }
+    }
+  }
+});
+
 registry.registerPath({
   method: 'get',
   path: '/research/{requestId}',
@@ -0,0 +1,52 @@
+"""
+Measures ResearcherAgent construction cost, one agent per report section.
+
+"per-agent" reproduces the original constructor work: compiling the research graph
+and building three `with_structured_output` runnables (two in the agent, one in its
+IllustrationTool) for every agent. "shared" is the current constructor, which reuses
+the process-wide compiled graph and the structured runnables cached with the pooled
+model. No LLM calls are made.
+
+    uv run python benchmarks/bench_agent_construction.py --agents 400
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents.researcher_agent import GapAnalysis, IllustrationCheck, ResearcherAgent
+from src.model_factory import ModelFactory
+from src.tools.illustration_tool import IllustrationDecision
+
+def bench(name: str, agents: int, construct):
+    start = time.perf_counter()
+    for _ in range(agents):
+        construct()
+    elapsed = time.perf_counter() - start
+    print(f"{name}: agents={agents} total_ms={elapsed * 1000:.1f} per_agent_ms={elapsed / agents * 1000:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=400, help="Agents to construct (e.g. 50 tasks x 8 sections)")
+    args = parser.parse_args()
+
+    model = ModelFactory.get_model({"provider": "openai", "model": "gpt-4o", "apiKey": "sk-bench"})
+
+    def per_agent():
+        ResearcherAgent._build_graph()
+        for schema in (GapAnalysis, IllustrationCheck, IllustrationDecision):
+            model.with_structured_output(schema)
+        ResearcherAgent(model, serper_api_key="bench")
+
+    def shared():
+        ResearcherAgent(model, serper_api_key="bench")
+
+    # Warm up: first compile and first structured runnables
+    shared()
+    bench("per-agent", args.agents, per_agent)
+    bench("shared", args.agents, shared)
+
+if __name__ == "__main__":
+    main()
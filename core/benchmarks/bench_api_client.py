@@ -0,0 +1,68 @@
+"""
+Throughput of saving section drafts to the API, against a local stub server.
+
+Compares the original path (synchronous `requests.post` without a session, run in
+the default executor) with the async pooled ApiClient saving each draft directly
+and through the write-behind queue. Reports drafts/sec, HTTP calls and TCP
+connections opened.
+
+    uv run python benchmarks/bench_api_client.py --sections 400 --latency 0.005
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api_client import ApiClient
+from src.config import Config
+from tests.stub_api_server import StubApiServer
+
+def draft(i: int):
+    return {"title": f"Section {i}", "content": "Draft text. " * 200, "status": "draft", "illustration": None}
+
+async def run_executor(url: str, sections: int):
+    loop = asyncio.get_running_loop()
+    headers = {"Content-Type": "application/json", "x-worker-secret": Config.WORKER_API_KEY}
+
+    def save(i):
+        response = requests.post(f"{url}/research/worker/result/req-{i % 50}", json={"content": draft(i)}, headers=headers)
+        response.raise_for_status()
+
+    await asyncio.gather(*[loop.run_in_executor(None, save, i) for i in range(sections)])
+
+async def run_direct(url: str, sections: int):
+    client = ApiClient(base_url=url)
+    await asyncio.gather(*[client.save_research_result(f"req-{i % 50}", draft(i)) for i in range(sections)])
+    await client.aclose()
+
+async def run_write_behind(url: str, sections: int):
+    client = ApiClient(base_url=url)
+    await asyncio.gather(*[client.queue_research_result(f"req-{i % 50}", draft(i)) for i in range(sections)])
+    await client.aclose()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=400, help="Section drafts saved concurrently")
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub server latency per call (s)")
+    args = parser.parse_args()
+
+    for name, run in (("executor+requests", run_executor), ("async pooled", run_direct), ("write-behind", run_write_behind)):
+        stub = StubApiServer(latency=args.latency).start()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            await run(stub.url, args.sections)
+        elapsed = time.perf_counter() - start
+        stub.stop()
+        print(
+            f"{name}: drafts={len(stub.results)} elapsed_s={elapsed:.3f} drafts_per_s={len(stub.results) / elapsed:,.0f} "
+            f"http_calls={len(stub.requests)} connections={stub.connections}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Compares sequential and parallel ConclusionAgent refinement.
+
+Uses a fake chat model with fixed call latency, prefill and generation rates, and
+reports time to complete, time to first chunk and total input tokens per mode.
+
+    uv run python benchmarks/bench_conclusion.py --sections 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeChatModel
+from src.agents.conclusion_agent import ConclusionAgent
+
+def make_sections(count: int):
+    body = "Findings for this part of the report are described in detail with supporting evidence. " * 40
+    return [
+        {
+            "title": f"Section {i + 1}",
+            "content": f"## Section {i + 1}\n{body}\n\nAnother paragraph with key claims. {body}",
+            "sources": [{"title": f"Source {i}-{j}", "url": f"https://example.com/{i}/{j}"} for j in range(5)],
+        }
+        for i in range(count)
+    ]
+
+async def run_mode(mode: str, sections, model_kwargs):
+    refined = '<section title="x"><text>' + "Refined report paragraph. " * 150 + "</text><sources></sources></section>"
+    model = FakeChatModel(response=refined, **model_kwargs)
+    agent = ConclusionAgent(model, mode=mode)
+
+    start = time.perf_counter()
+    first_chunk = None
+    async for _ in agent.generate_report_stream("Benchmark query", sections):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "sections": len(sections),
+        "llm_calls": len(model.input_tokens),
+        "input_tokens": sum(model.input_tokens),
+        "first_chunk_s": round(first_chunk, 3),
+        "complete_s": round(total, 3),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fixed seconds per LLM call")
+    parser.add_argument("--prefill-tps", type=float, default=20000)
+    parser.add_argument("--output-tps", type=float, default=2000)
+    args = parser.parse_args()
+
+    model_kwargs = {
+        "latency": args.latency,
+        "prefill_tokens_per_second": args.prefill_tps,
+        "output_tokens_per_second": args.output_tps,
+    }
+    sections = make_sections(args.sections)
+    for mode in ("sequential", "parallel"):
+        result = await run_mode(mode, sections, model_kwargs)
+        print(" ".join(f"{k}={v}" for k, v in result.items()))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of crawl text extraction over a corpus of saved pages.
+
+Compares the original full-document BeautifulSoup pipeline with the streaming
+extractor (html.parser and, when installed, lxml). Each method runs in a fresh
+subprocess so peak RSS is attributable to it.
+
+    uv run python benchmarks/bench_html_extract.py                 # synthetic corpus
+    uv run python benchmarks/bench_html_extract.py --corpus pages/ # directory of saved *.html files
+"""
+import argparse
+import glob
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools import html_extractor
+from src.tools.html_extractor import StreamingTextExtractor
+from src.tools.crawler_tool import CrawlerTool
+
+CHUNK_SIZE = 64 * 1024
+
+def build_synthetic_corpus(directory: str):
+    paragraph = "<p>" + "Research synthesis requires careful reading of primary sources. " * 8 + "</p>\n"
+    script = "<script>" + "var tracking = {id: 1, events: []};" * 200 + "</script>\n"
+    for name, repeats in (("small", 20), ("medium", 2000), ("large", 40000)):
+        with open(os.path.join(directory, f"{name}.html"), "w") as f:
+            f.write("<html><head><title>" + name + "</title>" + script + "</head><body>")
+            for _ in range(repeats):
+                f.write(paragraph)
+            f.write("</body></html>")
+
+def _read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def run_method(method: str, paths):
+    start = time.perf_counter()
+    bytes_read = 0
+    chars = 0
+    for path in paths:
+        if method == "bs4":
+            # Original path: whole body read and decoded, then parsed in full
+            data = b"".join(_read_chunks(path))
+            bytes_read += len(data)
+            chars += len(CrawlerTool()._extract_text(data.decode("utf-8", errors="replace")))
+        else:
+            extractor = StreamingTextExtractor(parser=method)
+            for chunk in _read_chunks(path):
+                if extractor.feed(chunk):
+                    break
+            bytes_read += extractor.bytes_read
+            chars += len(extractor.close())
+    elapsed = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"method": method, "bytes_read": bytes_read, "chars": chars, "seconds": round(elapsed, 3), "peak_rss_mb": round(peak_rss_kb / 1024, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved *.html pages (defaults to a generated corpus)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if not corpus:
+            build_synthetic_corpus(tmp)
+            corpus = tmp
+        paths = sorted(glob.glob(os.path.join(corpus, "*.html")))
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"corpus={corpus} pages={len(paths)} total_bytes={total}")
+
+        methods = ["bs4", "html.parser"] + (["lxml"] if html_extractor.etree is not None else [])
+        for method in methods:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_method, method, paths).result()
+            print(" ".join(f"{k}={v}" for k, v in result.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the executor-based (requests) and async pooled (httpx) paths of SerperTool
+and CrawlerTool against a local stub server.
+
+    uv run python benchmarks/bench_http_tools.py --calls 200 --latency 0.05 --per-host 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer
+from src.http_client import HttpClient
+from src.tools.serper_tool import SerperTool
+from src.tools.crawler_tool import CrawlerTool
+
+async def run_executor_path(server: StubServer, calls: int):
+    loop = asyncio.get_running_loop()
+    serper = SerperTool(api_key="bench")
+    serper.url = server.search_url
+    crawler = CrawlerTool()
+
+    jobs = []
+    for i in range(calls):
+        if i % 2 == 0:
+            jobs.append(loop.run_in_executor(None, serper.search, f"query {i}", 3))
+        else:
+            jobs.append(loop.run_in_executor(None, crawler.crawl, f"{server.base_url}/page/{i}"))
+    await asyncio.gather(*jobs)
+
+async def run_async_path(server: StubServer, calls: int, per_host: int = None):
+    client = HttpClient(max_connections_per_host=per_host)
+    serper = SerperTool(api_key="bench", http_client=client)
+    serper.url = server.search_url
+    crawler = CrawlerTool(http_client=client)
+
+    jobs = []
+    for i in range(calls):
+        if i % 2 == 0:
+            jobs.append(serper.asearch(f"query {i}", 3))
+        else:
+            jobs.append(crawler.acrawl(f"{server.base_url}/page/{i}"))
+    await asyncio.gather(*jobs)
+    await client.aclose()
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+async def bench(name, runner, server, calls, **kwargs):
+    stop = asyncio.Event()
+    lag = []
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag))
+    before = server.request_count
+    start = time.perf_counter()
+    await runner(server, calls, **kwargs)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+    return {
+        "path": name,
+        "calls": calls,
+        "requests": server.request_count - before,
+        "seconds": round(elapsed, 3),
+        "calls_per_sec": round(calls / elapsed, 1),
+        "max_loop_lag_ms": round(max(lag, default=0) * 1000, 1),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    # Every stub request targets the same host, so this bounds the async path
+    parser.add_argument("--per-host", type=int, default=None, help="Override HTTP_MAX_CONNECTIONS_PER_HOST")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        results = [
+            await bench("executor", run_executor_path, server, args.calls),
+            await bench("async", run_async_path, server, args.calls, per_host=args.per_host),
+        ]
+        for result in results:
+            print(" ".join(f"{k}={v}" for k, v in result.items()))
+
+if __name__ == "__main__":
+    asyncio.run(main())
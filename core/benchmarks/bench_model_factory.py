@@ -0,0 +1,57 @@
+"""
+Measures per-task model setup: building a fresh chat model client for every task
+(the original path) against ModelFactory's pooled clients, for tasks spread over a
+few distinct provider/model/key configs. No requests are sent; only construction is
+timed. Also reports the one-off cost of importing the provider SDKs.
+
+    uv run python benchmarks/bench_model_factory.py --tasks 2000 --configs 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+start = time.perf_counter()
+from src.model_factory import ModelFactory, ModelPool
+import src.model_factory as model_factory
+IMPORT_SECONDS = time.perf_counter() - start
+
+PROVIDERS = [("openai", "gpt-4o"), ("anthropic", "claude-3-5-sonnet-latest")]
+
+def task_configs(tasks: int, configs: int):
+    for i in range(tasks):
+        n = i % configs
+        provider, model = PROVIDERS[n % len(PROVIDERS)]
+        yield {"provider": provider, "model": model, "apiKey": f"sk-bench-{n}"}
+
+def bench(name: str, tasks: int, configs: int, get_model):
+    timings = []
+    for config in task_configs(tasks, configs):
+        start = time.perf_counter()
+        get_model(config)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    total = sum(timings)
+    print(
+        f"{name}: tasks={tasks} total_ms={total * 1000:.1f} avg_us={total / tasks * 1e6:.1f} "
+        f"p50_us={timings[len(timings) // 2] * 1e6:.1f} max_ms={timings[-1] * 1000:.2f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--configs", type=int, default=4, help="Distinct provider/model/key configs")
+    args = parser.parse_args()
+
+    print(f"SDK import: {IMPORT_SECONDS:.2f}s")
+    bench("fresh client per task", args.tasks, args.configs,
+          lambda config: ModelFactory.create_model(config["provider"], config["model"], config["apiKey"]))
+
+    model_factory._model_pool = ModelPool()
+    bench("pooled", args.tasks, args.configs, ModelFactory.get_model)
+    print(f"pool: {model_factory._model_pool.stats()}")
+
+if __name__ == "__main__":
+    main()
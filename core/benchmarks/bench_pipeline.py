@@ -0,0 +1,333 @@
+"""
+End-to-end throughput of the worker, fully offline and deterministic.
+
+Queues research tasks on a fakeredis list and runs them through the real TaskIntake,
+`run_task` / `process_task`, planner, researcher graph, tools, conclusion, publisher
+and ApiClient. External services are replaced by local stand-ins:
+
+- a fake chat model with fixed per-call latency plus prefill and generation rates
+- a stub Serper / web page server
+- the stub API server from the tests
+- fakeredis (task list, published updates, tool cache; pip install fakeredis)
+
+Sweeps MAX_CONCURRENT_TASKS, sections per plan and research revisions per section.
+For each scenario it reports tasks/sec, p50/p99 task latency (from queueing to
+completion), p50/p99 time to the first report chunk, event loop lag and peak RSS.
+Each scenario runs in a fresh process, so caches and pools start cold and the peak
+RSS is the scenario's own. Results are written as JSON; pass a previous results file
+with --compare to print the change per scenario.
+
+    uv run python benchmarks/bench_pipeline.py --tasks 50 --concurrency 10,50 --sections 4 --revisions 1,3
+    uv run python benchmarks/bench_pipeline.py --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def make_response(output_tokens: int) -> str:
+    # estimate_tokens counts ~4 characters per token; "Evidence sentence. " is 19
+    sentences = max(1, output_tokens * 4 // 19)
+    return '<section title="Part"><text>' + "Evidence sentence. " * sentences + "</text><sources></sources></section>"
+
+def task_payload(i: int, users: int) -> Dict[str, Any]:
+    return {
+        "requestId": str(uuid.UUID(int=i + 1)),
+        "userId": f"user-{i % users}",
+        "chatId": f"chat-{i}",
+        "query": f"Benchmark query [task-{i}]",
+        "history": [],
+        "config": {"provider": "openai", "model": "fake", "apiKey": "bench-key", "serperApiKey": "bench", "includeIllustrations": False},
+    }
+
+class RecordingPublisher:
+    """
+    Wraps the worker's publisher and notes when each request published its first report chunk.
+    """
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self.first_chunk: Dict[str, float] = {}
+
+    def _record(self, payload):
+        from src.payloads import ReportChunk
+        if isinstance(payload, ReportChunk) and payload.request_id not in self.first_chunk:
+            self.first_chunk[payload.request_id] = time.perf_counter()
+
+    async def publish_update(self, payload, *args, **kwargs):
+        self._record(payload)
+        return await self.publisher.publish_update(payload, *args, **kwargs)
+
+    def publish_nowait(self, payload, *args, **kwargs):
+        self._record(payload)
+        return self.publisher.publish_nowait(payload, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.publisher, name)
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+async def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    from fakeredis import FakeAsyncRedis
+
+    from benchmarks.fakes import FakeChatModel
+    from benchmarks.stub_server import StubServer
+    from tests.stub_api_server import StubApiServer
+    from src.config import Config
+    from src.api_client import ApiClient
+    from src.http_client import close_http_client
+    from src.metrics import WorkerMetrics
+    from src.model_factory import ModelFactory
+    from src.publisher import create_publisher
+    from src.rate_limiter import configure_rate_limiter, get_rate_limiter
+    from src.serialization import get_serializer
+    from src.task_intake import TaskIntake
+    from src.task_source import create_task_source
+    from src.tools.cache import configure_tool_cache
+    from src.tools.parse_pool import shutdown_parse_pool
+    from src.tracing import configure_tracer, get_tracer
+    from src.worker import run_task
+
+    search_server = StubServer(latency=scenario["http_latency"], paragraphs=scenario["paragraphs"]).start()
+    api_server = StubApiServer(latency=scenario["api_latency"]).start()
+
+    Config.SERPER_URL = search_server.search_url
+    Config.RESEARCH_MAX_REVISIONS = scenario["revisions"]
+    Config.HTTP_MAX_CONNECTIONS_PER_HOST = scenario["per_host"]
+    # Unlimited LLM budget: the fake model's latency is the only cost being measured
+    Config.LLM_RATE_LIMITS = {}
+    Config.LLM_RPM = Config.LLM_TPM = Config.LLM_MAX_CONCURRENT_CALLS = 0
+    Config.TASK_SOURCE = "list"
+    Config.TASK_INTAKE_STATS_INTERVAL = 0
+
+    sections = scenario["sections"]
+    page_ids = itertools.count()
+
+    def plan(prompt):
+        tag = re.search(r"task-\d+", str(prompt)).group(0)
+        return {"sections": [{"title": f"{tag} part {j}", "description": f"Aspect {j} of {tag}"} for j in range(sections)]}
+
+    def gap_analysis(prompt):
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        topic = re.search(r"Topic: (.*)", text).group(1)
+        n = next(page_ids)
+        return {"is_complete": False, "missing_info": "More evidence", "actions": [
+            {"tool": "search", "query_or_url": f"{topic} evidence {n}"},
+            {"tool": "crawl", "query_or_url": f"{search_server.base_url}/page/{n}"},
+        ]}
+
+    models: List[FakeChatModel] = []
+
+    def create_model(provider, model_name, api_key):
+        # Same callbacks as ModelFactory.create_model gives the real clients
+        model = FakeChatModel(
+            response=make_response(scenario["output_tokens"]),
+            latency=scenario["llm_latency"],
+            prefill_tokens_per_second=scenario["prefill_tps"],
+            output_tokens_per_second=scenario["output_tps"],
+            structured={"ResearchPlan": plan, "GapAnalysis": gap_analysis, "IllustrationCheck": {"needs_illustration": False, "reason": "Text is enough"}},
+            input_tokens=[],
+            output_tokens=[],
+            callbacks=get_rate_limiter().callbacks(provider, api_key) + get_tracer().callbacks(),
+        )
+        models.append(model)
+        return model
+
+    ModelFactory.create_model = staticmethod(create_model)
+
+    r = FakeAsyncRedis()
+    publisher = RecordingPublisher(create_publisher(r))
+    api_client = ApiClient(base_url=api_server.url)
+    configure_tool_cache(r)
+    configure_rate_limiter(r)
+    tracer = configure_tracer()
+    # As in a worker serving /metrics: spans are recorded and feed the histograms
+    tracer.listeners.append(WorkerMetrics().observe_span)
+
+    concurrency = scenario["concurrency"]
+    sem = asyncio.Semaphore(concurrency)
+    source = create_task_source(r)
+    await source.setup()
+
+    tasks = scenario["tasks"]
+    queued_at: Dict[str, float] = {}
+    started_at: Dict[str, float] = {}
+    done_at: Dict[str, float] = {}
+    all_done = asyncio.Event()
+
+    async def handler(task):
+        request_id = task.payload["requestId"] if isinstance(task.payload, dict) else get_serializer().loads(task.data)["requestId"]
+        started_at[request_id] = time.perf_counter()
+        try:
+            await run_task(task, r, source, publisher, api_client, sem)
+        finally:
+            done_at[request_id] = time.perf_counter()
+            if len(done_at) == tasks:
+                all_done.set()
+
+    intake = TaskIntake(source, handler, sem, concurrency)
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag_samples))
+
+    serializer = get_serializer()
+    start = time.perf_counter()
+    for i in range(tasks):
+        payload = task_payload(i, scenario["users"] or tasks)
+        queued_at[payload["requestId"]] = start
+        await r.rpush(Config.TASK_LIST, serializer.dumps(payload))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        intake_task = asyncio.create_task(intake.run())
+        await all_done.wait()
+        elapsed = time.perf_counter() - start
+        intake_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await intake_task
+        await publisher.aclose()
+        await api_client.aclose()
+        await close_http_client()
+        shutdown_parse_pool()
+    stop.set()
+    await lag_task
+    search_server.stop()
+    api_server.stop()
+
+    latencies = [done_at[request_id] - queued_at[request_id] for request_id in done_at]
+    service_times = [done_at[request_id] - started_at[request_id] for request_id in done_at]
+    ttfc = [publisher.first_chunk[request_id] - queued_at[request_id] for request_id in publisher.first_chunk]
+    lag_ms = [sample * 1000 for sample in lag_samples]
+    return {
+        **{key: scenario[key] for key in ("concurrency", "sections", "revisions", "tasks")},
+        "completed": len(done_at),
+        "reports_saved": len(api_server.messages),
+        "elapsed_s": round(elapsed, 3),
+        "tasks_per_s": round(len(done_at) / elapsed, 3),
+        "latency_p50_s": round(percentile(latencies, 50), 3),
+        "latency_p99_s": round(percentile(latencies, 99), 3),
+        "service_p50_s": round(percentile(service_times, 50), 3),
+        "ttfc_p50_s": round(percentile(ttfc, 50), 3) if ttfc else None,
+        "ttfc_p99_s": round(percentile(ttfc, 99), 3) if ttfc else None,
+        "loop_lag_p50_ms": round(percentile(lag_ms, 50), 2),
+        "loop_lag_p99_ms": round(percentile(lag_ms, 99), 2),
+        "loop_lag_max_ms": round(max(lag_ms), 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "llm_calls": sum(len(model.input_tokens) for model in models),
+        "llm_input_tokens": sum(sum(model.input_tokens) for model in models),
+        "http_requests": search_server.request_count,
+        "api_requests": len(api_server.requests),
+    }
+
+def run_isolated(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    return asyncio.run(run_scenario(scenario))
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def scenario_key(result: Dict[str, Any]):
+    return (result["concurrency"], result["sections"], result["revisions"], result["tasks"])
+
+def compare(results: List[Dict[str, Any]], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {scenario_key(result): result for result in json.load(f)["results"]}
+    print(f"Compared with {baseline_path}:")
+    for result in results:
+        before = baseline.get(scenario_key(result))
+        if before is None:
+            continue
+        changes = []
+        for metric in ("tasks_per_s", "latency_p99_s", "ttfc_p99_s", "loop_lag_p99_ms", "peak_rss_mb"):
+            if before.get(metric) and result.get(metric) is not None:
+                changes.append(f"{metric}={(result[metric] - before[metric]) / before[metric]:+.1%}")
+        print(f"  concurrency={result['concurrency']} sections={result['sections']} revisions={result['revisions']}: " + " ".join(changes))
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50, help="Tasks queued per scenario")
+    parser.add_argument("--concurrency", type=int_list, default=[10, 50], help="MAX_CONCURRENT_TASKS values (comma-separated)")
+    parser.add_argument("--sections", type=int_list, default=[4], help="Plan sections per task (comma-separated)")
+    parser.add_argument("--revisions", type=int_list, default=[1, 3], help="Research revisions per section (comma-separated)")
+    parser.add_argument("--users", type=int, default=0, help="Distinct userIds (0 = one per task)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fixed seconds per LLM call")
+    parser.add_argument("--prefill-tps", type=float, default=20000, help="Fake model prompt tokens per second")
+    parser.add_argument("--output-tps", type=float, default=2000, help="Fake model output tokens per second")
+    parser.add_argument("--output-tokens", type=int, default=300, help="Tokens per fake model response")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="Stub search/page latency (s)")
+    parser.add_argument("--paragraphs", type=int, default=50, help="Paragraphs per stub page")
+    parser.add_argument("--api-latency", type=float, default=0.002, help="Stub API latency (s)")
+    parser.add_argument("--per-host", type=int, default=100, help="HTTP connections per host (all stub pages share one host)")
+    parser.add_argument("--output", default="bench_pipeline.json", help="JSON results file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit("fakeredis is not installed: pip install fakeredis")
+
+    scenarios = [
+        {
+            "tasks": args.tasks, "concurrency": concurrency, "sections": sections, "revisions": revisions, "users": args.users,
+            "llm_latency": args.llm_latency, "prefill_tps": args.prefill_tps, "output_tps": args.output_tps,
+            "output_tokens": args.output_tokens, "http_latency": args.http_latency, "paragraphs": args.paragraphs,
+            "api_latency": args.api_latency, "per_host": args.per_host,
+        }
+        for concurrency, sections, revisions in itertools.product(args.concurrency, args.sections, args.revisions)
+    ]
+
+    results = []
+    for scenario in scenarios:
+        # A fresh process per scenario: cold caches and pools, and a peak RSS of its own
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(run_isolated, scenario).result()
+        results.append(result)
+        print(" ".join(f"{key}={value}" for key, value in result.items()))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the per-event RedisPublisher with the BatchingPublisher.
+
+Simulates concurrent requests streaming report chunks (awaited, as in run_conclusion)
+interleaved with fire-and-forget researcher progress events. Reports events/sec,
+messages actually published and Redis round-trips. Runs against REDIS_URL, or an
+in-process fakeredis server with --fakeredis (pip install fakeredis).
+
+    uv run python benchmarks/bench_publisher.py --requests 20 --chunks 500 --fakeredis
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.publisher import BatchingPublisher, RedisPublisher
+
+def make_client(use_fakeredis: bool):
+    if use_fakeredis:
+        try:
+            from fakeredis import FakeAsyncRedis
+        except ImportError:
+            sys.exit("fakeredis is not installed: pip install fakeredis, or run against a local Redis")
+        return FakeAsyncRedis()
+    import redis.asyncio as redis
+    return redis.from_url(Config.REDIS_URL)
+
+def update(request_id: str, event_type: str, **data):
+    return {
+        "target_user_id": "bench-user",
+        "type": "agent_update",
+        "payload": {
+            "agent": "Conclusion",
+            "status": "output",
+            "message": "Generating report...",
+            "data": {"requestId": request_id, "chatId": f"chat-{request_id}", "event_type": event_type, **data},
+        },
+    }
+
+async def simulate_request(publisher, request_id: str, chunks: int, progress_every: int):
+    for i in range(chunks):
+        if progress_every and i % progress_every == 0:
+            publisher.publish_nowait(update(request_id, "source_found", title=f"Source {i}", url=f"https://example.com/{i}"))
+        await publisher.publish_update(update(request_id, "report_chunk", chunk="token ", chunk_index=i))
+        # Yield like a streaming LLM would between chunks
+        await asyncio.sleep(0)
+
+async def run(name: str, publisher, args):
+    events = args.requests * (args.chunks + (args.chunks // args.progress_every if args.progress_every else 0))
+    start = time.perf_counter()
+    # Silence the per-event log line of the baseline publisher
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await asyncio.gather(*[
+            simulate_request(publisher, f"req-{r}", args.chunks, args.progress_every) for r in range(args.requests)
+        ])
+        await publisher.aclose()
+    elapsed = time.perf_counter() - start
+    stats = publisher.stats()
+    print(
+        f"{name}: events={events} elapsed_s={elapsed:.3f} events_per_s={events / elapsed:,.0f} "
+        f"published={stats['published']} round_trips={stats['round_trips']}"
+        + (f" merged={stats['merged']} dropped={stats['dropped']}" if "merged" in stats else "")
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Concurrent requests")
+    parser.add_argument("--chunks", type=int, default=500, help="Report chunks per request")
+    parser.add_argument("--progress-every", type=int, default=10, help="One progress event per N chunks (0 = none)")
+    parser.add_argument("--flush-interval", type=float, default=Config.PUBLISH_FLUSH_INTERVAL)
+    parser.add_argument("--fakeredis", action="store_true", help="Use an in-process fakeredis server")
+    args = parser.parse_args()
+
+    client = make_client(args.fakeredis)
+    await run("per-event", RedisPublisher(client), args)
+    await run("batched", BatchingPublisher(client, flush_interval=args.flush_interval), args)
+    await client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark of the update publish path and task payload parsing.
+
+Compares building each report_chunk update from scratch with the stdlib serializer
+(the original path), building the full dict from UpdateTemplate, and splicing the
+chunk into the envelope UpdateTemplate pre-serializes once per request, with the
+stdlib and orjson serializers. Each runs as a bare build+serialize loop and through
+BatchingPublisher (pipelined to a Redis stand-in that discards commands, so only
+worker-side CPU is measured).
+
+    uv run python benchmarks/bench_serialization.py --events 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.payloads import UpdateTemplate
+from src.publisher import BatchingPublisher
+from src.serialization import JsonSerializer, OrjsonSerializer, orjson
+
+class NullPipeline:
+    def publish(self, channel, message):
+        pass
+
+    async def execute(self):
+        return []
+
+class NullRedis:
+    def pipeline(self, transaction=True):
+        return NullPipeline()
+
+def build_from_scratch(user_id, request_id, chat_id, chunk, chunk_index):
+    return {
+        "target_user_id": user_id,
+        "type": "agent_update",
+        "payload": {
+            "agent": "Conclusion",
+            "status": "output",
+            "message": "Generating report...",
+            "data": {
+                "requestId": request_id,
+                "chatId": chat_id,
+                "event_type": "report_chunk",
+                "chunk": chunk,
+                "chunk_index": chunk_index
+            }
+        }
+    }
+
+def bench_loop(name, events, build, encode):
+    start = time.perf_counter()
+    for i in range(events):
+        encode(build(i))
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {events / elapsed:,.0f} events/s ({elapsed / events * 1e6:.2f} us/event)")
+
+async def bench_publisher(name, events, build, serializer):
+    # A flush interval of 0 still batches: chunks queued between flushes are merged
+    publisher = BatchingPublisher(NullRedis(), flush_interval=0, serializer=serializer)
+    start = time.perf_counter()
+    for i in range(events):
+        await publisher.publish_update(build(i))
+        if i % 64 == 0:
+            await asyncio.sleep(0)
+    await publisher.aclose()
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {events / elapsed:,.0f} events/s, published={publisher.published} round_trips={publisher.round_trips}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    user_id, request_id, chat_id = "user-0001", "3f1c9a2e-request", "8d2b7c41-chat"
+    chunk = "Quantum error correction remains the main obstacle "
+    template = UpdateTemplate(user_id, request_id, chat_id)
+
+    def scratch(i):
+        return build_from_scratch(user_id, request_id, chat_id, chunk, i)
+
+    def dict_template(i):
+        return template.report_chunk_dict(chunk, i)
+
+    def spliced(i):
+        return template.report_chunk(chunk, i)
+
+    serializers = [("json", JsonSerializer())] + ([("orjson", OrjsonSerializer())] if orjson is not None else [])
+    if orjson is None:
+        print("orjson not installed; skipping orjson runs")
+
+    bench_loop("scratch+json", args.events, scratch, json.dumps)
+    for name, serializer in serializers:
+        bench_loop(f"dict template+{name}", args.events, dict_template, serializer.dumps)
+        bench_loop(f"spliced+{name}", args.events, spliced, lambda update, s=serializer: update.encode(s))
+
+    asyncio.run(bench_publisher("publisher scratch+json", args.events, scratch, JsonSerializer()))
+    for name, serializer in serializers:
+        asyncio.run(bench_publisher(f"publisher dict template+{name}", args.events, dict_template, serializer))
+        asyncio.run(bench_publisher(f"publisher spliced+{name}", args.events, spliced, serializer))
+
+    task = json.dumps({
+        "requestId": request_id, "userId": user_id, "chatId": chat_id, "query": "Research quantum computing",
+        "config": {"provider": "openai", "model": "gpt-4o"},
+        "history": [{"role": "user", "content": "Earlier question " * 50}] * 20,
+    })
+    for name, serializer in serializers:
+        start = time.perf_counter()
+        for _ in range(args.events // 10):
+            serializer.loads(task)
+        elapsed = time.perf_counter() - start
+        print(f"task loads ({name}, {len(task)} bytes): {elapsed / (args.events // 10) * 1e6:.2f} us/task")
+
+if __name__ == "__main__":
+    main()
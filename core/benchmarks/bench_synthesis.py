@@ -0,0 +1,74 @@
+"""
+Compares full and incremental ResearcherAgent synthesis across revisions.
+
+Drives `synthesize_node` the way the graph does (results accumulate, the draft is
+replaced each revision) with a fake chat model whose latency grows with prompt size,
+and reports input tokens and latency per revision for both modes.
+
+    uv run python benchmarks/bench_synthesis.py --revisions 4 --results-per-revision 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeChatModel
+from src.agents.researcher_agent import ResearcherAgent
+
+PARAGRAPH = "Section research covers measurements, methods and results of the topic in depth. "
+
+def make_results(revision: int, count: int):
+    results = []
+    for i in range(count):
+        # Every revision re-finds one source from the previous revision
+        source = i if i > 0 or revision == 0 else f"{revision - 1}-1"
+        results.append({
+            "title": f"Source {revision}-{source}",
+            "url": f"https://example.com/{revision if i else max(revision - 1, 0)}/{source}",
+            "content": f"Revision {revision} finding {i}. " + PARAGRAPH * 15,
+        })
+    return results
+
+async def run_mode(incremental: bool, revisions: int, per_revision: int, budget: int, model_kwargs):
+    model = FakeChatModel(response="Draft paragraph. " * 400, **model_kwargs)
+    agent = ResearcherAgent(model, serper_api_key="bench", include_illustrations=False, incremental_synthesis=incremental)
+    agent.context_builder.token_budget = budget
+    state = {"topic": "Topic", "description": "Section research measurements", "draft": "", "search_results": [], "synthesized_chunks": []}
+
+    rows = []
+    for revision in range(revisions):
+        state["search_results"] = state["search_results"] + make_results(revision, per_revision)
+        calls_before = len(model.input_tokens)
+        start = time.perf_counter()
+        update = await agent.synthesize_node(state)
+        elapsed = time.perf_counter() - start
+        state.update(update)
+        tokens = sum(model.input_tokens[calls_before:])
+        rows.append((revision + 1, tokens, elapsed))
+    return rows
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revisions", type=int, default=3)
+    parser.add_argument("--results-per-revision", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fixed seconds per LLM call")
+    parser.add_argument("--prefill-tps", type=float, default=20000, help="Simulated input tokens processed per second")
+    parser.add_argument("--budget", type=int, default=6000, help="Synthesis context token budget")
+    args = parser.parse_args()
+
+    model_kwargs = {"latency": args.latency, "prefill_tokens_per_second": args.prefill_tps}
+    totals = {}
+    for name, incremental in (("full", False), ("incremental", True)):
+        rows = await run_mode(incremental, args.revisions, args.results_per_revision, args.budget, model_kwargs)
+        for revision, tokens, elapsed in rows:
+            print(f"mode={name} revision={revision} input_tokens={tokens} latency_s={elapsed:.3f}")
+        totals[name] = sum(tokens for _, tokens, _ in rows)
+
+    saved = 1 - totals["incremental"] / totals["full"] if totals["full"] else 0
+    print(f"total_input_tokens full={totals['full']} incremental={totals['incremental']} saved={saved:.1%}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
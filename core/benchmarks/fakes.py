@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from src.context_builder import estimate_tokens
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for benchmarks.
+
+    Simulates provider latency as a fixed per-call delay plus prefill time
+    (input tokens) and generation time (output tokens), and records token counts
+    for every call. `with_structured_output` returns schema instances built from
+    `structured[schema.__name__]` (a dict of field values or a callable of the prompt).
+    """
+
+    response: str = "Fake response."
+    latency: float = 0.0
+    prefill_tokens_per_second: float = 0.0
+    output_tokens_per_second: float = 0.0
+    structured: Dict[str, Any] = {}
+    input_tokens: List[int] = []
+    output_tokens: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _prompt_tokens(self, prompt: Any) -> int:
+        if isinstance(prompt, list):
+            text = "\n".join(str(m.content) for m in prompt)
+        elif hasattr(prompt, "to_string"):
+            text = prompt.to_string()
+        else:
+            text = str(prompt)
+        return estimate_tokens(text)
+
+    def _delay(self, input_tokens: int, output_tokens: int) -> float:
+        delay = self.latency
+        if self.prefill_tokens_per_second:
+            delay += input_tokens / self.prefill_tokens_per_second
+        if self.output_tokens_per_second:
+            delay += output_tokens / self.output_tokens_per_second
+        return delay
+
+    def _record(self, prompt: Any, output: str) -> float:
+        input_tokens = self._prompt_tokens(prompt)
+        output_tokens = estimate_tokens(output)
+        self.input_tokens.append(input_tokens)
+        self.output_tokens.append(output_tokens)
+        return self._delay(input_tokens, output_tokens)
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._record(messages, self.response))
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._record(messages, self.response))
+        return self._result()
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        input_tokens = self._prompt_tokens(messages)
+        words = self.response.split(" ")
+        self.input_tokens.append(input_tokens)
+        self.output_tokens.append(estimate_tokens(self.response))
+        await asyncio.sleep(self._delay(input_tokens, 0))
+        for i, word in enumerate(words):
+            if self.output_tokens_per_second:
+                await asyncio.sleep(estimate_tokens(word) / self.output_tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    def with_structured_output(self, schema, **kwargs):
+        async def respond(prompt):
+            values = self.structured.get(schema.__name__, {})
+            if callable(values):
+                values = values(prompt)
+            await asyncio.sleep(self._record(prompt, str(values)))
+            return schema(**values)
+
+        return RunnableLambda(respond)
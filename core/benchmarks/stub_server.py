@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+PAGE_TEMPLATE = """<html><head><title>Stub page {path}</title>
+<style>body {{ font-family: sans-serif; }}</style><script>var tracking = true;</script></head>
+<body><h1>Stub page {path}</h1>{paragraphs}</body></html>"""
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Default backlog (5) drops connections when a benchmark opens many at once
+    request_queue_size = 1024
+
+class StubServer:
+    """
+    Local HTTP server that imitates the Serper API (`POST /search`) and arbitrary
+    HTML pages (`GET /<anything>`), with a fixed artificial latency per request.
+    Runs on a background thread so benchmarks can drive it from asyncio.
+    """
+
+    def __init__(self, latency: float = 0.05, paragraphs: int = 50, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    def _count(self):
+        with self._lock:
+            self.request_count += 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                stub._count()
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(stub.latency)
+                query = payload.get("q", "")
+                organic = [
+                    {"title": f"{query} result {i}", "link": f"{stub.base_url}/page/{i}", "snippet": f"Snippet {i} for {query}"}
+                    for i in range(payload.get("num", 5))
+                ]
+                self._send(200, json.dumps({"organic": organic}).encode(), "application/json")
+
+            def do_GET(self):
+                stub._count()
+                time.sleep(stub.latency)
+                paragraphs = "".join(
+                    f"<p>Paragraph {i} of {self.path}: lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+                    for i in range(stub.paragraphs)
+                )
+                body = PAGE_TEMPLATE.format(path=self.path, paragraphs=paragraphs).encode()
+                self._send(200, body, "text/html; charset=utf-8")
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
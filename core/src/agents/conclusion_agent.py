@@ -1,15 +1,30 @@
-from typing import AsyncIterator, List, Dict, Any
+import asyncio
+import inspect
+from typing import AsyncIterator, List, Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from src.config import Config
+from src.report_context import ReportContext, section_digest
+from src.section_stream import SectionStreamRepairer
+from src.tracing import span
+
+_SECTION_DONE = object()
+
 class ConclusionAgent:
-    def __init__(self, model: BaseChatModel):
+    def __init__(self, model: BaseChatModel, mode: Optional[str] = None, max_parallel: Optional[int] = None):
         self.model = model
+        # "sequential": each section sees the full refined report so far; "parallel": see _refine_parallel
+        self.mode = (mode or Config.CONCLUSION_MODE).lower()
+        self.max_parallel = max_parallel or Config.CONCLUSION_MAX_PARALLEL
 
-    async def generate_report_stream(self, query: str, sections_content: List[Dict[str, Any]]) -> AsyncIterator[str]:
+    async def generate_report_stream(self, query: str, sections_content: List[Any], section_titles: Optional[List[str]] = None) -> AsyncIterator[str]:
         """
         Aggregates section drafts into a final report, streaming XML output.
-        sections_content: List of dicts with {'title': str, 'content': str, 'sources': List[dict], 'illustration': dict}
+        sections_content: List of dicts with {'title': str, 'content': str, 'sources': List[dict], 'illustration': dict},
+        or awaitables resolving to such dicts. With awaitables (pipelined mode) `section_titles` is required;
+        the summary is written from the titles right away and each section is refined, in plan order,
+        as soon as its research finishes.
         
         Yields XML fragments:
         <section title="...">
@@ -20,23 +35,25 @@ class ConclusionAgent:
         </section>
         """
         
-        # Context buffer for deduplication
-        report_context = ""
+        # Bounded context of what has been written so far, for deduplication
+        report_context = ReportContext()
 
         # 1. Executive Summary (Generated by LLM)
         summary_prompt = ChatPromptTemplate.from_messages([
             ("system", "You are an expert research synthesizer. Write a brief executive summary based on the following section headers. Do not include specific details that will be covered in the sections."),
             ("user", "Query: {query}\nSections: {sections}")
         ])
-        section_titles = [s['title'] for s in sections_content]
+        if section_titles is None:
+            section_titles = [s['title'] for s in sections_content]
         summary_chain = summary_prompt | self.model
         
         # We await the summary generation
-        summary = await summary_chain.ainvoke({"query": query, "sections": ", ".join(section_titles)})
+        with span("conclusion.summary", sections=len(section_titles)):
+            summary = await summary_chain.ainvoke({"query": query, "sections": ", ".join(section_titles)})
         summary_text = summary.content
         if isinstance(summary_text, list):
             summary_text = "".join([c.get("text", "") if isinstance(c, dict) else str(c) for c in summary_text])
-        report_context += f"Executive Summary:\n{summary_text}\n\n"
+        report_context.set_summary(summary_text)
         
         yield f'<section title="Executive Summary">\n<text>\n{summary_text}\n</text>\n</section>\n'
         
@@ -81,25 +98,89 @@ Do not output any text outside these tags. Use the provided sources to populate
         refine_chain = refine_prompt | self.model
 
         # 2. Yield Sections with Context-Aware Refinement
+        if self.mode == "parallel":
+            async for piece in self._refine_parallel(refine_chain, sections_content, summary_text):
+                yield piece
+            return
+
         for section in sections_content:
-            title = section['title']
-            raw_content = section.get('content', '')
-            sources = section.get('sources', [])
-            illustration = section.get('illustration')
-            
-            # Format sources for the LLM
-            sources_formatted = "\n".join([f"- Title: {s.get('title')}, URL: {s.get('url')}" for s in sources])
-            
-            illustration_instruction = ""
-            illustration_placeholder_hint = ""
-            if illustration:
-                desc = "A generated interactive visualization."
-                if illustration.get("type") == "code":
-                    desc = "A generated interactive visualization (code provided)."
-                elif illustration.get("type") == "image":
-                    desc = f"An image titled '{illustration.get('alt', 'Image')}'."
-
-                illustration_instruction = f"""
+            if inspect.isawaitable(section):
+                section = await section
+
+            section_accumulator = ""
+            async for piece in self._refine_section(refine_chain, section, report_context.render()):
+                yield piece
+                section_accumulator += piece
+
+            # Update context with the refined section (titles, key claims, cited sources)
+            report_context.add_section(section['title'], section_accumulator)
+
+    async def _refine_parallel(self, refine_chain, sections_content: List[Any], summary_text: str) -> AsyncIterator[str]:
+        """
+        Refines all sections concurrently. Each section sees a compact context (the
+        executive summary plus key-point digests of the sections before it) instead of
+        the full XML of everything refined so far. Output is buffered per section and
+        yielded in plan order.
+        """
+        loop = asyncio.get_running_loop()
+        resolved = []
+        for section in sections_content:
+            if inspect.isawaitable(section):
+                resolved.append(asyncio.ensure_future(section))
+            else:
+                future = loop.create_future()
+                future.set_result(section)
+                resolved.append(future)
+
+        queues = [asyncio.Queue() for _ in resolved]
+        slots = asyncio.Semaphore(self.max_parallel)
+
+        async def refine(i):
+            try:
+                section = await resolved[i]
+                previous = [await resolved[j] for j in range(i)]
+                context = f"Executive Summary:\n{summary_text}\n\n" + "".join(section_digest(p) for p in previous)
+                async with slots:
+                    async for piece in self._refine_section(refine_chain, section, context):
+                        queues[i].put_nowait(piece)
+            except Exception as e:
+                queues[i].put_nowait(e)
+            finally:
+                queues[i].put_nowait(_SECTION_DONE)
+
+        tasks = [asyncio.create_task(refine(i)) for i in range(len(resolved))]
+        try:
+            for queue in queues:
+                while True:
+                    item = await queue.get()
+                    if item is _SECTION_DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _refine_section(self, refine_chain, section: Dict[str, Any], context: str) -> AsyncIterator[str]:
+        title = section['title']
+        raw_content = section.get('content', '')
+        sources = section.get('sources', [])
+        illustration = section.get('illustration')
+        
+        # Format sources for the LLM
+        sources_formatted = "\n".join([f"- Title: {s.get('title')}, URL: {s.get('url')}" for s in sources])
+        
+        illustration_instruction = ""
+        illustration_placeholder_hint = ""
+        if illustration:
+            desc = "A generated interactive visualization."
+            if illustration.get("type") == "code":
+                desc = "A generated interactive visualization (code provided)."
+            elif illustration.get("type") == "image":
+                desc = f"An image titled '{illustration.get('alt', 'Image')}'."
+
+            illustration_instruction = f"""
 An illustration is available for this section: {desc}
 
 DECISION REQUIRED:
@@ -116,23 +197,23 @@ DECISION REQUIRED:
 3. If NO:
    - Do not include the placeholder tag.
 """
-                illustration_placeholder_hint = "<illustration_placeholder/> (optional)"
+            illustration_placeholder_hint = "<illustration_placeholder/> (optional)"
 
-            # Prepare illustration XML tag for replacement
-            illustration_xml = ""
-            if illustration:
-                if illustration["type"] == "image":
-                    illustration_xml = f'\n<image src="{illustration["url"]}" alt="{illustration.get("alt", "")}" />\n'
-                elif illustration["type"] == "code":
-                    illustration_xml = f'\n<code>{illustration["content"]}</code>\n'
+        # Prepare illustration XML tag for replacement
+        illustration_xml = ""
+        if illustration:
+            if illustration["type"] == "image":
+                illustration_xml = f'\n<image src="{illustration["url"]}" alt="{illustration.get("alt", "")}" />\n'
+            elif illustration["type"] == "code":
+                illustration_xml = f'\n<code>{illustration["content"]}</code>\n'
+
+        with span("conclusion.section", title=title, sources=len(sources), illustrated=bool(illustration)):
+            # Stream the refined section through the incremental XML repairer, which also
+            # swaps the placeholder for the illustration (once) as soon as it is complete
+            stream = SectionStreamRepairer(title=title, illustration_xml=illustration_xml)
 
-            # Stream the refined section
-            section_accumulator = ""
-            buffer = ""
-            illustration_inserted = False
-            
             async for chunk in refine_chain.astream({
-                "context": report_context, # Full context for coherence
+                "context": context,
                 "title": title,
                 "draft": raw_content,
                 "sources_formatted": sources_formatted,
@@ -142,39 +223,16 @@ DECISION REQUIRED:
                 content = chunk.content
                 if isinstance(content, list):
                     content = "".join([c.get("text", "") if isinstance(c, dict) else str(c) for c in content])
-                
-                if not content: continue
-                
-                if illustration:
-                    buffer += content
-                    # Loop to handle multiple placeholders in one chunk or accumulated buffer
-                    while "<illustration_placeholder/>" in buffer:
-                        head, sep, tail = buffer.partition("<illustration_placeholder/>")
-                        
-                        # Yield the text before the placeholder
-                        yield head
-                        section_accumulator += head
-                        
-                        # Insert illustration ONLY ONCE
-                        if not illustration_inserted:
-                            yield illustration_xml
-                            section_accumulator += illustration_xml
-                            illustration_inserted = True
-                        else:
-                            # If duplicate placeholder, we just skip yielding the illustration again
-                            # Essentially removing the duplicate placeholder from the output
-                            pass
-                            
-                        # Update buffer to the rest of the string
-                        buffer = tail
-                else:
-                    yield content
-                    section_accumulator += content
             
-            # Yield remaining buffer
-            if buffer:
-                yield buffer
-                section_accumulator += buffer
+                if not content: continue
             
-            # Update context with the full section XML
-            report_context += f"{section_accumulator}\n\n"
+                repaired = stream.feed(content)
+                if repaired:
+                    yield repaired
+
+            # Flush held-back input and close any tags left open
+            tail = stream.close()
+            if tail:
+                yield tail
+            if stream.repairs:
+                print(f"Repaired {stream.repairs} XML issue(s) in section '{title}'")
@@ -5,6 +5,9 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
+from src.model_factory import structured_output
+from src.tracing import traced
+
 class Section(BaseModel):
     title: str = Field(description="The title of the section")
     description: str = Field(description="A brief description of what this section should cover")
@@ -15,7 +18,7 @@ class ResearchPlan(BaseModel):
 class PlanningAgent:
     def __init__(self, model: BaseChatModel):
         self.model = model
-        self.structured_llm = model.with_structured_output(ResearchPlan)
+        self.structured_llm = structured_output(model, ResearchPlan)
         
     async def compact_history(self, history: List[Dict[str, str]]) -> List[Any]:
         """
@@ -66,6 +69,7 @@ class PlanningAgent:
         
         return [final_summary_message] + recent_messages
 
+    @traced("planning.generate_plan")
     async def generate_plan(self, query: str, history: Optional[List[Dict[str, str]]] = None) -> ResearchPlan:
         system_prompt = """You are an expert research planner.
         Given a user query and conversation context, create a detailed Table of Contents (ToC) for a comprehensive research report.
@@ -5,9 +5,14 @@ import asyncio
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field
 
+from src.config import Config
+from src.context_builder import ContextBuilder
+from src.model_factory import structured_output
+from src.tracing import span
 from src.tools.serper_tool import SerperTool
 from src.tools.crawler_tool import CrawlerTool
 from src.tools.illustration_tool import IllustrationTool
@@ -21,6 +26,8 @@ class ResearcherState(TypedDict):
     description: str
     draft: str
     search_results: Annotated[List[Dict], operator.add]
+    # Keys of the research-material chunks already incorporated into the draft
+    synthesized_chunks: List[str]
     revision_number: int
     max_revisions: int
     pending_actions: List[Dict]
@@ -36,30 +43,61 @@ class IllustrationCheck(BaseModel):
     reason: str = Field(description="Reason for the decision")
 
 class ResearcherAgent:
-    def __init__(self, model: BaseChatModel, serper_api_key: str = None, event_callback=None, include_illustrations: bool = True):
+    _graph = None
+
+    def __init__(self, model: BaseChatModel, serper_api_key: str = None, event_callback=None, include_illustrations: bool = True,
+                 action_concurrency: Optional[int] = None, action_timeout: Optional[float] = None,
+                 incremental_synthesis: Optional[bool] = None, max_revisions: Optional[int] = None):
         self.model = model
         self.serper_tool = SerperTool(api_key=serper_api_key)
         self.crawler_tool = CrawlerTool()
         self.illustration_tool = IllustrationTool(model, self.serper_tool)
-        self.gap_analyzer = model.with_structured_output(GapAnalysis)
-        self.illustration_checker = model.with_structured_output(IllustrationCheck)
+        self.gap_analyzer = structured_output(model, GapAnalysis)
+        self.illustration_checker = structured_output(model, IllustrationCheck)
         self.event_callback = event_callback
         self.include_illustrations = include_illustrations
-        self.graph = self._build_graph()
+        self.action_concurrency = action_concurrency or Config.RESEARCH_ACTION_CONCURRENCY
+        self.action_timeout = action_timeout or Config.RESEARCH_ACTION_TIMEOUT
+        self.context_builder = ContextBuilder()
+        self.incremental_synthesis = Config.INCREMENTAL_SYNTHESIS if incremental_synthesis is None else incremental_synthesis
+        self.max_revisions = max_revisions or Config.RESEARCH_MAX_REVISIONS
+
+    @property
+    def graph(self):
+        return ResearcherAgent._compiled_graph()
+
+    @classmethod
+    def _compiled_graph(cls):
+        """
+        The research graph, compiled once per process. Its nodes look up the agent running
+        them in `config["configurable"]["agent"]`, so every ResearcherAgent (with its own
+        model, tools and event callback) shares the one compiled graph.
+        """
+        if cls._graph is None:
+            cls._graph = cls._build_graph()
+        return cls._graph
+
+    @staticmethod
+    def _node(method: str):
+        async def node(state: ResearcherState, config: RunnableConfig):
+            with span(f"researcher.{method}", topic=state["topic"], revision=state["revision_number"]):
+                return await getattr(config["configurable"]["agent"], method)(state)
+        return node
 
-    def _build_graph(self):
+    @classmethod
+    def _build_graph(cls):
         workflow = StateGraph(ResearcherState)
 
-        workflow.add_node("check_gaps", self.check_gaps)
-        workflow.add_node("search_node", self.search_node)
-        workflow.add_node("synthesize_node", self.synthesize_node)
-        workflow.add_node("illustrate_node", self.illustrate_node)
+        workflow.add_node("check_gaps", cls._node("check_gaps"))
+        workflow.add_node("search_node", cls._node("search_node"))
+        workflow.add_node("synthesize_node", cls._node("synthesize_node"))
+        workflow.add_node("illustrate_node", cls._node("illustrate_node"))
 
         workflow.set_entry_point("check_gaps")
 
         workflow.add_conditional_edges(
             "check_gaps",
-            self.should_continue,
+            cls.should_continue,
             {
                 "continue": "search_node",
                 "illustrate": "illustrate_node"
@@ -113,52 +151,83 @@ class ResearcherAgent:
                 "pending_actions": actions
             }
 
-    def should_continue(self, state: ResearcherState):
+    @staticmethod
+    def should_continue(state: ResearcherState):
         actions = state.get("pending_actions", [])
         if actions:
             return "continue"
         return "illustrate"
 
     async def search_node(self, state: ResearcherState):
+        """
+        Runs all pending actions of this revision concurrently (bounded by `action_concurrency`).
+        Results are merged in action order; actions that fail or exceed `action_timeout`
+        contribute nothing instead of failing the revision.
+        """
         actions = state.get("pending_actions", [])
-        results = []
-        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.action_concurrency)
 
-        for action in actions:
-            tool = action["tool"]
-            target = action["query_or_url"]
+        async def run_bounded(action):
+            async with slots:
+                try:
+                    return await asyncio.wait_for(self._run_action(action), timeout=self.action_timeout)
+                except asyncio.TimeoutError:
+                    error = f"timed out after {self.action_timeout}s"
+                except Exception as e:
+                    error = str(e)
 
+            print(f"Action {action['tool']} '{action['query_or_url']}' failed: {error}")
             if self.event_callback:
-                self.event_callback("tool_start", {
-                    "tool": tool,
-                    "query": target
+                self.event_callback("tool_error", {
+                    "tool": action["tool"],
+                    "query": action["query_or_url"],
+                    "error": error
                 })
+            return []
+
+        batches = await asyncio.gather(*[run_bounded(action) for action in actions])
+        results = [item for batch in batches for item in batch]
 
-            if tool == "search":
-                items = await loop.run_in_executor(None, self.serper_tool.search, target, 3)
-                results.extend(items)
-                if self.event_callback:
-                    for item in items:
-                        self.event_callback("source_found", {"title": item.get("title"), "url": item.get("url")})
-            
-            elif tool == "crawl":
-                content = await loop.run_in_executor(None, self.crawler_tool.crawl, target)
-                results.append({"title": f"Crawl: {target}", "url": target, "content": content})
-                if self.event_callback:
-                    self.event_callback("source_found", {"title": f"Crawl: {target}", "url": target})
-        
         return {"search_results": results}
 
+    async def _run_action(self, action: Dict) -> List[Dict]:
+        tool = action["tool"]
+        target = action["query_or_url"]
+
+        if self.event_callback:
+            self.event_callback("tool_start", {
+                "tool": tool,
+                "query": target
+            })
+
+        if tool == "search":
+            items = await self.serper_tool.asearch(target, 3)
+            if self.event_callback:
+                for item in items:
+                    self.event_callback("source_found", {"title": item.get("title"), "url": item.get("url")})
+            return items
+
+        elif tool == "crawl":
+            content = await self.crawler_tool.acrawl(target)
+            if self.event_callback:
+                self.event_callback("source_found", {"title": f"Crawl: {target}", "url": target})
+            return [{"title": f"Crawl: {target}", "url": target, "content": content}]
+
+        return []
+
     async def synthesize_node(self, state: ResearcherState):
         topic = state["topic"]
         description = state["description"]
         draft = state.get("draft", "")
         results = state.get("search_results", [])
         
-        # Format context (simple concatenation)
-        context = ""
-        for i, res in enumerate(results):
-             context += f"Source {i+1}: {res['title']}\nURL: {res['url']}\nContent: {res['content']}\n\n"
+        # Deduplicated, relevance-ranked and token-budgeted materials.
+        # In incremental mode only chunks not yet sent are packed, so material cut by the token budget
+        # (e.g. the rest of a long crawl) is offered in the next revision and nothing is sent twice.
+        synthesized = state.get("synthesized_chunks", []) if self.incremental_synthesis else []
+        context, packed = self.context_builder.pack(topic, description, results, sent=set(synthesized))
+        if self.incremental_synthesis and not context and draft:
+            return {}
 
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a research writer. Incorporate the new information into the draft. Ensure the draft covers the topic and description comprehensively."),
@@ -177,7 +246,7 @@ class ResearcherAgent:
         if isinstance(content, list):
             content = "".join([c.get("text", "") if isinstance(c, dict) else str(c) for c in content])
             
-        return {"draft": content}
+        return {"draft": content, "synthesized_chunks": synthesized + packed}
 
     async def illustrate_node(self, state: ResearcherState):
         # Check user preference
@@ -224,13 +293,16 @@ class ResearcherAgent:
             "description": description,
             "draft": "",
             "search_results": [],
+            "synthesized_chunks": [],
             "revision_number": 0,
-            "max_revisions": 3,
+            "max_revisions": self.max_revisions,
             "pending_actions": [],
             "illustration": None
         }
         
-        final_state = await self.graph.ainvoke(initial_state)
+        with span("researcher.section", topic=topic) as section_span:
+            final_state = await self.graph.ainvoke(initial_state, config={"configurable": {"agent": self}})
+            section_span.set(revisions=final_state["revision_number"], sources=len(final_state.get("search_results", [])))
         return {
             "content": final_state["draft"],
             "sources": final_state.get("search_results", []),
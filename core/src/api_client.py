@@ -1,28 +1,229 @@
-import requests
+import asyncio
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
 from src.config import Config
+from src.workloads import get_workload
+
+# Only failures where the request provably never ran are retried: a write that timed out,
+# or got a 502/504 from a proxy, may already be committed, and a retry would duplicate it
+RETRY_STATUSES = {429, 503}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
 
 class ApiClient:
-    def __init__(self):
-        self.base_url = Config.API_URL
+    """
+    Async client for the worker endpoints of the API.
+
+    Requests share one keep-alive connection pool. Failures that happen before the
+    API runs the request (connection errors and timeouts, 429/503 responses) are
+    retried up to `retries` times with full-jitter exponential backoff, so a burst of
+    workers retrying after an API restart does not hit it in lockstep. Read timeouts
+    and 502/504 responses are not retried, as the write may already have happened.
+
+    `queue_research_result` is the write-behind path for section drafts: it returns
+    as soon as the draft is queued, and a background flusher sends queued drafts in
+    batches (up to `batch_size` per call, every `flush_interval` seconds) to the
+    batch endpoint, falling back to one call per draft if the API has no batch
+    endpoint. The queue holds at most `max_queue` drafts; beyond that callers wait.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, retries: Optional[int] = None, backoff: Optional[float] = None,
+                 max_backoff: Optional[float] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_queue: Optional[int] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or Config.API_URL
         self.headers = {
             "Content-Type": "application/json",
             "x-worker-secret": Config.WORKER_API_KEY
         }
+        self.retries = Config.API_RETRIES if retries is None else retries
+        self.backoff = Config.API_RETRY_BACKOFF if backoff is None else backoff
+        self.max_backoff = max_backoff or Config.API_RETRY_MAX_BACKOFF
+        self.batch_size = max(1, batch_size or Config.API_BATCH_SIZE)
+        self.flush_interval = Config.API_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=Config.API_TIMEOUT,
+            limits=httpx.Limits(max_connections=Config.API_MAX_CONNECTIONS, max_keepalive_connections=Config.API_MAX_CONNECTIONS),
+            transport=transport,
+        )
+
+        self._queue: "asyncio.Queue[Tuple[str, Dict[str, Any]]]" = asyncio.Queue(max_queue or Config.API_WRITE_QUEUE_MAX)
+        self._flusher: Optional[asyncio.Task] = None
+        self._batch_supported = True
+        # request_id -> drafts queued and not yet written (or given up on), and the event set when that reaches 0
+        self._pending: Dict[str, int] = {}
+        self._drained: Dict[str, asyncio.Event] = {}
 
-    def save_research_result(self, request_id: str, content: dict):
+        self.requests = 0
+        self.retried = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Any:
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                # Callers beyond the pool size wait here: httpx's own pool queue gets slow when it is long
+                async with get_workload("persistence").slot():
+                    response = await self._client.post(url, json=payload)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response.json()
+                print(f"API {path} returned {response.status_code}, retrying")
+            except RETRY_ERRORS as e:
+                if attempt >= self.retries:
+                    raise
+                print(f"API {path} failed ({e!r}), retrying")
+            # Full jitter: a random wait up to the exponential backoff
+            await asyncio.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            attempt += 1
+            self.retried += 1
+
+    async def save_research_result(self, request_id: str, content: dict):
         """
         Saves an intermediate research result (e.g., a section draft).
         """
-        url = f"{self.base_url}/research/worker/result/{request_id}"
-        response = requests.post(url, json={"content": content}, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        result = await self._post(f"/research/worker/result/{request_id}", {"content": content})
+        self.written += 1
+        return result
 
-    def save_final_response(self, chat_id: str, content: str):
+    async def save_research_results(self, results: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Saves several (request_id, content) results in one call.
+        """
+        result = await self._post("/research/worker/results", {
+            "results": [{"requestId": request_id, "content": content} for request_id, content in results]
+        })
+        self.written += len(results)
+        self.batches += 1
+        return result
+
+    async def save_final_response(self, chat_id: str, content: str):
         """
         Saves the final aggregated report as a new message in the chat.
         """
-        url = f"{self.base_url}/chats/{chat_id}/messages/worker"
-        response = requests.post(url, json={"content": content, "role": "assistant"}, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return await self._post(f"/chats/{chat_id}/messages/worker", {"content": content, "role": "assistant"})
+
+    async def queue_research_result(self, request_id: str, content: dict):
+        """
+        Queues a research result for a background batched write (write-behind).
+        """
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        self._pending[request_id] = self._pending.get(request_id, 0) + 1
+        try:
+            await self._queue.put((request_id, content))
+        except BaseException:
+            self._written(request_id)
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Drafts finishing within flush_interval of the first one join its batch
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            finally:
+                for request_id, _ in batch:
+                    self._written(request_id)
+                    self._queue.task_done()
+
+    def _written(self, request_id: str):
+        pending = self._pending.get(request_id, 0) - 1
+        if pending > 0:
+            self._pending[request_id] = pending
+            return
+        self._pending.pop(request_id, None)
+        drained = self._drained.pop(request_id, None)
+        if drained is not None:
+            drained.set()
+
+    async def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        if self._batch_supported and len(batch) > 1:
+            try:
+                await self.save_research_results(batch)
+                return
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    self.failed += len(batch)
+                    print(f"Failed to save {len(batch)} research results: {e}")
+                    return
+                # Either the API has no batch endpoint, or a request of the batch is gone
+                missing_endpoint = await self._write_each(batch)
+                if missing_endpoint:
+                    print("API has no batch result endpoint, saving results one by one")
+                    self._batch_supported = False
+                return
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Failed to save {len(batch)} research results: {e}")
+                return
+        await self._write_each(batch)
+
+    async def _write_each(self, batch: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Saves results one call each; returns whether they all succeeded.
+        """
+        succeeded = True
+        for request_id, content in batch:
+            try:
+                await self.save_research_result(request_id, content)
+            except Exception as e:
+                succeeded = False
+                self.failed += 1
+                print(f"Failed to save intermediate result: {e}")
+        return succeeded
+
+    async def flush(self, request_id: Optional[str] = None):
+        """
+        Waits until the queued research results of `request_id` have been written (or
+        given up on). Results of other requests queued meanwhile are not waited for.
+        Without `request_id`, waits until the whole queue is drained.
+        """
+        if request_id is None:
+            await self._queue.join()
+            return
+        if not self._pending.get(request_id):
+            return
+        drained = self._drained.get(request_id)
+        if drained is None:
+            drained = self._drained[request_id] = asyncio.Event()
+        await drained.wait()
+
+    async def aclose(self):
+        if self._flusher is not None:
+            await self.flush()
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "queued": self._queue.qsize(),
+        }
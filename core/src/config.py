@@ -9,6 +9,16 @@ class Config:
     REDIS_URL = os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}")
     API_URL = os.getenv("API_URL", "http://localhost:3000/api/v1")
     WORKER_API_KEY = os.getenv("WORKER_API_KEY", "prism-worker-secret")
+    # ApiClient: pooled connections, retries with jittered backoff (seconds), and write-behind batching of section drafts
+    API_TIMEOUT = float(os.getenv("API_TIMEOUT", 10))
+    API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", 20))
+    API_RETRIES = int(os.getenv("API_RETRIES", 3))
+    API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", 0.5))
+    API_RETRY_MAX_BACKOFF = float(os.getenv("API_RETRY_MAX_BACKOFF", 8))
+    API_WRITE_BEHIND = os.getenv("API_WRITE_BEHIND", "true").lower() == "true"
+    API_BATCH_SIZE = int(os.getenv("API_BATCH_SIZE", 20))
+    API_FLUSH_INTERVAL = float(os.getenv("API_FLUSH_INTERVAL", 0.2))
+    API_WRITE_QUEUE_MAX = int(os.getenv("API_WRITE_QUEUE_MAX", 1000))
     
     # Default API Keys (can be overridden by task config)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -16,3 +26,122 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     XAI_API_KEY = os.getenv("XAI_API_KEY")
     SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+    SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+
+    # Shared HTTP client used by the search/crawl tools
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 10))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+    # Separate slot pools per workload, so stalled crawls cannot hold every pooled connection and queue searches
+    # behind them (keep SEARCH_CONCURRENCY + CRAWL_CONCURRENCY <= HTTP_MAX_CONNECTIONS); API saves use API_MAX_CONNECTIONS
+    SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", 30))
+    CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 60))
+    WORKLOAD_STATS_INTERVAL = float(os.getenv("WORKLOAD_STATS_INTERVAL", 60))  # seconds, 0 = no stats log
+
+    # ResearcherAgent: gap-analysis/synthesis rounds per section
+    RESEARCH_MAX_REVISIONS = int(os.getenv("RESEARCH_MAX_REVISIONS", 3))
+    # ResearcherAgent: how many search/crawl actions of one revision run at once, and per-action timeout (s)
+    RESEARCH_ACTION_CONCURRENCY = int(os.getenv("RESEARCH_ACTION_CONCURRENCY", 6))
+    RESEARCH_ACTION_TIMEOUT = float(os.getenv("RESEARCH_ACTION_TIMEOUT", 20))
+
+    # Tool result cache (in-process LRU + Redis); TTLs in seconds
+    TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+    TOOL_CACHE_REDIS_ENABLED = os.getenv("TOOL_CACHE_REDIS_ENABLED", "true").lower() == "true"
+    TOOL_CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MEMORY_MAX_ENTRIES", 2048))
+    TOOL_CACHE_MEMORY_MAX_BYTES = int(os.getenv("TOOL_CACHE_MEMORY_MAX_BYTES", 64 * 1024 * 1024))
+    TOOL_CACHE_BACKFILL_TTL = int(os.getenv("TOOL_CACHE_BACKFILL_TTL", 600))
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 6 * 3600))
+    CRAWL_CACHE_TTL = int(os.getenv("CRAWL_CACHE_TTL", 24 * 3600))
+
+    # CrawlerTool: text kept per page, body bytes read at most, and HTML parser ('auto' prefers lxml when installed)
+    CRAWL_MAX_CHARS = int(os.getenv("CRAWL_MAX_CHARS", 10000))
+    CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", 5 * 1024 * 1024))
+    CRAWL_PARSER = os.getenv("CRAWL_PARSER", "auto")
+
+    # Process pool for crawl text extraction (0 = extract while streaming, on one parse thread); children recycled after N pages
+    CRAWL_PARSE_PROCESSES = int(os.getenv("CRAWL_PARSE_PROCESSES", 0))
+    CRAWL_PARSE_MAX_TASKS_PER_CHILD = int(os.getenv("CRAWL_PARSE_MAX_TASKS_PER_CHILD", 200))
+
+    # ResearcherAgent synthesis: token budget for research materials and chunk size (chars) used for ranking
+    SYNTH_CONTEXT_TOKEN_BUDGET = int(os.getenv("SYNTH_CONTEXT_TOKEN_BUDGET", 6000))
+    SYNTH_CONTEXT_CHUNK_CHARS = int(os.getenv("SYNTH_CONTEXT_CHUNK_CHARS", 1200))
+
+    # ResearcherAgent: send only results gathered since the previous revision to synthesis
+    INCREMENTAL_SYNTHESIS = os.getenv("INCREMENTAL_SYNTHESIS", "true").lower() == "true"
+
+    # Start refining/streaming report sections while later sections are still researching
+    PIPELINED_CONCLUSION = os.getenv("PIPELINED_CONCLUSION", "true").lower() == "true"
+
+    # ConclusionAgent: "sequential" (report-so-far context) or "parallel" (summary + section digests, refined concurrently)
+    CONCLUSION_MODE = os.getenv("CONCLUSION_MODE", "sequential")
+    CONCLUSION_MAX_PARALLEL = int(os.getenv("CONCLUSION_MAX_PARALLEL", 8))
+
+    # ConclusionAgent (sequential): token cap for the "written so far" context; 0 = resend full section XML
+    REPORT_CONTEXT_TOKEN_BUDGET = int(os.getenv("REPORT_CONTEXT_TOKEN_BUDGET", 1500))
+
+    # Update publishing: batch into pipelined PUBLISH round-trips every interval (s) or max_batch messages
+    PUBLISH_BATCHING = os.getenv("PUBLISH_BATCHING", "true").lower() == "true"
+    PUBLISH_FLUSH_INTERVAL = float(os.getenv("PUBLISH_FLUSH_INTERVAL", 0.02))
+    PUBLISH_MAX_BATCH = int(os.getenv("PUBLISH_MAX_BATCH", 256))
+    PUBLISH_MAX_QUEUE = int(os.getenv("PUBLISH_MAX_QUEUE", 10000))
+
+    # JSON for task payloads and published updates: "auto" (orjson when installed), "orjson" or "json"
+    JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "auto")
+
+    # Task intake: "list" (BLPOP on TASK_LIST) or "stream" (consumer group on TASK_STREAM, acked after processing)
+    TASK_SOURCE = os.getenv("TASK_SOURCE", "list")
+    TASK_LIST = os.getenv("TASK_LIST", "research_tasks")
+    TASK_STREAM = os.getenv("TASK_STREAM", "research_tasks_stream")
+    TASK_STREAM_GROUP = os.getenv("TASK_STREAM_GROUP", "research_workers")
+    TASK_STREAM_CONSUMER = os.getenv("TASK_STREAM_CONSUMER")  # defaults to the hostname (pod name)
+    TASK_STREAM_BLOCK = float(os.getenv("TASK_STREAM_BLOCK", 5))
+    # Seconds: pending entries idle this long are reclaimed (heartbeats keep running tasks fresh)
+    TASK_STREAM_CLAIM_IDLE = float(os.getenv("TASK_STREAM_CLAIM_IDLE", 120))
+    TASK_STREAM_CLAIM_INTERVAL = float(os.getenv("TASK_STREAM_CLAIM_INTERVAL", 30))
+    TASK_STREAM_HEARTBEAT_INTERVAL = float(os.getenv("TASK_STREAM_HEARTBEAT_INTERVAL", 30))
+    TASK_STREAM_MAX_DELIVERIES = int(os.getenv("TASK_STREAM_MAX_DELIVERIES", 3))
+    # Task intake: most tasks fetched per round-trip, and tasks buffered locally beyond the free MAX_CONCURRENT_TASKS slots
+    # (with the list source these are requeued on shutdown but lost if the worker is killed)
+    TASK_FETCH_BATCH = int(os.getenv("TASK_FETCH_BATCH", 16))
+    TASK_PREFETCH = int(os.getenv("TASK_PREFETCH", 2))
+    TASK_INTAKE_STATS_INTERVAL = float(os.getenv("TASK_INTAKE_STATS_INTERVAL", 60))  # seconds, 0 = no stats log
+    # Fair scheduling: most tasks one userId may run at once (0 = no cap), most startable tasks buffered locally,
+    # most tasks held locally per user at their cap (more go back to the queue), and most buffered in total
+    TASK_USER_MAX_CONCURRENT = int(os.getenv("TASK_USER_MAX_CONCURRENT", 10))
+    TASK_MAX_BUFFER = int(os.getenv("TASK_MAX_BUFFER", 100))
+    TASK_USER_MAX_HELD = int(os.getenv("TASK_USER_MAX_HELD", 5))
+    TASK_MAX_HELD = int(os.getenv("TASK_MAX_HELD", 150))
+
+    # LLM calls per provider API key: requests and tokens per minute (0 = unlimited), overridable per provider
+    # (OPENAI_RPM, ANTHROPIC_TPM, ...), and calls in flight per worker process (0 = no cap)
+    LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LLM_RATE_LIMIT_BACKEND = os.getenv("LLM_RATE_LIMIT_BACKEND", "local")  # "local" or "redis" (budget shared by all pods)
+    LLM_RPM = int(os.getenv("LLM_RPM", 500))
+    LLM_TPM = int(os.getenv("LLM_TPM", 200000))
+    LLM_RATE_LIMITS = {
+        "openai": (int(os.getenv("OPENAI_RPM", LLM_RPM)), int(os.getenv("OPENAI_TPM", LLM_TPM))),
+        "anthropic": (int(os.getenv("ANTHROPIC_RPM", LLM_RPM)), int(os.getenv("ANTHROPIC_TPM", LLM_TPM))),
+        "google": (int(os.getenv("GOOGLE_RPM", LLM_RPM)), int(os.getenv("GOOGLE_TPM", LLM_TPM))),
+        "xai": (int(os.getenv("XAI_RPM", LLM_RPM)), int(os.getenv("XAI_TPM", LLM_TPM))),
+    }
+    LLM_MAX_CONCURRENT_CALLS = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", 32))
+    LLM_RATE_STATS_INTERVAL = float(os.getenv("LLM_RATE_STATS_INTERVAL", 60))  # seconds, 0 = no stats log
+
+    # ModelFactory: chat model clients reused across tasks with the same provider/model/API key (0 = no reuse)
+    MODEL_POOL_MAX_ENTRIES = int(os.getenv("MODEL_POOL_MAX_ENTRIES", 64))
+    MODEL_POOL_IDLE_TTL = float(os.getenv("MODEL_POOL_IDLE_TTL", 900))  # seconds, 0 = no expiry
+
+    # Tracing: spans of each task (planning, graph nodes, tool and LLM calls, conclusion sections) exported
+    # as "jsonl" (appended to TRACE_FILE) or "otlp" (OTLP/HTTP JSON posted to a collector), or "none"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "prism-worker")
+    TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", 512))
+    TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", 5))  # seconds
+    TRACE_MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", 10000))  # spans held for export before new ones are dropped
+
+    # Prometheus metrics (GET /metrics): phase/tool/LLM latencies, in-flight tasks, queue depths (0 = no endpoint)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 9090))
+    METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
@@ -0,0 +1,179 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Collection, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.tools.cache import normalize_url
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with", "what", "how",
+}
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token), good enough for budgeting prompts.
+    """
+    return (len(text) + 3) // 4
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+class BM25:
+    """
+    Okapi BM25 over a small in-memory corpus of pre-tokenized documents.
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if documents else 0
+        doc_freq = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def score(self, query: List[str]) -> List[float]:
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            scores.append(sum(
+                self.idf[term] * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+                for term in query if term in tf
+            ))
+        return scores
+
+class ContextBuilder:
+    """
+    Turns accumulated search/crawl results into the research-materials block of a
+    synthesis prompt.
+
+    Sources are deduplicated by URL and by content hash, split into chunks, ranked
+    against the section topic/description with BM25 and packed into `token_budget`.
+    Selected chunks are emitted grouped by source, in their original order.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, chunk_chars: Optional[int] = None):
+        self.token_budget = token_budget or Config.SYNTH_CONTEXT_TOKEN_BUDGET
+        self.chunk_chars = chunk_chars or Config.SYNTH_CONTEXT_CHUNK_CHARS
+
+    def dedupe(self, results: List[Dict], incorporated: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Drops sources without content and duplicates. For a repeated URL the longer
+        content wins (e.g. a full crawl over a search snippet), keeping the first position.
+        Sources already covered by `incorporated` (same content, or same URL with at
+        least as much content) are dropped as well.
+        """
+        by_url: Dict[str, int] = {}
+        seen_hashes = set()
+        incorporated_lengths: Dict[str, int] = {}
+        for res in incorporated or []:
+            content = (res.get("content") or "").strip()
+            seen_hashes.add(self._content_hash(content))
+            if res.get("url"):
+                url_key = normalize_url(res["url"])
+                incorporated_lengths[url_key] = max(incorporated_lengths.get(url_key, 0), len(content))
+
+        sources: List[Dict] = []
+        for res in results:
+            content = (res.get("content") or "").strip()
+            if not content:
+                continue
+            url_key = normalize_url(res["url"]) if res.get("url") else None
+            if url_key and incorporated_lengths.get(url_key, -1) >= len(content):
+                continue
+            if url_key and url_key in by_url:
+                existing = sources[by_url[url_key]]
+                if len(content) > len(existing["content"]):
+                    sources[by_url[url_key]] = {**res, "content": content}
+                continue
+            content_hash = self._content_hash(content)
+            if content_hash in seen_hashes:
+                continue
+            seen_hashes.add(content_hash)
+            if url_key:
+                by_url[url_key] = len(sources)
+            sources.append({**res, "content": content})
+        return sources
+
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        return hashlib.sha1(" ".join(content.lower().split()).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def chunk_key(cls, text: str) -> str:
+        return cls._content_hash(text)
+
+    def chunk(self, content: str) -> List[str]:
+        """
+        Packs lines into chunks of roughly `chunk_chars`; over-long lines are split.
+        """
+        chunks, current = [], ""
+        for line in content.splitlines():
+            while len(line) > self.chunk_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:self.chunk_chars])
+                line = line[self.chunk_chars:]
+            if current and len(current) + len(line) + 1 > self.chunk_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def build(self, topic: str, description: str, results: List[Dict], incorporated: Optional[List[Dict]] = None) -> str:
+        return self.pack(topic, description, results, incorporated)[0]
+
+    def pack(self, topic: str, description: str, results: List[Dict], incorporated: Optional[List[Dict]] = None,
+             sent: Optional[Collection[str]] = None) -> Tuple[str, List[str]]:
+        """
+        `build`, leaving out chunks whose key is in `sent` and also returning the keys
+        of the chunks it packed. Keys identify chunk text (`chunk_key`), so material
+        cut by the token budget, including the rest of a source larger than the
+        budget, can be packed in a later call while packed chunks are not repeated.
+        """
+        sources = self.dedupe(results, incorporated)
+        sent = sent or ()
+        chunks: List[Tuple[int, int, str]] = []
+        for source_index, source in enumerate(sources):
+            for chunk_index, text in enumerate(self.chunk(source["content"])):
+                if self.chunk_key(text) not in sent:
+                    chunks.append((source_index, chunk_index, text))
+        if not chunks:
+            return "", []
+
+        scores = BM25([tokenize(text) for _, _, text in chunks]).score(tokenize(f"{topic} {description}"))
+        # Highest score first; ties keep document order
+        ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+
+        selected = set()
+        opened_sources = set()
+        used = 0
+        for i in ranked:
+            source_index, _, text = chunks[i]
+            cost = estimate_tokens(text) + 1
+            if source_index not in opened_sources:
+                source = sources[source_index]
+                cost += estimate_tokens(f"Source 00: {source.get('title', '')}\nURL: {source.get('url', '')}\nContent: \n\n")
+            if used + cost > self.token_budget:
+                continue
+            used += cost
+            selected.add(i)
+            opened_sources.add(source_index)
+
+        context = ""
+        number = 0
+        for source_index, source in enumerate(sources):
+            picked = [text for i, (s, _, text) in enumerate(chunks) if s == source_index and i in selected]
+            if not picked:
+                continue
+            number += 1
+            content = "\n...\n".join(picked)
+            context += f"Source {number}: {source.get('title', '')}\nURL: {source.get('url', '')}\nContent: {content}\n\n"
+        return context, [self.chunk_key(chunks[i][2]) for i in sorted(selected)]
@@ -0,0 +1,114 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import Config
+
+class _HostSlot:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        # Requests holding or waiting for the semaphore
+        self.users = 0
+
+class HttpClient:
+    """
+    Pooled asyncio HTTP client shared by the tools of a worker process.
+
+    Wraps a single httpx.AsyncClient so connections (and TLS sessions) are kept alive
+    and reused across tasks, and caps concurrent requests per host so one slow site
+    cannot take over the whole pool.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_connections = max_connections or Config.HTTP_MAX_CONNECTIONS
+        self.max_connections_per_host = max_connections_per_host or Config.HTTP_MAX_CONNECTIONS_PER_HOST
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=keepalive_expiry or Config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self._client = httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout or Config.HTTP_TIMEOUT,
+            transport=transport,
+            follow_redirects=True,
+        )
+        # Only hosts with requests in flight or waiting have a slot
+        self._host_slots: Dict[str, _HostSlot] = {}
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        """
+        Holds one of the host's connection slots. The host's entry is dropped once no
+        request holds or waits for it, so crawling many distinct hosts does not grow it.
+        """
+        host = urlsplit(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = _HostSlot(self.max_connections_per_host)
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                del self._host_slots[host]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request and reads the full response body.
+        """
+        async with self._host_slot(url):
+            return await self._client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Sends a request without reading the body; the host slot is held until the block exits.
+        """
+        async with self._host_slot(url):
+            async with self._client.stream(method, url, **kwargs) as response:
+                yield response
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def aclose(self):
+        await self._client.aclose()
+
+_shared_client: Optional[HttpClient] = None
+
+def get_http_client() -> HttpClient:
+    """
+    Returns the process-wide pooled client, creating it on first use.
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = HttpClient()
+    return _shared_client
+
+async def close_http_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
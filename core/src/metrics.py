@@ -0,0 +1,343 @@
+import asyncio
+import bisect
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.config import Config
+from src.tools.parse_pool import get_parse_pool
+from src.workloads import workload_stats
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def clear(self):
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels: Any):
+        """
+        Mirrors a total counted elsewhere (e.g. a component's stats()).
+        """
+        self._values[self._key(labels)] = value
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            # Per-bucket counts (the last one is +Inf), sum, count
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+Collector = Callable[[], Union[None, Awaitable[None]]]
+
+class MetricsRegistry:
+    """
+    Metrics of one process, rendered in the Prometheus text format. Collectors run
+    before each render, to copy current values (queue depths, in-flight counts) from
+    the components that own them.
+    """
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Collector] = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    async def render(self) -> str:
+        for collect in self.collectors:
+            try:
+                result = collect()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: how much later than asked a short sleep wakes up. A loop
+    busy with CPU work (or blocked by a synchronous call) shows up here before it
+    shows up anywhere else.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.samples += 1
+
+    def start(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def take_max(self) -> float:
+        """
+        Largest lag since the last call.
+        """
+        max_lag, self.max_lag = self.max_lag, self.lag
+        return max_lag
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+class WorkerMetrics:
+    """
+    The worker's metrics. Latencies come from finished tracing spans (`observe_span`
+    is registered as a tracer listener); saturation gauges (in-flight tasks, queue
+    depths, LLM calls waiting for budget) are read from the components at scrape time.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.tasks = r.counter("prism_worker_tasks_total", "Tasks finished, by outcome", ("outcome",))
+        self.phase_seconds = r.histogram("prism_worker_phase_duration_seconds", "Duration of task phases", ("phase",))
+        self.tool_calls = r.counter("prism_worker_tool_calls_total", "Tool calls, by outcome", ("tool", "outcome"))
+        self.tool_seconds = r.histogram("prism_worker_tool_duration_seconds", "Duration of tool calls", ("tool",))
+        self.llm_calls = r.counter("prism_worker_llm_calls_total", "LLM calls, by outcome", ("provider", "model", "outcome"))
+        self.llm_seconds = r.histogram("prism_worker_llm_duration_seconds", "Duration of LLM calls", ("provider", "model"))
+        self.llm_first_token = r.histogram("prism_worker_llm_time_to_first_token_seconds", "Time to the first streamed token of LLM calls", ("provider", "model"))
+        self.llm_tokens = r.counter("prism_worker_llm_tokens_total", "LLM tokens reported by providers", ("provider", "model", "direction"))
+
+        self.tasks_in_flight = r.gauge("prism_worker_tasks_in_flight", "Tasks holding a MAX_CONCURRENT_TASKS slot")
+        self.tasks_max = r.gauge("prism_worker_tasks_max_concurrent", "MAX_CONCURRENT_TASKS")
+        self.slot_utilization = r.gauge("prism_worker_task_slot_utilization", "Share of task slots in use (0-1)")
+        self.tasks_buffered = r.gauge("prism_worker_tasks_buffered", "Tasks fetched and waiting for a slot in this worker")
+        self.queue_depth = r.gauge("prism_worker_task_queue_depth", "Tasks waiting in the shared task queue")
+        self.publish_queued = r.gauge("prism_worker_publish_queue_depth", "Updates waiting to be published")
+        self.publish_failed = r.counter("prism_worker_publish_failed_total", "Updates that failed to publish")
+        self.publish_dropped = r.counter("prism_worker_publish_dropped_total", "Progress updates dropped by a full publish queue")
+        self.api_queued = r.gauge("prism_worker_api_write_queue_depth", "Section drafts waiting to be saved")
+        self.api_failed = r.counter("prism_worker_api_failed_total", "Section drafts that could not be saved")
+        self.api_retried = r.counter("prism_worker_api_retries_total", "Retried API requests")
+        self.workload_in_flight = r.gauge("prism_worker_workload_in_flight", "Operations holding a workload slot", ("workload",))
+        self.workload_queue = r.gauge("prism_worker_workload_queue_depth", "Operations waiting for a workload slot", ("workload",))
+        self.workload_max = r.gauge("prism_worker_workload_max_concurrent", "Workload slots", ("workload",))
+        self.parse_queue = r.gauge("prism_worker_parse_pool_pending", "Pages waiting for or being parsed in the parse process pool")
+        self.llm_in_flight = r.gauge("prism_worker_llm_in_flight", "LLM calls in flight, per provider key", ("limit",))
+        self.llm_waiting = r.gauge("prism_worker_llm_waiting", "LLM calls waiting for rate limit budget, per provider key", ("limit",))
+        self.llm_rate_limited = r.counter("prism_worker_llm_rate_limited_total", "429 responses, per provider key", ("limit",))
+        self.llm_rate_scale = r.gauge("prism_worker_llm_rate_scale", "Share of the configured rate currently used after backoff", ("limit",))
+        self.loop_lag = r.gauge("prism_worker_event_loop_lag_seconds", "Largest event loop lag since the previous scrape")
+
+    def observe_span(self, span):
+        name = span.name
+        if name == "llm.call":
+            provider = span.attributes.get("provider", "unknown")
+            model = span.attributes.get("model", "unknown")
+            self.llm_calls.inc(provider=provider, model=model, outcome="error" if span.error else "ok")
+            self.llm_seconds.observe(span.duration, provider=provider, model=model)
+            if "first_token_ms" in span.attributes:
+                self.llm_first_token.observe(span.attributes["first_token_ms"] / 1000, provider=provider, model=model)
+            for direction in ("input", "output"):
+                tokens = span.attributes.get(f"{direction}_tokens")
+                if tokens:
+                    self.llm_tokens.inc(tokens, provider=provider, model=model, direction=direction)
+        elif name.startswith("tool."):
+            tool = name[len("tool."):]
+            failed = span.error or "error" in span.attributes
+            self.tool_calls.inc(tool=tool, outcome="error" if failed else "ok")
+            self.tool_seconds.observe(span.duration, tool=tool)
+        else:
+            self.phase_seconds.observe(span.duration, phase=name)
+            if name == "process_task":
+                failed = span.error or "error" in span.attributes
+                self.tasks.inc(outcome="error" if failed else "ok")
+
+    def watch(self, intake=None, publisher=None, api_client=None, rate_limiter=None, loop_lag: Optional[LoopLagMonitor] = None):
+        """
+        Registers a collector reading the given components' stats at scrape time.
+        """
+        async def collect():
+            if intake is not None:
+                stats = await intake.stats()
+                self.tasks_in_flight.set(stats["in_flight"])
+                self.tasks_max.set(intake.max_concurrent)
+                self.slot_utilization.set(stats["slot_utilization"])
+                self.tasks_buffered.set(stats["buffered"])
+                if stats.get("queue_depth") is not None:
+                    self.queue_depth.set(stats["queue_depth"])
+            if publisher is not None:
+                stats = publisher.stats()
+                self.publish_queued.set(stats.get("queued", 0))
+                self.publish_failed.set(stats.get("failed", 0))
+                self.publish_dropped.set(stats.get("dropped", 0))
+            if api_client is not None:
+                stats = api_client.stats()
+                self.api_queued.set(stats["queued"])
+                self.api_failed.set(stats["failed"])
+                self.api_retried.set(stats["retried"])
+            for name, stats in workload_stats().items():
+                self.workload_in_flight.set(stats["in_flight"], workload=name)
+                self.workload_queue.set(stats["queue_depth"], workload=name)
+                self.workload_max.set(stats["max_concurrent"], workload=name)
+            parse_pool = get_parse_pool()
+            self.parse_queue.set(parse_pool.pending if parse_pool is not None else 0)
+            if rate_limiter is not None:
+                for key, stats in rate_limiter.stats().items():
+                    self.llm_in_flight.set(stats["in_flight"], limit=key)
+                    self.llm_waiting.set(stats["waiting"], limit=key)
+                    self.llm_rate_limited.set(stats["rate_limited"], limit=key)
+                    self.llm_rate_scale.set(stats["scale"], limit=key)
+            if loop_lag is not None:
+                self.loop_lag.set(loop_lag.take_max())
+
+        self.registry.collectors.append(collect)
+
+class MetricsServer:
+    """
+    Minimal HTTP server on the worker's event loop answering `GET /metrics` for
+    Prometheus (and `GET /healthz`). Each connection gets one response and is closed.
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: Optional[str] = None, port: Optional[int] = None):
+        self.registry = registry
+        self.host = host or Config.METRICS_HOST
+        self.port = Config.METRICS_PORT if port is None else port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "MetricsServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Skip the headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            method, path = (parts[0], parts[1].split("?", 1)[0]) if len(parts) >= 2 else ("", "")
+            if method != "GET":
+                status, body, content_type = "405 Method Not Allowed", "", "text/plain"
+            elif path == "/metrics":
+                status, body, content_type = "200 OK", await self.registry.render(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/healthz":
+                status, body, content_type = "200 OK", "ok\n", "text/plain"
+            else:
+                status, body, content_type = "404 Not Found", "", "text/plain"
+            data = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def aclose(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+async def start_worker_metrics(intake, publisher, api_client, rate_limiter, tracer) -> Tuple[WorkerMetrics, MetricsServer, LoopLagMonitor]:
+    """
+    Wires the worker's metrics (span listener, scrape-time collectors, loop lag
+    monitor) and serves them on METRICS_HOST:METRICS_PORT.
+    """
+    metrics = WorkerMetrics()
+    loop_lag = LoopLagMonitor()
+    metrics.watch(intake, publisher, api_client, rate_limiter, loop_lag)
+    server = await MetricsServer(metrics.registry).start()
+    tracer.listeners.append(metrics.observe_span)
+    loop_lag.start()
+    print(f"Metrics on http://{server.host}:{server.port}/metrics")
+    return metrics, server, loop_lag
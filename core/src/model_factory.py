@@ -1,3 +1,8 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -7,10 +12,124 @@ except ImportError:
     ChatXAI = None
 
 from src.config import Config
+from src.rate_limiter import get_rate_limiter
+from src.tracing import get_tracer
+
+class ModelPool:
+    """
+    Bounded cache of chat model clients keyed by (provider, model, API key hash), so tasks
+    with the same config share one client and its warm connection pool instead of
+    repeating SDK and HTTP client setup. Least recently used clients are evicted beyond
+    `max_entries`, and clients unused for `idle_ttl` seconds are dropped.
+
+    Runnables derived from a pooled client (such as `with_structured_output` wrappers)
+    are cached with it through `derived` and dropped when it leaves the pool.
+
+    Evicted clients are only dereferenced, not closed: tasks still holding one keep
+    using it until they finish.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, idle_ttl: Optional[float] = None):
+        self.max_entries = Config.MODEL_POOL_MAX_ENTRIES if max_entries is None else max_entries
+        self.idle_ttl = Config.MODEL_POOL_IDLE_TTL if idle_ttl is None else idle_ttl
+        # key -> (last_used, model)
+        self._models: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        # id(pooled model) -> {name: derived runnable}
+        self._derived: Dict[int, Dict[Any, Any]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.build_seconds = 0.0
+
+    @staticmethod
+    def key(provider: str, model_name: Optional[str], api_key: str) -> Tuple[str, str, str]:
+        return (provider, model_name or "", hashlib.sha256(api_key.encode()).hexdigest()[:16])
+
+    def get(self, key: Tuple[str, str, str], build) -> Any:
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._models.get(key)
+        if entry is not None:
+            self._models[key] = (now, entry[1])
+            self._models.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        start = time.perf_counter()
+        model = build()
+        self.build_seconds += time.perf_counter() - start
+        self.misses += 1
+        if self.max_entries > 0:
+            self._models[key] = (now, model)
+            self._derived[id(model)] = {}
+            while len(self._models) > self.max_entries:
+                _, (_, evicted) = self._models.popitem(last=False)
+                self._derived.pop(id(evicted), None)
+                self.evictions += 1
+        return model
+
+    def derived(self, model: Any, name: Any, build) -> Any:
+        """
+        Returns `build()` cached under `name` for a pooled model; models not in the pool
+        get a fresh `build()` every time.
+        """
+        cache = self._derived.get(id(model))
+        if cache is None:
+            return build()
+        runnable = cache.get(name)
+        if runnable is None:
+            runnable = cache[name] = build()
+        return runnable
+
+    def _expire(self, now: float):
+        if self.idle_ttl <= 0:
+            return
+        # Oldest first: stop at the first client used recently enough
+        while self._models:
+            key, (last_used, _) = next(iter(self._models.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            _, model = self._models.pop(key)
+            self._derived.pop(id(model), None)
+            self.expired += 1
+
+    def clear(self):
+        self._models.clear()
+        self._derived.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._models),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "avg_build_ms": round(self.build_seconds / self.misses * 1000, 2) if self.misses else 0.0,
+        }
+
+_model_pool: Optional[ModelPool] = None
+
+def get_model_pool() -> ModelPool:
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = ModelPool()
+    return _model_pool
+
+def structured_output(model: Any, schema: Any) -> Any:
+    """
+    `model.with_structured_output(schema)`, built once per pooled model and schema.
+    """
+    return get_model_pool().derived(model, schema, lambda: model.with_structured_output(schema))
 
 class ModelFactory:
     @staticmethod
     def get_model(config: dict):
+        """
+        Returns a chat model for the task config, reused from the model pool when a task
+        with the same provider, model and API key ran recently.
+        """
         provider = config.get("provider", "openai").lower()
         model_name = config.get("model")
         api_key = config.get("apiKey")
@@ -18,27 +137,41 @@ class ModelFactory:
         if not api_key:
             raise ValueError(f"API key for provider '{provider}' is required but not provided.")
 
+        return get_model_pool().get(
+            ModelPool.key(provider, model_name, api_key),
+            lambda: ModelFactory.create_model(provider, model_name, api_key)
+        )
+
+    @staticmethod
+    def create_model(provider: str, model_name: Optional[str], api_key: str):
+        # Every call of the model waits for the shared budget of this provider key, and is traced when tracing is on
+        callbacks = get_rate_limiter().callbacks(provider, api_key) + get_tracer().callbacks()
+
         if provider == "openai":
             return ChatOpenAI(
                 model=model_name or "gpt-4-turbo",
-                api_key=api_key
+                api_key=api_key,
+                callbacks=callbacks
             )
         elif provider == "anthropic":
             return ChatAnthropic(
                 model=model_name or "claude-3-opus-20240229",
-                api_key=api_key
+                api_key=api_key,
+                callbacks=callbacks
             )
         elif provider == "google":
             return ChatGoogleGenerativeAI(
                 model=model_name or "gemini-pro",
-                google_api_key=api_key
+                google_api_key=api_key,
+                callbacks=callbacks
             )
         elif provider == "xai":
             if ChatXAI is None:
                  raise ImportError("langchain-xai is not installed")
             return ChatXAI(
                 model=model_name or "grok-beta",
-                xai_api_key=api_key
+                xai_api_key=api_key,
+                callbacks=callbacks
             )
         else:
             raise ValueError(f"Unsupported provider: {provider}")
@@ -0,0 +1,106 @@
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Stand-ins serialized in place of the per-chunk fields; the report_chunk envelope is
+# split around them once per request and serializer
+_CHUNK_MARK = "\x00chunk\x00"
+_INDEX_MARK = "\x00chunk_index\x00"
+
+class UpdateTemplate:
+    """
+    Envelope of the updates published for one request.
+
+    The constant fields (`target_user_id`, `requestId`, `chatId`) are captured once per
+    request; each update only adds its own fields. `report_chunk`, published once per
+    LLM chunk, returns a `ReportChunk` that publishers serialize by splicing the chunk
+    into the envelope pre-serialized by `chunk_envelope`.
+    """
+
+    def __init__(self, user_id: str, request_id: Optional[str], chat_id: Optional[str]):
+        self.user_id = user_id
+        self.request_id = request_id
+        self.chat_id = chat_id
+        self.ids = {"requestId": request_id, "chatId": chat_id}
+        self._chunk_envelopes: Dict[str, Tuple[Union[str, bytes], ...]] = {}
+
+    def update(self, agent: str, status: str, message: str, data: Optional[Dict[str, Any]] = None,
+               update_type: str = "agent_update") -> Dict[str, Any]:
+        payload_data = {**self.ids, **data} if data else dict(self.ids)
+        return {
+            "target_user_id": self.user_id,
+            "type": update_type,
+            "payload": {
+                "agent": agent,
+                "status": status,
+                "message": message,
+                "data": payload_data,
+            },
+        }
+
+    def error(self, message: str) -> Dict[str, Any]:
+        return self.update("System", "error", message, update_type="agent_error")
+
+    def report_chunk(self, chunk: str, chunk_index: int) -> "ReportChunk":
+        return ReportChunk(self, chunk, chunk_index)
+
+    def report_chunk_dict(self, chunk: Any, chunk_index: Any) -> Dict[str, Any]:
+        return {
+            "target_user_id": self.user_id,
+            "type": "agent_update",
+            "payload": {
+                "agent": "Conclusion",
+                "status": "output",
+                "message": "Generating report...",
+                "data": {
+                    "requestId": self.request_id,
+                    "chatId": self.chat_id,
+                    "event_type": "report_chunk",
+                    "chunk": chunk,
+                    "chunk_index": chunk_index,
+                },
+            },
+        }
+
+    def chunk_envelope(self, serializer) -> Tuple[Union[str, bytes], ...]:
+        """
+        Returns the serialized report_chunk envelope as (head, middle, tail): the text
+        before the chunk, between the chunk and its index, and after the index.
+        Computed once per serializer.
+        """
+        envelope = self._chunk_envelopes.get(serializer.name)
+        if envelope is None:
+            encoded = serializer.dumps(self.report_chunk_dict(_CHUNK_MARK, _INDEX_MARK))
+            head, rest = encoded.split(serializer.dumps(_CHUNK_MARK), 1)
+            middle, tail = rest.split(serializer.dumps(_INDEX_MARK), 1)
+            envelope = self._chunk_envelopes[serializer.name] = (head, middle, tail)
+        return envelope
+
+class ReportChunk:
+    """
+    One report_chunk update. Only the chunk and its index are serialized per event;
+    the rest of the message comes from the request's pre-serialized envelope.
+    """
+    __slots__ = ("template", "chunk", "chunk_index")
+
+    type = "agent_update"
+    status = "output"
+
+    def __init__(self, template: UpdateTemplate, chunk: str, chunk_index: int):
+        self.template = template
+        self.chunk = chunk
+        self.chunk_index = chunk_index
+
+    @property
+    def request_id(self) -> Optional[str]:
+        return self.template.request_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.template.report_chunk_dict(self.chunk, self.chunk_index)
+
+    def encode(self, serializer, chunk: Optional[str] = None) -> Union[str, bytes]:
+        """
+        Serializes the update, optionally with `chunk` (e.g. several merged chunks)
+        in place of its own.
+        """
+        head, middle, tail = self.template._chunk_envelopes.get(serializer.name) or self.template.chunk_envelope(serializer)
+        dumps = serializer.dumps
+        return head + dumps(self.chunk if chunk is None else chunk) + middle + dumps(self.chunk_index) + tail
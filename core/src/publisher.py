@@ -0,0 +1,255 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from src.config import Config
+from src.payloads import ReportChunk
+from src.serialization import get_serializer
+
+UPDATES_CHANNEL = "updates"
+
+class RedisPublisher:
+    """
+    Publishes every update with its own PUBLISH round-trip.
+    """
+
+    def __init__(self, redis_client, channel: str = UPDATES_CHANNEL, serializer=None):
+        self.redis = redis_client
+        self.channel = channel
+        self.serializer = serializer or get_serializer()
+        self.published = 0
+        self.round_trips = 0
+        self.failed = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def publish_update(self, payload, droppable: bool = False):
+        try:
+            if isinstance(payload, ReportChunk):
+                await self.redis.publish(self.channel, payload.encode(self.serializer))
+                update_type, status = payload.type, payload.status
+            else:
+                await self.redis.publish(self.channel, self.serializer.dumps(payload))
+                update_type, status = payload['type'], payload.get('payload', {}).get('status')
+            self.published += 1
+            self.round_trips += 1
+            print(f"Published update to {self.channel}: {update_type} - {status}")
+        except Exception as e:
+            self.failed += 1
+            print(f"Failed to publish update: {e}")
+
+    def publish_nowait(self, payload, droppable: bool = True):
+        """
+        Fire-and-forget publish for synchronous callers running on the event loop.
+        """
+        task = asyncio.get_running_loop().create_task(self.publish_update(payload, droppable))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"published": self.published, "failed": self.failed, "round_trips": self.round_trips}
+
+class _Pending:
+    __slots__ = ("payload", "request_id", "droppable", "chunks")
+
+    def __init__(self, payload, request_id: Optional[str], droppable: bool, chunks: Optional[List[str]] = None):
+        self.payload = payload
+        self.request_id = request_id
+        self.droppable = droppable
+        # Pieces of merged report_chunk events, joined when the batch is serialized
+        self.chunks = chunks
+
+    def encode(self, serializer):
+        merged = "".join(self.chunks) if self.chunks and len(self.chunks) > 1 else None
+        if isinstance(self.payload, ReportChunk):
+            return self.payload.encode(serializer, merged)
+        if merged is None:
+            return serializer.dumps(self.payload)
+        inner = self.payload["payload"]
+        data = {**inner["data"], "chunk": merged}
+        return serializer.dumps({**self.payload, "payload": {**inner, "data": data}})
+
+def _report_chunk(payload) -> Optional[str]:
+    if isinstance(payload, ReportChunk):
+        return payload.chunk
+    data = payload.get("payload", {}).get("data") or {}
+    if data.get("event_type") == "report_chunk" and isinstance(data.get("chunk"), str):
+        return data["chunk"]
+    return None
+
+class BatchingPublisher:
+    """
+    Queues updates and publishes them in pipelined batches: one Redis round-trip per
+    `flush_interval` (seconds) or per `max_batch` messages, whichever comes first.
+
+    Consecutive `report_chunk` events of the same request are merged into a single
+    message (the first event's `chunk_index` is kept). The queue holds at most
+    `max_queue` messages. When it is full, low-priority (droppable) progress events
+    are discarded oldest first, and other events wait for the next flush.
+    Message order is preserved.
+    """
+
+    def __init__(self, redis_client, channel: str = UPDATES_CHANNEL, flush_interval: Optional[float] = None,
+                 max_batch: Optional[int] = None, max_queue: Optional[int] = None, serializer=None):
+        self.redis = redis_client
+        self.channel = channel
+        self.serializer = serializer or get_serializer()
+        self.flush_interval = Config.PUBLISH_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_batch = max_batch or Config.PUBLISH_MAX_BATCH
+        self.max_queue = max_queue or Config.PUBLISH_MAX_QUEUE
+
+        self._queue: Deque[_Pending] = deque()
+        # Per request, the queued report_chunk that the next chunk may be merged into
+        self._open_chunks: Dict[Optional[str], _Pending] = {}
+        self._not_empty = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.merged = 0
+        self.dropped = 0
+        self.published = 0
+        self.failed = 0
+        self.round_trips = 0
+
+    async def publish_update(self, payload, droppable: bool = False):
+        while not self._enqueue(payload, droppable):
+            # Queue full of events that must not be dropped: wait for the flusher
+            self._space.clear()
+            await self._space.wait()
+
+    def publish_nowait(self, payload, droppable: bool = True):
+        """
+        Non-blocking publish for synchronous callers running on the event loop. A
+        droppable event that does not fit in a full queue is dropped; other events
+        are queued regardless of the bound.
+        """
+        self._enqueue(payload, droppable, force=not droppable)
+
+    def _enqueue(self, payload, droppable: bool, force: bool = False) -> bool:
+        self._ensure_flusher()
+        if isinstance(payload, ReportChunk):
+            request_id = payload.request_id
+        else:
+            request_id = (payload.get("payload", {}).get("data") or {}).get("requestId")
+        chunk = _report_chunk(payload)
+
+        if chunk is not None:
+            pending = self._open_chunks.get(request_id)
+            if pending is not None:
+                pending.chunks.append(chunk)
+                self.merged += 1
+                return True
+
+        if len(self._queue) >= self.max_queue and not force:
+            if not self._drop_oldest_droppable():
+                if droppable:
+                    self.dropped += 1
+                    return True
+                return False
+
+        pending = _Pending(payload, request_id, droppable, [chunk] if chunk is not None else None)
+        self._queue.append(pending)
+        self.enqueued += 1
+        if chunk is not None:
+            self._open_chunks[request_id] = pending
+        else:
+            self._open_chunks.pop(request_id, None)
+
+        self._not_empty.set()
+        if len(self._queue) >= self.max_batch:
+            self._batch_ready.set()
+        return True
+
+    def _drop_oldest_droppable(self) -> bool:
+        for pending in self._queue:
+            if pending.droppable:
+                self._queue.remove(pending)
+                self.dropped += 1
+                return True
+        return False
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._queue or not self._closing:
+            if not self._queue:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+            if len(self._queue) < self.max_batch and not self._closing:
+                # Linger so a burst of events shares one round-trip
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_batch()
+
+    async def _flush_batch(self):
+        batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+        for pending in batch:
+            if self._open_chunks.get(pending.request_id) is pending:
+                del self._open_chunks[pending.request_id]
+        self._space.set()
+        if not batch:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        queued = 0
+        for pending in batch:
+            # An update that cannot be serialized is skipped on its own, not with its batch
+            try:
+                pipe.publish(self.channel, pending.encode(self.serializer))
+                queued += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Failed to serialize update for {pending.request_id}: {e}")
+        if not queued:
+            return
+
+        try:
+            await pipe.execute()
+            self.published += queued
+        except Exception as e:
+            self.failed += queued
+            print(f"Failed to publish {queued} updates: {e}")
+        finally:
+            self.round_trips += 1
+
+    async def aclose(self):
+        """
+        Publishes everything still queued and stops the flusher. Updates published
+        afterwards are flushed immediately, without lingering.
+        """
+        self._closing = True
+        self._not_empty.set()
+        self._batch_ready.set()
+        if self._flusher is not None:
+            await self._flusher
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "published": self.published,
+            "failed": self.failed,
+            "round_trips": self.round_trips,
+            "queued": len(self._queue),
+        }
+
+def create_publisher(redis_client):
+    """
+    Returns the publisher selected by PUBLISH_BATCHING.
+    """
+    if Config.PUBLISH_BATCHING:
+        return BatchingPublisher(redis_client)
+    return RedisPublisher(redis_client)
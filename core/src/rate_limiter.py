@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from src.config import Config
+from src.context_builder import estimate_tokens
+
+# Bucket capacity: a burst may spend this many seconds' worth of the per-minute budget at once
+BURST_SECONDS = 10.0
+# Adaptive rate: halved on every 429, recovered by this fraction per successful call
+MIN_SCALE, RECOVERY_STEP = 0.1, 0.05
+MAX_BACKOFF = 60.0
+
+def _capacity(rate: float) -> float:
+    return max(1.0, rate * BURST_SECONDS / 60)
+
+class TokenBuckets:
+    """
+    In-process request and token buckets, one pair per limiter key. `take` either
+    spends one request and `tokens` tokens and returns 0, or spends nothing and
+    returns how many seconds to wait before trying again. A rate of 0 is unlimited.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Dict[str, float]] = {}
+
+    def _bucket(self, key: str) -> Dict[str, float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {"requests": None, "tokens": None, "updated": time.monotonic(), "until": 0.0}
+        return bucket
+
+    async def take(self, key: str, rpm: float, tpm: float, tokens: float) -> float:
+        bucket = self._bucket(key)
+        now = time.monotonic()
+        if bucket["until"] > now:
+            return bucket["until"] - now
+        elapsed, bucket["updated"] = now - bucket["updated"], now
+
+        levels, wait = {}, 0.0
+        for name, rate, cost in (("requests", rpm, 1.0), ("tokens", tpm, tokens)):
+            if rate <= 0:
+                continue
+            capacity = _capacity(rate)
+            level = capacity if bucket[name] is None else min(capacity, bucket[name] + elapsed * rate / 60)
+            # A call larger than the whole bucket waits for a full bucket instead of forever
+            cost = min(cost, capacity)
+            bucket[name] = level
+            levels[name] = level - cost
+            if level < cost:
+                wait = max(wait, (cost - level) * 60 / rate)
+        if wait > 0:
+            return wait
+        bucket.update(levels)
+        return 0.0
+
+    async def adjust(self, key: str, tokens: float):
+        """
+        Charges (or refunds, if negative) tokens after the fact; the bucket may go into debt.
+        """
+        bucket = self._bucket(key)
+        if bucket["tokens"] is not None:
+            bucket["tokens"] -= tokens
+
+    async def backoff(self, key: str, seconds: float):
+        bucket = self._bucket(key)
+        bucket["until"] = max(bucket["until"], time.monotonic() + seconds)
+
+# KEYS[1] bucket hash; ARGV rpm, tpm, tokens, burst seconds. Returns the wait in ms (0 = granted).
+TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'updated', 'until')
+local until_ts = tonumber(state[4]) or 0
+if until_ts > now then
+    return math.ceil((until_ts - now) * 1000)
+end
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+local burst = tonumber(ARGV[4])
+local names = {'requests', 'tokens'}
+local rates = {tonumber(ARGV[1]), tonumber(ARGV[2])}
+local costs = {1, tonumber(ARGV[3])}
+local levels = {}
+local wait = 0
+for i = 1, 2 do
+    local rate = rates[i]
+    if rate > 0 then
+        local capacity = math.max(1, rate * burst / 60)
+        local level = tonumber(state[i])
+        if level == nil then level = capacity else level = math.min(capacity, level + elapsed * rate / 60) end
+        -- A call larger than the whole bucket waits for a full bucket instead of forever
+        local cost = math.min(costs[i], capacity)
+        if level < cost then wait = math.max(wait, (cost - level) * 60 / rate) end
+        levels[i] = {level, cost}
+    end
+end
+for i = 1, 2 do
+    if levels[i] ~= nil then
+        local level = levels[i][1]
+        if wait == 0 then level = level - levels[i][2] end
+        redis.call('HSET', KEYS[1], names[i], tostring(level))
+    end
+end
+redis.call('HSET', KEYS[1], 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], 300)
+return math.ceil(wait * 1000)
+"""
+
+# KEYS[1] bucket hash; ARGV seconds. Pushes the shared "until" forward.
+BACKOFF_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local until_ts = math.max(tonumber(redis.call('HGET', KEYS[1], 'until')) or 0, now + tonumber(ARGV[1]))
+redis.call('HSET', KEYS[1], 'until', tostring(until_ts))
+redis.call('EXPIRE', KEYS[1], 300)
+return 1
+"""
+
+class RedisTokenBuckets:
+    """
+    The same buckets kept in a Redis hash per key and updated by a Lua script, so every
+    worker pod spends from one budget per provider key. Falls back to in-process
+    buckets while Redis is unreachable.
+    """
+
+    def __init__(self, redis_client, prefix: str = "llm_rate:"):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.fallback = TokenBuckets()
+        self.errors = 0
+
+    def _failed(self, e: Exception):
+        if self.errors == 0:
+            print(f"LLM rate limiter: Redis unavailable, using local budgets: {e}")
+        self.errors += 1
+
+    async def take(self, key: str, rpm: float, tpm: float, tokens: float) -> float:
+        try:
+            wait_ms = await self.redis.eval(TAKE_SCRIPT, 1, self.prefix + key, rpm, tpm, tokens, BURST_SECONDS)
+            return int(wait_ms) / 1000
+        except Exception as e:
+            self._failed(e)
+            return await self.fallback.take(key, rpm, tpm, tokens)
+
+    async def adjust(self, key: str, tokens: float):
+        try:
+            if await self.redis.hexists(self.prefix + key, "tokens"):
+                await self.redis.hincrbyfloat(self.prefix + key, "tokens", -tokens)
+        except Exception as e:
+            self._failed(e)
+            await self.fallback.adjust(key, tokens)
+
+    async def backoff(self, key: str, seconds: float):
+        try:
+            await self.redis.eval(BACKOFF_SCRIPT, 1, self.prefix + key, seconds)
+        except Exception as e:
+            self._failed(e)
+            await self.fallback.backoff(key, seconds)
+
+def _parse_duration(value: str) -> Optional[float]:
+    """
+    Seconds from a rate-limit header: "2", "1.5", "20ms" or "6m0s" style values.
+    """
+    value = value.strip().lower()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}"
+    return "RateLimit" in text or "429" in text or "RESOURCE_EXHAUSTED" in text
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    The wait the provider asked for, from the 429 response headers (retry-after-ms,
+    retry-after, or OpenAI's x-ratelimit-reset-* headers), if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        seconds = _parse_duration(headers["retry-after-ms"])
+        if seconds is not None:
+            return seconds / 1000
+    waits = [
+        _parse_duration(headers[name])
+        for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(name)
+    ]
+    waits = [wait for wait in waits if wait is not None]
+    return max(waits) if waits else None
+
+class ProviderLimit:
+    """
+    Budget for one provider API key: requests/min and tokens/min buckets plus a cap on
+    calls in flight in this process.
+
+    Calls wait in `acquire` until both buckets allow them. Token use is charged up
+    front from a prompt estimate and corrected with the provider's reported usage when
+    the call ends. On a 429 the limit backs off for the time the provider asked for
+    (exponential if it did not say) and halves its rates, then recovers them gradually
+    as calls succeed.
+    """
+
+    def __init__(self, key: str, rpm: float, tpm: float, max_concurrent: int, buckets):
+        self.key = key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.buckets = buckets
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        self.scale = 1.0
+        self._consecutive_limits = 0
+
+        self.calls = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.delayed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.tokens = 0
+        self.rate_limited = 0
+
+    async def acquire(self, tokens: float = 0):
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            if self._slots is not None:
+                await self._slots.acquire()
+            try:
+                while (wait := await self.buckets.take(self.key, self.rpm * self.scale, self.tpm * self.scale, tokens)) > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - start
+        self.calls += 1
+        self.in_flight += 1
+        self.tokens += int(tokens)
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        if waited >= 0.01:
+            self.delayed += 1
+
+    def release(self):
+        self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    async def record_usage(self, estimated: float, actual: float):
+        self.tokens += int(actual - estimated)
+        if self.tpm > 0 and actual != estimated:
+            await self.buckets.adjust(self.key, actual - estimated)
+
+    def succeeded(self):
+        self._consecutive_limits = 0
+        self.scale = min(1.0, self.scale + RECOVERY_STEP)
+
+    async def rate_limited_by_provider(self, wait: Optional[float] = None):
+        self.rate_limited += 1
+        self._consecutive_limits += 1
+        self.scale = max(MIN_SCALE, self.scale / 2)
+        if wait is None:
+            wait = 2 ** (self._consecutive_limits - 1)
+        wait = min(MAX_BACKOFF, wait)
+        print(f"LLM rate limited ({self.key}): backing off {wait:.1f}s, rate scaled to {self.scale:.2f}")
+        await self.buckets.backoff(self.key, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "delayed": self.delayed,
+            "avg_wait": round(self.wait_total / self.calls, 3) if self.calls else 0.0,
+            "max_wait": round(self.wait_max, 3),
+            "tokens": self.tokens,
+            "rate_limited": self.rate_limited,
+            "scale": round(self.scale, 2),
+        }
+
+class RateLimitCallback(AsyncCallbackHandler):
+    """
+    Attached to every chat model by ModelFactory, so each call of the model (directly,
+    in a chain, via with_structured_output or streamed) waits for its ProviderLimit
+    before it is sent and reports its outcome when it ends.
+    """
+
+    def __init__(self, limit: ProviderLimit):
+        self.limit = limit
+        # run_id -> estimated prompt tokens of calls holding a slot
+        self._leases: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any):
+        tokens = sum(estimate_tokens(str(message.content)) for batch in messages for message in batch)
+        await self.limit.acquire(tokens)
+        self._leases[run_id] = tokens
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        estimated = self._leases.pop(run_id, None)
+        if estimated is None:
+            return
+        self.limit.release()
+        self.limit.succeeded()
+        actual = _total_tokens(response)
+        if actual:
+            await self.limit.record_usage(estimated, actual)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        if self._leases.pop(run_id, None) is None:
+            return
+        self.limit.release()
+        if is_rate_limit_error(error):
+            await self.limit.rate_limited_by_provider(retry_after(error))
+
+def _total_tokens(response) -> int:
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    total = 0
+    for generations in getattr(response, "generations", []):
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            total += metadata.get("total_tokens", 0)
+    return total
+
+class LLMRateLimiter:
+    """
+    Registry of ProviderLimits keyed by provider and API key hash. Limits come from
+    Config (LLM_RPM / LLM_TPM, overridden per provider with e.g. OPENAI_RPM).
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or TokenBuckets()
+        self._limits: Dict[str, ProviderLimit] = {}
+
+    def limit_for(self, provider: str, api_key: str) -> ProviderLimit:
+        key = f"{provider}:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+        limit = self._limits.get(key)
+        if limit is None:
+            rpm, tpm = Config.LLM_RATE_LIMITS.get(provider, (Config.LLM_RPM, Config.LLM_TPM))
+            limit = self._limits[key] = ProviderLimit(key, rpm, tpm, Config.LLM_MAX_CONCURRENT_CALLS, self.buckets)
+        return limit
+
+    def callbacks(self, provider: str, api_key: str) -> List[RateLimitCallback]:
+        """
+        Callbacks to attach to a model for this provider key (none when disabled).
+        """
+        if not Config.LLM_RATE_LIMIT_ENABLED:
+            return []
+        return [RateLimitCallback(self.limit_for(provider, api_key))]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: limit.stats() for key, limit in self._limits.items()}
+
+    async def log_stats(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            for key, stats in self.stats().items():
+                print(f"LLM limit {key}: " + " ".join(f"{name}={value}" for name, value in stats.items()))
+
+_shared_limiter: Optional[LLMRateLimiter] = None
+
+def configure_rate_limiter(redis_client=None) -> LLMRateLimiter:
+    """
+    Builds the process-wide limiter from Config. Called once by the worker with its Redis
+    client; budgets are shared through Redis when LLM_RATE_LIMIT_BACKEND is "redis".
+    """
+    global _shared_limiter
+    if redis_client is not None and Config.LLM_RATE_LIMIT_BACKEND == "redis":
+        _shared_limiter = LLMRateLimiter(RedisTokenBuckets(redis_client))
+    else:
+        _shared_limiter = LLMRateLimiter()
+    return _shared_limiter
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """
+    Returns the process-wide limiter (in-process budgets until `configure_rate_limiter` is called).
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        configure_rate_limiter()
+    return _shared_limiter
@@ -0,0 +1,120 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.context_builder import estimate_tokens
+
+HEADING = re.compile(r"^\s{0,3}#{1,6}\s+(.*)$")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def extract_key_points(text: str, max_points: int = 6, max_point_chars: int = 200) -> List[str]:
+    """
+    Cheap extractive summary of a markdown draft: its headings plus the first
+    sentence of each paragraph, in document order.
+    """
+    points: List[str] = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        first_line = block.splitlines()[0]
+        heading = HEADING.match(first_line)
+        if heading:
+            point = heading.group(1)
+            rest = "\n".join(block.splitlines()[1:]).strip()
+            if rest:
+                points.append(point.strip())
+                point = SENTENCE_END.split(" ".join(rest.split()), maxsplit=1)[0]
+        else:
+            point = SENTENCE_END.split(" ".join(block.split()), maxsplit=1)[0]
+        point = point.strip().lstrip("-*> ").strip()
+        if point:
+            points.append(point[:max_point_chars])
+        if len(points) >= max_points:
+            break
+    return points[:max_points]
+
+def section_digest(section: Dict[str, Any], max_points: int = 6) -> str:
+    """
+    Compact stand-in for a full section in refinement prompts.
+    """
+    points = extract_key_points(section.get("content", ""), max_points)
+    lines = "".join(f"- {point}\n" for point in points)
+    return f"Section: {section['title']}\nKey points:\n{lines}\n"
+
+TEXT_BLOCK = re.compile(r"<text>(.*?)</text>", re.DOTALL)
+LINK_TAG = re.compile(r"<link\b([^>]*)/?>")
+ATTRIBUTE = re.compile(r'(\w+)="([^"]*)"')
+
+class ReportContext:
+    """
+    Rolling, token-budgeted representation of the report written so far, used as
+    the refinement context for the next section.
+
+    Keeps the executive summary, each refined section's title and key claims, and
+    the sources already cited. When the rendering exceeds `token_budget`, claims
+    are trimmed first, then older sources and sections are elided, so prompt size
+    stays flat however long the report gets. A budget of 0 disables the cap and
+    renders the full XML of every section (the original behaviour).
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, max_points: int = 5):
+        self.token_budget = Config.REPORT_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.max_points = max_points
+        self.summary = ""
+        self.sections: List[Tuple[str, List[str]]] = []
+        self.sources: Dict[str, str] = {}
+        self._full = ""
+
+    def set_summary(self, summary: str):
+        self.summary = summary
+        self._full += f"Executive Summary:\n{summary}\n\n"
+
+    def add_section(self, title: str, section_xml: str):
+        self._full += f"{section_xml}\n\n"
+        text = "\n\n".join(block.strip() for block in TEXT_BLOCK.findall(section_xml))
+        self.sections.append((title, extract_key_points(text or section_xml, self.max_points)))
+        for match in LINK_TAG.finditer(section_xml):
+            attributes = dict(ATTRIBUTE.findall(match.group(1)))
+            url = attributes.get("url")
+            if url and url not in self.sources:
+                self.sources[url] = attributes.get("title", "")
+
+    def render(self) -> str:
+        if self.token_budget <= 0:
+            return self._full
+
+        for points in range(self.max_points, -1, -1):
+            text = self._render(points, len(self.sections), len(self.sources))
+            if estimate_tokens(text) <= self.token_budget:
+                return text
+
+        # Titles alone don't fit: keep only the most recent sources, then sections
+        keep_sections, keep_sources = len(self.sections), len(self.sources)
+        while keep_sources or keep_sections > 1:
+            if keep_sources:
+                keep_sources //= 2
+            else:
+                keep_sections //= 2
+            text = self._render(0, keep_sections, keep_sources)
+            if estimate_tokens(text) <= self.token_budget:
+                return text
+        return text[:self.token_budget * 4]
+
+    def _render(self, points: int, keep_sections: int, keep_sources: int) -> str:
+        parts = [f"Executive Summary:\n{self.summary}\n"]
+        if self.sections:
+            parts.append("Sections written so far:")
+            elided = len(self.sections) - keep_sections
+            if elided:
+                parts.append(f"({elided} earlier sections omitted)")
+            for title, claims in self.sections[elided:]:
+                parts.append(f"## {title}")
+                parts.extend(f"- {claim}" for claim in claims[:points])
+            parts.append("")
+        if self.sources:
+            parts.append("Sources already cited:")
+            for url, title in list(self.sources.items())[len(self.sources) - keep_sources:]:
+                parts.append(f"- {title} ({url})")
+            parts.append("")
+        return "\n".join(parts) + "\n"
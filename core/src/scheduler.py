@@ -0,0 +1,189 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from src.config import Config
+from src.serialization import get_serializer
+from src.task_source import QueuedTask
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = PRIORITIES["normal"]
+MIN_WEIGHT, MAX_WEIGHT = 0.1, 100.0
+
+class _Tenant:
+    __slots__ = ("user_id", "queues", "running", "finish_tag", "dispatched", "wait_total", "wait_max", "last_seen")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        # One FIFO per priority level of (finish_tag, sequence, task)
+        self.queues: List[Deque] = [deque() for _ in PRIORITIES]
+        self.running = 0
+        self.finish_tag = 0.0
+        self.dispatched = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_seen = time.monotonic()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+class FairScheduler:
+    """
+    Orders buffered tasks by priority, then by weighted fair share across users.
+
+    Driven by the task payload: `userId` is the tenant, `config.priority` ("high",
+    "normal", "low" or 0-2) selects the priority level and `config.weight` the user's
+    share. Higher levels are always served first. Within a level, tasks carry a
+    self-clocked fair-queuing finish tag (the later of the scheduler's virtual time and
+    the user's previous tag, plus 1 / weight), and the smallest tag wins, so a user
+    with 40 queued tasks alternates with a user who just submitted one instead of
+    running ahead. A user never has more than `user_max_concurrent` tasks running
+    (0 = no cap).
+
+    Per-tenant wait time (fetch to dispatch) is tracked for metrics.
+    """
+
+    def __init__(self, user_max_concurrent: Optional[int] = None, max_tenants: int = 1000):
+        self.user_max_concurrent = Config.TASK_USER_MAX_CONCURRENT if user_max_concurrent is None else user_max_concurrent
+        self.max_tenants = max_tenants
+        self.tenants: Dict[str, _Tenant] = {}
+        self.virtual_time = 0.0
+        self._queued = 0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return self._queued
+
+    def push(self, task: QueuedTask, max_held: Optional[int] = None) -> bool:
+        """
+        Queues a task. With `max_held`, a task that would leave its user with more than
+        `max_held` queued tasks they cannot start yet (being at their cap) is refused
+        and False returned.
+        """
+        if task.payload is None:
+            try:
+                task.payload = get_serializer().loads(task.data)
+            except Exception:
+                # Left for process_task to report
+                task.payload = {}
+        payload = task.payload if isinstance(task.payload, dict) else {}
+        config = payload.get("config") or {}
+
+        tenant = self._tenant(str(payload.get("userId", "unknown")))
+        if max_held is not None and self.user_max_concurrent > 0:
+            startable = max(0, self.user_max_concurrent - tenant.running)
+            if tenant.queued + 1 - startable > max_held:
+                return False
+        tenant.finish_tag = max(self.virtual_time, tenant.finish_tag) + 1.0 / self._weight(config)
+        tenant.queues[self._priority(config)].append((tenant.finish_tag, self._sequence, task))
+        tenant.last_seen = time.monotonic()
+        self._queued += 1
+        self._sequence += 1
+        return True
+
+    def pop(self) -> Optional[QueuedTask]:
+        """
+        Returns the next task to start, or None if every queued task belongs to a user
+        at their concurrency cap.
+        """
+        for level in range(len(PRIORITIES)):
+            best = None
+            for tenant in self.tenants.values():
+                queue = tenant.queues[level]
+                if queue and self._has_capacity(tenant) and (best is None or queue[0][0] < best.queues[level][0][0]):
+                    best = tenant
+            if best is not None:
+                tag, _, task = best.queues[level].popleft()
+                self.virtual_time = max(self.virtual_time, tag)
+                self._queued -= 1
+                best.running += 1
+                best.dispatched += 1
+                wait = time.monotonic() - task.received_at
+                best.wait_total += wait
+                best.wait_max = max(best.wait_max, wait)
+                return task
+        return None
+
+    def release(self, task: QueuedTask):
+        tenant = self.tenants.get(self._user_id(task))
+        if tenant is not None and tenant.running > 0:
+            tenant.running -= 1
+            tenant.last_seen = time.monotonic()
+
+    def eligible(self) -> int:
+        """
+        How many queued tasks could start right now if slots were free.
+        """
+        total = 0
+        for tenant in self.tenants.values():
+            queued = tenant.queued
+            if queued and self.user_max_concurrent > 0:
+                queued = min(queued, max(0, self.user_max_concurrent - tenant.running))
+            total += queued
+        return total
+
+    def drain(self) -> List[QueuedTask]:
+        """
+        Removes and returns every queued task, in the order they were pushed.
+        """
+        entries = []
+        for tenant in self.tenants.values():
+            for queue in tenant.queues:
+                entries.extend(queue)
+                queue.clear()
+        self._queued = 0
+        return [task for _, _, task in sorted(entries, key=lambda entry: entry[1])]
+
+    def _has_capacity(self, tenant: _Tenant) -> bool:
+        return self.user_max_concurrent <= 0 or tenant.running < self.user_max_concurrent
+
+    def _tenant(self, user_id: str) -> _Tenant:
+        tenant = self.tenants.get(user_id)
+        if tenant is None:
+            if len(self.tenants) >= self.max_tenants:
+                self._prune()
+            tenant = self.tenants[user_id] = _Tenant(user_id)
+        return tenant
+
+    def _prune(self):
+        idle = sorted((t for t in self.tenants.values() if not t.running and not t.queued), key=lambda t: t.last_seen)
+        for tenant in idle[:max(1, len(idle) // 2)]:
+            del self.tenants[tenant.user_id]
+
+    @staticmethod
+    def _user_id(task: QueuedTask) -> str:
+        payload = task.payload if isinstance(task.payload, dict) else {}
+        return str(payload.get("userId", "unknown"))
+
+    @staticmethod
+    def _priority(config: Dict[str, Any]) -> int:
+        priority = config.get("priority", DEFAULT_PRIORITY)
+        if isinstance(priority, str):
+            return PRIORITIES.get(priority.lower(), DEFAULT_PRIORITY)
+        if isinstance(priority, int) and 0 <= priority < len(PRIORITIES):
+            return priority
+        return DEFAULT_PRIORITY
+
+    @staticmethod
+    def _weight(config: Dict[str, Any]) -> float:
+        try:
+            weight = float(config.get("weight", 1.0))
+        except (TypeError, ValueError):
+            return 1.0
+        return min(MAX_WEIGHT, max(MIN_WEIGHT, weight))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-tenant queue, running and wait-time figures (seconds).
+        """
+        return {
+            tenant.user_id: {
+                "queued": tenant.queued,
+                "running": tenant.running,
+                "dispatched": tenant.dispatched,
+                "avg_wait": round(tenant.wait_total / tenant.dispatched, 3) if tenant.dispatched else 0.0,
+                "max_wait": round(tenant.wait_max, 3),
+            }
+            for tenant in self.tenants.values()
+        }
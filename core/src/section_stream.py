@@ -0,0 +1,300 @@
+import re
+from typing import List, Optional, Tuple
+
+TAG = re.compile(r"<(/?)([A-Za-z_][\w.:-]*)((?:\s[^<>]*?)?)\s*(/?)>")
+PARTIAL_TAG = re.compile(r"</?(?:[A-Za-z_][\w.:-]*(?:\s[^<>]*)?/?)?")
+ENTITY = re.compile(r"&(?:[A-Za-z][A-Za-z0-9]*|#[0-9]+|#[xX][0-9A-Fa-f]+);")
+PARTIAL_ENTITY = re.compile(r"&(?:[A-Za-z][A-Za-z0-9]*|#[0-9]*|#[xX][0-9A-Fa-f]*)?")
+TEXT_SPECIAL = re.compile(r"[<&`]")
+CODE_FENCE = re.compile(r"`{3,}[\w-]*")
+
+PLACEHOLDER = "illustration_placeholder"
+STRUCTURAL_TAGS = {"section", "text", "sources", "link"}
+MAX_TAG_CHARS = 1024
+MAX_ENTITY_CHARS = 12
+
+class SectionStreamRepairer:
+    """
+    Incremental validator/repairer for the `<section>/<text>/<sources>` XML streamed
+    by the refine chain.
+
+    Every chunk is scanned once. Only an incomplete tag, entity or backtick run at the
+    end of a chunk is held back until the next chunk arrives, so a placeholder split
+    across chunks is still recognised without rescanning earlier output. Repairs:
+    - unclosed tags are closed (before a new section and at the end of the stream),
+      stray closing tags are dropped and `<link>` is made self-closing;
+    - stray `&` and `<` inside `<text>` are escaped; markdown code is left verbatim,
+      since entities are not decoded there;
+    - loose content inside a section is wrapped in `<text>`, content outside the
+      section (preambles, code fences around the XML) is dropped;
+    - `<illustration_placeholder/>` is replaced by the illustration once, moved out
+      of `<text>` when needed, and duplicates are removed.
+    """
+
+    def __init__(self, title: str = "", illustration_xml: str = ""):
+        self.title = title
+        self.illustration_xml = illustration_xml
+        self.illustration_inserted = False
+        self.repairs = 0
+        self.stack: List[str] = []
+        self.sections_seen = 0
+        # Length of the backtick run that opened the current markdown code span, 0 outside code
+        self.code_fence = 0
+        self._pending = ""
+
+    @property
+    def _in_text(self) -> bool:
+        return bool(self.stack) and self.stack[-1] == "text"
+
+    def feed(self, chunk: str) -> str:
+        data = self._pending + chunk
+        out: List[str] = []
+        consumed = self._scan(data, out, final=False)
+        self._pending = data[consumed:]
+        return "".join(out)
+
+    def close(self) -> str:
+        data, self._pending = self._pending, ""
+        out: List[str] = []
+        self._scan(data, out, final=True)
+        while self.stack:
+            self._repair()
+            self._close_top(out)
+        return "".join(out)
+
+    def _scan(self, data: str, out: List[str], final: bool) -> int:
+        """
+        Processes `data` and returns how much of it was consumed; the rest is an
+        incomplete token to retry with the next chunk.
+        """
+        i, n = 0, len(data)
+        while i < n:
+            if self._in_text:
+                match = TEXT_SPECIAL.search(data, i)
+                j = match.start() if match else n
+                if j > i:
+                    out.append(data[i:j])
+                    i = j
+                if match is None:
+                    break
+                char = data[i]
+                if char == "`":
+                    step = self._backticks(data, i, out, final)
+                elif char == "&":
+                    step = self._ampersand(data, i, out, final)
+                else:
+                    step = self._text_tag(data, i, out, final)
+            else:
+                j = data.find("<", i)
+                j = n if j < 0 else j
+                if j > i:
+                    step = self._loose(data, i, j, out, final)
+                else:
+                    step = self._structural_tag(data, i, out, final)
+            if step is None:
+                return i
+            i = step
+        return n
+
+    def _match_tag(self, data: str, i: int, final: bool) -> Tuple[Optional[re.Match], bool]:
+        """
+        Returns (tag match, incomplete). A '<' that cannot start a tag is neither.
+        """
+        match = TAG.match(data, i)
+        if match:
+            return match, False
+        rest_length = len(data) - i
+        incomplete = not final and rest_length < MAX_TAG_CHARS and PARTIAL_TAG.fullmatch(data, i) is not None
+        return None, incomplete
+
+    def _backticks(self, data: str, i: int, out: List[str], final: bool) -> Optional[int]:
+        end = i
+        while end < len(data) and data[end] == "`":
+            end += 1
+        if end == len(data) and not final:
+            return None
+        run = end - i
+        if not self.code_fence:
+            self.code_fence = run
+        elif run == self.code_fence:
+            self.code_fence = 0
+        out.append(data[i:end])
+        return end
+
+    def _ampersand(self, data: str, i: int, out: List[str], final: bool) -> Optional[int]:
+        if self.code_fence:
+            out.append("&")
+            return i + 1
+        match = ENTITY.match(data, i)
+        if match:
+            out.append(match.group())
+            return match.end()
+        if not final and len(data) - i < MAX_ENTITY_CHARS and PARTIAL_ENTITY.fullmatch(data, i):
+            return None
+        self._repair()
+        out.append("&amp;")
+        return i + 1
+
+    def _text_tag(self, data: str, i: int, out: List[str], final: bool) -> Optional[int]:
+        match, incomplete = self._match_tag(data, i, final)
+        if incomplete:
+            return None
+        if match is None:
+            if self.code_fence:
+                out.append("<")
+            else:
+                self._repair()
+                out.append("&lt;")
+            return i + 1
+
+        closing, name = match.group(1), match.group(2).lower()
+        if name == PLACEHOLDER:
+            self._placeholder(out)
+            return match.end()
+        if name == "text" and closing:
+            self._close_top(out)
+            return match.end()
+        if name in STRUCTURAL_TAGS and not self.code_fence:
+            # The model forgot to close <text>: close it and handle the tag as structure
+            self._repair()
+            self._close_top(out)
+            return i
+        # Inline HTML in the markdown (or anything inside code) passes through
+        out.append(match.group())
+        return match.end()
+
+    def _loose(self, data: str, i: int, j: int, out: List[str], final: bool) -> Optional[int]:
+        """
+        Content between tags outside <text>. Whitespace is kept; anything else opens
+        an implicit <text> inside a section and is dropped outside one. Markdown code
+        fences wrapped around the XML are dropped as well.
+        """
+        if j == len(data) and not final and j - i < MAX_TAG_CHARS:
+            # Wait for the whole run up to the next tag
+            return None
+        segment = data[i:j]
+        stripped = segment.strip()
+        if not stripped:
+            # Whitespace before the section would only pad the stream
+            if self.stack or self.sections_seen:
+                out.append(segment)
+            return j
+        self._repair()
+        if self.stack and self.stack[-1] == "section" and not CODE_FENCE.fullmatch(stripped):
+            start = i + len(segment) - len(segment.lstrip())
+            out.append(data[i:start])
+            self._open(out, "text")
+            return start
+        return j
+
+    def _structural_tag(self, data: str, i: int, out: List[str], final: bool) -> Optional[int]:
+        match, incomplete = self._match_tag(data, i, final)
+        if incomplete:
+            return None
+        if match is None:
+            # A stray '<' between tags: treat it as loose content
+            self._repair()
+            if self.stack and self.stack[-1] == "section":
+                self._open(out, "text")
+                return i
+            return i + 1
+
+        closing, name, attrs, self_closing = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        end = match.end()
+
+        if name == PLACEHOLDER:
+            self._placeholder(out)
+        elif name == "section":
+            if closing:
+                if "section" in self.stack:
+                    self._close_through("section", out)
+                else:
+                    self._repair()
+            elif self_closing:
+                self._repair()
+            else:
+                if self.stack:
+                    self._repair()
+                    self._close_through("section", out)
+                self.sections_seen += 1
+                self.stack.append("section")
+                out.append(match.group())
+        elif name in ("text", "sources"):
+            if closing:
+                if self.stack and self.stack[-1] == name:
+                    self._close_top(out)
+                else:
+                    self._repair()
+            elif self_closing or name in self.stack:
+                self._repair()
+            elif self._ensure_section(out):
+                if self.stack[-1] != "section":
+                    # <text> after <sources> (or vice versa) closes the other block
+                    self._repair()
+                    self._close_top(out)
+                self._open(out, name)
+        elif name == "link":
+            if closing or not self.stack:
+                self._repair()
+            else:
+                if not self_closing:
+                    self._repair()
+                out.append(f"<link{attrs} />")
+        elif self.stack and self.stack[-1] == "section":
+            # Other markup (e.g. <code>) belongs in a text block
+            self._repair()
+            self._open(out, "text")
+            return i
+        else:
+            self._repair()
+        return end
+
+    def _ensure_section(self, out: List[str]) -> bool:
+        """
+        Opens the section implicitly when a block appears before any <section> tag.
+        """
+        if self.stack:
+            return True
+        if self.sections_seen:
+            self._repair()
+            return False
+        self._repair()
+        self.sections_seen += 1
+        self.stack.append("section")
+        title = self.title.replace('"', "&quot;")
+        out.append(f'<section title="{title}">\n')
+        return True
+
+    def _placeholder(self, out: List[str]):
+        if self.illustration_inserted or not self.illustration_xml:
+            return
+        self.illustration_inserted = True
+        reopen = self._in_text
+        if reopen:
+            self._repair()
+            self._close_top(out)
+        out.append(self.illustration_xml)
+        if reopen:
+            self._open(out, "text")
+
+    def _open(self, out: List[str], name: str):
+        self.stack.append(name)
+        out.append(f"<{name}>")
+
+    def _close_top(self, out: List[str]):
+        name = self.stack.pop()
+        if name == "text":
+            self.code_fence = 0
+        out.append(f"</{name}>")
+
+    def _close_through(self, name: str, out: List[str]):
+        while self.stack:
+            top = self.stack[-1]
+            if top != name:
+                self._repair()
+            self._close_top(out)
+            if top == name:
+                break
+
+    def _repair(self):
+        self.repairs += 1
@@ -0,0 +1,55 @@
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from src.config import Config
+
+class JsonSerializer:
+    """
+    Standard library serializer.
+    """
+    name = "json"
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        return json.dumps(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer:
+    """
+    orjson-backed serializer. `dumps` returns compact UTF-8 bytes, which Redis
+    publishes as-is.
+    """
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+def create_serializer(name: Optional[str] = None):
+    """
+    Maps a JSON_SERIALIZER setting ('auto', 'orjson' or 'json') to a serializer;
+    'auto' and 'orjson' fall back to the standard library when orjson is not installed.
+    """
+    name = (name or Config.JSON_SERIALIZER).lower()
+    if name in ("auto", "orjson") and orjson is not None:
+        return OrjsonSerializer()
+    return JsonSerializer()
+
+_shared_serializer = None
+
+def get_serializer():
+    """
+    Returns the process-wide serializer selected by JSON_SERIALIZER.
+    """
+    global _shared_serializer
+    if _shared_serializer is None:
+        _shared_serializer = create_serializer()
+    return _shared_serializer
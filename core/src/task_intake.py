@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from src.config import Config
+from src.scheduler import FairScheduler
+from src.task_source import QueuedTask
+
+class TaskIntake:
+    """
+    Feeds tasks from a task source to a handler, at most `max_concurrent` at a time.
+
+    Fetching is decoupled from slot acquisition: a fetcher pops as many tasks as there
+    are free slots plus `prefetch` extra (at most `batch_size` per round-trip) into a
+    local buffer, and a dispatcher starts buffered tasks whenever a slot is free. A
+    burst therefore ramps up to full concurrency in one round-trip, and the next task
+    is usually already local when a slot frees up.
+
+    The buffer is a FairScheduler, which picks the next task by priority and per-user
+    fair share. Tasks of users at their concurrency cap count towards neither the
+    prefetch nor `max_buffer`, so the fetcher keeps pulling past a flood from one user
+    to find work from others. At most `user_max_held` such tasks are held per user;
+    further ones are handed back to the end of the queue (`source.defer`) for any
+    worker to take, and when a whole fetch is handed back the fetcher waits for a
+    task to finish (or `defer_backoff` seconds) before pulling again. `max_held`
+    bounds the buffer as a whole.
+
+    Buffered tasks have already left the source. `close` hands those not yet started
+    back to it (`source.requeue`) when the worker shuts down.
+
+    The handler takes ownership of a slot: it is given the semaphore permit the
+    dispatcher acquired and must release it (`process_task` does so when it finishes).
+    """
+
+    def __init__(self, source, handler: Callable[[QueuedTask], Awaitable[Any]], sem: asyncio.Semaphore,
+                 max_concurrent: int, prefetch: Optional[int] = None, batch_size: Optional[int] = None,
+                 scheduler: Optional[FairScheduler] = None, max_buffer: Optional[int] = None, max_held: Optional[int] = None,
+                 user_max_held: Optional[int] = None, defer_backoff: float = 1.0, rate_window: float = 60.0):
+        self.source = source
+        self.handler = handler
+        self.sem = sem
+        self.max_concurrent = max_concurrent
+        self.prefetch = Config.TASK_PREFETCH if prefetch is None else prefetch
+        self.batch_size = max(1, batch_size or Config.TASK_FETCH_BATCH)
+        self.max_buffer = max_buffer or Config.TASK_MAX_BUFFER
+        self.max_held = max(self.max_buffer, max_held or Config.TASK_MAX_HELD)
+        self.user_max_held = Config.TASK_USER_MAX_HELD if user_max_held is None else user_max_held
+        self.defer_backoff = defer_backoff
+        self.rate_window = rate_window
+
+        self.scheduler = scheduler if scheduler is not None else FairScheduler()
+        self.in_flight = 0
+        self._running: Set[asyncio.Task] = set()
+        self._task_available = asyncio.Event()
+        self._capacity_changed = asyncio.Event()
+        self._intake_times: Deque[float] = deque()
+
+        self.fetches = 0
+        self.fetched = 0
+        self.started = 0
+        self.deferred = 0
+
+    async def run(self):
+        """
+        Runs the fetcher and the dispatcher until cancelled.
+        """
+        loops = [asyncio.create_task(self._fetch_loop()), asyncio.create_task(self._dispatch_loop())]
+        if Config.TASK_INTAKE_STATS_INTERVAL > 0:
+            loops.append(asyncio.create_task(self._stats_loop()))
+        try:
+            await asyncio.gather(*loops)
+        finally:
+            for loop in loops:
+                loop.cancel()
+
+    def _wanted(self) -> int:
+        free = self.max_concurrent - self.in_flight
+        eligible = self.scheduler.eligible()
+        return min(self.batch_size, free + self.prefetch - eligible, self.max_buffer - eligible, self.max_held - len(self.scheduler))
+
+    async def _fetch_loop(self):
+        while True:
+            wanted = self._wanted()
+            if wanted <= 0:
+                self._capacity_changed.clear()
+                await self._capacity_changed.wait()
+                continue
+            try:
+                tasks = await self.source.fetch(wanted)
+            except Exception as e:
+                print(f"Error in worker loop: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            self.fetches += 1
+            self.fetched += len(tasks)
+            now = time.monotonic()
+            self._intake_times.extend(now for _ in tasks)
+            deferred = [task for task in tasks if not self.scheduler.push(task, self.user_max_held)]
+            if deferred:
+                await self._defer(deferred)
+            if len(deferred) < len(tasks):
+                self._task_available.set()
+            elif tasks:
+                # Everything fetched belongs to users at their cap: let a task finish before pulling more
+                self._capacity_changed.clear()
+                try:
+                    await asyncio.wait_for(self._capacity_changed.wait(), self.defer_backoff)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _defer(self, tasks: List[QueuedTask]):
+        try:
+            await self.source.defer(tasks)
+            self.deferred += len(tasks)
+        except Exception as e:
+            # Hold them after all rather than lose them
+            print(f"Failed to defer {len(tasks)} tasks: {e}")
+            for task in tasks:
+                self.scheduler.push(task)
+
+    async def _dispatch_loop(self):
+        while True:
+            await self.sem.acquire()
+            # Nothing buffered, or only tasks of users at their cap
+            while (task := self.scheduler.pop()) is None:
+                self._task_available.clear()
+                await self._task_available.wait()
+            self.in_flight += 1
+            self.started += 1
+            running = asyncio.create_task(self.handler(task))
+            self._running.add(running)
+            running.add_done_callback(lambda done, task=task: self._task_done(done, task))
+            self._capacity_changed.set()
+
+    def _task_done(self, running: asyncio.Task, task: QueuedTask):
+        self._running.discard(running)
+        self.in_flight -= 1
+        self.scheduler.release(task)
+        # A user below their cap again may unblock buffered tasks
+        self._task_available.set()
+        self._capacity_changed.set()
+        if not running.cancelled() and running.exception() is not None:
+            print(f"Task handler failed: {running.exception()}")
+
+    async def close(self):
+        """
+        Returns buffered tasks that were never started to the source. Call after `run`
+        has been cancelled.
+        """
+        tasks = self.scheduler.drain()
+        if not tasks:
+            return
+        try:
+            await self.source.requeue(tasks)
+            print(f"Requeued {len(tasks)} buffered tasks")
+        except Exception as e:
+            print(f"Failed to requeue {len(tasks)} buffered tasks: {e}")
+
+    def intake_rate(self) -> float:
+        """
+        Tasks fetched per second over the last `rate_window` seconds.
+        """
+        horizon = time.monotonic() - self.rate_window
+        while self._intake_times and self._intake_times[0] < horizon:
+            self._intake_times.popleft()
+        return len(self._intake_times) / self.rate_window
+
+    async def stats(self) -> Dict[str, Any]:
+        stats = {
+            "in_flight": self.in_flight,
+            "buffered": len(self.scheduler),
+            "slot_utilization": round(self.in_flight / self.max_concurrent, 3) if self.max_concurrent else 0.0,
+            "intake_rate": round(self.intake_rate(), 3),
+            "fetches": self.fetches,
+            "fetched": self.fetched,
+            "avg_batch": round(self.fetched / self.fetches, 2) if self.fetches else 0.0,
+            "deferred": self.deferred,
+        }
+        try:
+            stats["queue_depth"] = (await self.source.stats()).get("queue_depth")
+        except Exception as e:
+            print(f"Failed to read queue depth: {e}")
+        return stats
+
+    async def _stats_loop(self):
+        while True:
+            await asyncio.sleep(Config.TASK_INTAKE_STATS_INTERVAL)
+            stats = await self.stats()
+            print("Task intake: " + " ".join(f"{key}={value}" for key, value in stats.items()))
+            for user_id, tenant in self.scheduler.stats().items():
+                if tenant["queued"] or tenant["running"]:
+                    print(f"Tenant {user_id}: " + " ".join(f"{key}={value}" for key, value in tenant.items()))
@@ -0,0 +1,262 @@
+import asyncio
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import Config
+
+class QueuedTask:
+    """
+    A raw task payload plus the queue entry it came from (the stream entry id, if any).
+    `payload` caches the parsed JSON once something has decoded it.
+    """
+    __slots__ = ("data", "entry_id", "received_at", "payload")
+
+    def __init__(self, data, entry_id=None):
+        self.data = data
+        self.entry_id = entry_id
+        self.received_at = time.monotonic()
+        self.payload = None
+
+class ListTaskSource:
+    """
+    Pops tasks from the `research_tasks` list. A task is removed from Redis as soon as
+    it is popped, so a worker that dies mid-task loses it; `ack` is a no-op. Tasks
+    popped ahead of a free slot (prefetch) are pushed back by `requeue` on shutdown,
+    but are lost too if the process is killed.
+
+    `fetch` blocks until the list is non-empty and then pops up to `count` tasks in
+    the same round-trip with BLMPOP (Redis 7+). Older servers fall back to BLPOP
+    followed by a counted LPOP.
+    """
+
+    def __init__(self, redis_client, key: Optional[str] = None):
+        self.redis = redis_client
+        self.key = key or Config.TASK_LIST
+        self._blmpop = True
+
+    async def setup(self):
+        pass
+
+    async def fetch(self, count: int = 1) -> List[QueuedTask]:
+        if self._blmpop:
+            try:
+                # Returns (key, [values]), or None on timeout
+                popped = await self.redis.blmpop(0, 1, self.key, direction="LEFT", count=count)
+                return [QueuedTask(data) for data in popped[1]] if popped else []
+            except Exception as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                print("BLMPOP not supported by this Redis server, falling back to BLPOP")
+                self._blmpop = False
+
+        # blpop returns (key, value), or None on timeout
+        task = await self.redis.blpop(self.key, timeout=0)
+        if not task:
+            return []
+        tasks = [QueuedTask(task[1])]
+        if count > 1:
+            tasks.extend(QueuedTask(data) for data in await self.redis.lpop(self.key, count - 1) or [])
+        return tasks
+
+    async def ack(self, task: QueuedTask):
+        pass
+
+    async def requeue(self, tasks: List[QueuedTask]):
+        """
+        Pushes tasks that were fetched but never started back onto the head of the list,
+        in their original order, so they are the next ones popped.
+        """
+        if tasks:
+            # LPUSH inserts its values one after another, so the last one ends up first
+            await self.redis.lpush(self.key, *[task.data for task in reversed(tasks)])
+
+    async def defer(self, tasks: List[QueuedTask]):
+        """
+        Pushes tasks that cannot start here soon back onto the tail of the list, where
+        any worker can pick them up.
+        """
+        if tasks:
+            await self.redis.rpush(self.key, *[task.data for task in tasks])
+
+    async def close(self):
+        pass
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"source": "list", "queue_depth": await self.redis.llen(self.key)}
+
+class StreamTaskSource:
+    """
+    Reads tasks from a Redis Stream through a consumer group, so a task stays pending
+    until the worker acknowledges it after `process_task` returns.
+
+    - `fetch` reads up to `count` new entries in one XREADGROUP round-trip.
+    - Entries pending longer than `claim_idle` seconds (their worker died) are taken
+      over with XAUTOCLAIM, at most every `claim_interval` seconds. Entries delivered
+      more than `max_deliveries` times are moved to a dead-letter stream instead of
+      being retried forever.
+    - While tasks run, a heartbeat re-claims them for this consumer every
+      `heartbeat_interval` seconds, resetting their idle time so long research is not
+      stolen by other workers.
+    - Acknowledged entries are deleted, so the stream only holds outstanding work.
+    """
+
+    DATA_FIELD = b"data"
+
+    def __init__(self, redis_client, stream: Optional[str] = None, group: Optional[str] = None,
+                 consumer: Optional[str] = None, block: Optional[float] = None, claim_idle: Optional[float] = None,
+                 claim_interval: Optional[float] = None, heartbeat_interval: Optional[float] = None,
+                 max_deliveries: Optional[int] = None):
+        self.redis = redis_client
+        self.stream = stream or Config.TASK_STREAM
+        self.group = group or Config.TASK_STREAM_GROUP
+        self.consumer = consumer or Config.TASK_STREAM_CONSUMER or socket.gethostname()
+        self.dead_letter_stream = f"{self.stream}:dead"
+        self.block = Config.TASK_STREAM_BLOCK if block is None else block
+        self.claim_idle = claim_idle or Config.TASK_STREAM_CLAIM_IDLE
+        self.claim_interval = Config.TASK_STREAM_CLAIM_INTERVAL if claim_interval is None else claim_interval
+        self.heartbeat_interval = heartbeat_interval or Config.TASK_STREAM_HEARTBEAT_INTERVAL
+        self.max_deliveries = max_deliveries or Config.TASK_STREAM_MAX_DELIVERIES
+
+        self._in_flight: Dict[Any, QueuedTask] = {}
+        self._last_claim = 0.0
+        self._heartbeat: Optional[asyncio.Task] = None
+
+        self.read = 0
+        self.claimed = 0
+        self.acked = 0
+        self.dead_lettered = 0
+
+    async def setup(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            # The group already exists
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def fetch(self, count: int = 1) -> List[QueuedTask]:
+        tasks = []
+        if time.monotonic() - self._last_claim >= self.claim_interval:
+            self._last_claim = time.monotonic()
+            tasks = await self._reclaim(count)
+            if tasks:
+                return tasks
+
+        response = await self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=count, block=int(self.block * 1000)
+        )
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                tasks.append(self._track(entry_id, fields))
+        self.read += len(tasks)
+        return tasks
+
+    async def _reclaim(self, count: int) -> List[QueuedTask]:
+        response = await self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, int(self.claim_idle * 1000), start_id="0-0", count=count
+        )
+        tasks = []
+        for entry_id, fields in response[1]:
+            if fields is None:
+                continue
+            if await self._deliveries(entry_id) > self.max_deliveries:
+                await self._dead_letter(entry_id, fields)
+                continue
+            tasks.append(self._track(entry_id, fields))
+        if tasks:
+            print(f"Reclaimed {len(tasks)} stalled task(s) from {self.stream}")
+        self.claimed += len(tasks)
+        return tasks
+
+    async def _deliveries(self, entry_id) -> int:
+        pending = await self.redis.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        return pending[0]["times_delivered"] if pending else 0
+
+    async def _dead_letter(self, entry_id, fields):
+        print(f"Task {entry_id} exceeded {self.max_deliveries} deliveries, moving it to {self.dead_letter_stream}")
+        await self.redis.xadd(self.dead_letter_stream, fields)
+        await self.redis.xack(self.stream, self.group, entry_id)
+        await self.redis.xdel(self.stream, entry_id)
+        self.dead_lettered += 1
+
+    def _track(self, entry_id, fields) -> QueuedTask:
+        data = fields.get(self.DATA_FIELD, fields.get("data"))
+        task = QueuedTask(data, entry_id)
+        self._in_flight[entry_id] = task
+        return task
+
+    async def ack(self, task: QueuedTask):
+        self._in_flight.pop(task.entry_id, None)
+        try:
+            await self.redis.xack(self.stream, self.group, task.entry_id)
+            await self.redis.xdel(self.stream, task.entry_id)
+            self.acked += 1
+        except Exception as e:
+            # The entry stays pending and will be redelivered after claim_idle
+            print(f"Failed to ack task {task.entry_id}: {e}")
+
+    async def requeue(self, tasks: List[QueuedTask]):
+        """
+        Releases tasks that were fetched but never started. They stay pending in the
+        group and are reclaimed by another worker once idle for `claim_idle` seconds.
+        """
+        for task in tasks:
+            self._in_flight.pop(task.entry_id, None)
+
+    async def defer(self, tasks: List[QueuedTask]):
+        """
+        Moves tasks that cannot start here soon to the end of the stream, as new
+        entries any worker can read, and acknowledges the originals. Unlike leaving
+        them pending, this does not count as a failed delivery.
+        """
+        for task in tasks:
+            self._in_flight.pop(task.entry_id, None)
+            await self.redis.xadd(self.stream, {self.DATA_FIELD: task.data})
+            await self.redis.xack(self.stream, self.group, task.entry_id)
+            await self.redis.xdel(self.stream, task.entry_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._in_flight:
+                continue
+            try:
+                # Re-claiming our own entries resets their idle time
+                await self.redis.xclaim(self.stream, self.group, self.consumer, 0, list(self._in_flight), justid=True)
+            except Exception as e:
+                print(f"Task heartbeat failed: {e}")
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+
+    async def stats(self) -> Dict[str, Any]:
+        stats = {
+            "source": "stream",
+            "in_flight": len(self._in_flight),
+            "read": self.read,
+            "claimed": self.claimed,
+            "acked": self.acked,
+            "dead_lettered": self.dead_lettered,
+        }
+        for group in await self.redis.xinfo_groups(self.stream):
+            name = group.get("name")
+            if name in (self.group, self.group.encode()):
+                # Entries not yet delivered to any consumer, and delivered but unacknowledged
+                stats["queue_depth"] = group.get("lag")
+                stats["pending"] = group.get("pending")
+        return stats
+
+def create_task_source(redis_client):
+    """
+    Returns the task source selected by TASK_SOURCE ("list" or "stream").
+    """
+    if Config.TASK_SOURCE == "stream":
+        return StreamTaskSource(redis_client)
+    return ListTaskSource(redis_client)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config import Config
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def normalize_query(query: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a search query.
+    """
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL: lowercase scheme/host, no default port, fragment or
+    tracking parameters, sorted query string and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+class MemoryCacheTier:
+    """
+    In-process LRU tier bounded by entry count and total serialized size.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or Config.TOOL_CACHE_MEMORY_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.TOOL_CACHE_MEMORY_MAX_BYTES
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, size = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int, encoded: str):
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCacheTier:
+    """
+    Shared tier on top of the worker's redis.asyncio client. Redis errors are
+    swallowed so an unavailable cache never fails a search or crawl.
+    """
+
+    def __init__(self, redis_client, prefix: str = "tool_cache:"):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.redis.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Tool cache read failed: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int, encoded: str):
+        try:
+            await self.redis.set(self.prefix + key, encoded, ex=ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"Tool cache write failed: {e}")
+
+class ToolCache:
+    """
+    Read-through cache for tool results, keyed by a hash of the normalized query/URL.
+
+    Tiers are checked in order (fastest first); a hit in a lower tier is copied into
+    the tiers above it. With no tiers the cache is a pass-through.
+    """
+
+    def __init__(self, tiers: Optional[List[Any]] = None):
+        self.tiers = [MemoryCacheTier()] if tiers is None else tiers
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def key(namespace: str, material: str) -> str:
+        return f"{namespace}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    async def get(self, namespace: str, material: str) -> Optional[Any]:
+        key = self.key(namespace, material)
+        for i, tier in enumerate(self.tiers):
+            value = await tier.get(key)
+            if value is not None:
+                self.hits[namespace] = self.hits.get(namespace, 0) + 1
+                if i > 0:
+                    encoded = json.dumps(value)
+                    for upper in self.tiers[:i]:
+                        await upper.set(key, value, Config.TOOL_CACHE_BACKFILL_TTL, encoded)
+                return value
+        self.misses[namespace] = self.misses.get(namespace, 0) + 1
+        return None
+
+    async def set(self, namespace: str, material: str, value: Any, ttl: int):
+        key = self.key(namespace, material)
+        encoded = json.dumps(value)
+        for tier in self.tiers:
+            await tier.set(key, value, ttl, encoded)
+
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        material: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: int,
+        cacheable: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Returns the cached value for (namespace, material) or awaits `fetch()` and stores
+        its result. Results rejected by `cacheable` (empty by default) are not stored.
+        """
+        cached = await self.get(namespace, material)
+        if cached is not None:
+            return cached
+        value = await fetch()
+        if cacheable(value):
+            await self.set(namespace, material, value, ttl)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "memory_entries": sum(len(t) for t in self.tiers if isinstance(t, MemoryCacheTier)),
+            "memory_bytes": sum(t.size_bytes for t in self.tiers if isinstance(t, MemoryCacheTier)),
+            "evictions": sum(t.evictions for t in self.tiers if isinstance(t, MemoryCacheTier)),
+            "redis_errors": sum(t.errors for t in self.tiers if isinstance(t, RedisCacheTier)),
+        }
+
+_shared_cache: Optional[ToolCache] = None
+
+def configure_tool_cache(redis_client=None) -> ToolCache:
+    """
+    Builds the process-wide cache from Config. Called once by the worker with its Redis client.
+    """
+    global _shared_cache
+    tiers = []
+    if Config.TOOL_CACHE_ENABLED:
+        tiers.append(MemoryCacheTier())
+        if redis_client is not None and Config.TOOL_CACHE_REDIS_ENABLED:
+            tiers.append(RedisCacheTier(redis_client))
+    _shared_cache = ToolCache(tiers)
+    return _shared_cache
+
+def get_tool_cache() -> ToolCache:
+    """
+    Returns the process-wide cache (memory-only until `configure_tool_cache` is called).
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        configure_tool_cache()
+    return _shared_cache
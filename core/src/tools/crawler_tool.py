@@ -1,32 +1,135 @@
+import asyncio
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from bs4 import BeautifulSoup
+from src.config import Config
+from src.http_client import HttpClient, get_http_client
+from src.tools.cache import ToolCache, get_tool_cache, normalize_url
+from src.tools.singleflight import SingleFlight, get_single_flight
+from src.tools.html_extractor import StreamingTextExtractor, is_html_content_type
+from src.tools.parse_pool import ParsePool, get_parse_pool
+from src.tracing import span
+from src.workloads import get_workload
+
+# Inline extraction parses on this thread, in batches of FEED_BYTES, so a large page never blocks the event loop.
+# One thread keeps lxml parsers on the thread that created them.
+FEED_BYTES = 16 * 1024
+_parse_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawl-parse")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
 
 class CrawlerTool:
+    def __init__(self, http_client: Optional[HttpClient] = None, cache: Optional[ToolCache] = None,
+                 single_flight: Optional[SingleFlight] = None, parse_pool: Optional[ParsePool] = None):
+        # Fall back to the process-wide pooled client / result cache / single-flight / parse pool when not injected
+        self.http_client = http_client
+        self.cache = cache
+        self.single_flight = single_flight
+        self.parse_pool = parse_pool
+
     def crawl(self, url: str) -> str:
         """
         Crawls a webpage and returns its text content.
         """
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = requests.get(url, headers=HEADERS, timeout=10)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            text = soup.get_text(separator="\n")
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            return text[:10000] # Limit content size
-            
+            return self._extract_text(response.text)
+
         except Exception as e:
             return f"Error crawling {url}: {str(e)}"
+
+    async def acrawl(self, url: str) -> str:
+        """
+        Async version of `crawl` that goes through the shared pooled HTTP client.
+        Successfully extracted pages are cached by normalized URL, and concurrent
+        crawls of the same URL share a single request.
+        """
+        with span("tool.crawl", url=url) as crawl_span:
+            try:
+                cache = self.cache or get_tool_cache()
+                flight = self.single_flight or get_single_flight()
+                key = normalize_url(url)
+                text = await flight.do("crawl", key, lambda: cache.get_or_fetch(
+                    "crawl",
+                    key,
+                    lambda: self._fetch_page(url),
+                    Config.CRAWL_CACHE_TTL,
+                ))
+                crawl_span.set(chars=len(text))
+                return text
+
+            except Exception as e:
+                crawl_span.set(error=str(e))
+                return f"Error crawling {url}: {str(e)}"
+
+    async def _fetch_page(self, url: str) -> str:
+        """
+        Downloads a page and extracts its text. Non-HTML responses are rejected from
+        their headers, before any of the body is downloaded.
+
+        Without a parse pool the body is streamed into an incremental extractor on the
+        parse thread and reading stops as soon as enough text is collected. With a
+        parse pool the body (up to CRAWL_MAX_BYTES) is handed to another process for
+        extraction.
+        """
+        client = self.http_client or get_http_client()
+        parse_pool = self.parse_pool or get_parse_pool()
+
+        # The crawl slot covers the download; parse pool extraction runs after it is released
+        async with get_workload("crawl").slot():
+            async with client.stream("GET", url, headers=HEADERS, timeout=10) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type")
+                if not is_html_content_type(content_type):
+                    raise ValueError(f"unsupported content type '{content_type}'")
+
+                if parse_pool is None:
+                    return await self._extract_streaming(response)
+
+                body = await self._read_body(response)
+
+        return await parse_pool.extract(body, response.charset_encoding)
+
+    async def _extract_streaming(self, response) -> str:
+        loop = asyncio.get_running_loop()
+        extractor = await loop.run_in_executor(_parse_thread, StreamingTextExtractor, None, response.charset_encoding)
+        pending = bytearray()
+        async for chunk in response.aiter_bytes():
+            pending.extend(chunk)
+            if len(pending) < FEED_BYTES:
+                continue
+            done = await loop.run_in_executor(_parse_thread, extractor.feed, bytes(pending))
+            pending.clear()
+            if done or extractor.bytes_read >= Config.CRAWL_MAX_BYTES:
+                break
+        if pending:
+            await loop.run_in_executor(_parse_thread, extractor.feed, bytes(pending))
+        return await loop.run_in_executor(_parse_thread, extractor.close)
+
+    async def _read_body(self, response) -> bytes:
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= Config.CRAWL_MAX_BYTES:
+                break
+        return bytes(body[:Config.CRAWL_MAX_BYTES])
+
+    def _extract_text(self, html: str) -> str:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+
+        text = soup.get_text(separator="\n")
+
+        # Clean up whitespace
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        text = '\n'.join(chunk for chunk in chunks if chunk)
+
+        return text[:10000] # Limit content size
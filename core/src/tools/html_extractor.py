@@ -0,0 +1,173 @@
+import codecs
+from html.parser import HTMLParser
+from typing import List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from src.config import Config
+
+SKIPPED_TAGS = {"script", "style"}
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """
+    Whether a Content-Type header is worth extracting text from. A missing header is
+    treated as HTML, like browsers do.
+    """
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in HTML_CONTENT_TYPES
+
+class _TextCollector:
+    """
+    Receives text nodes in document order and keeps the visible, whitespace-cleaned
+    lines until `max_chars` characters have been collected.
+
+    The cleanup matches the original BeautifulSoup pipeline: each text node is split
+    into lines, lines are split on double spaces, and non-empty phrases are joined by
+    newlines.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.phrases: List[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        # Parsers may split one text node over several callbacks; join them before cleaning
+        self._pending: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.length >= self.max_chars
+
+    def start(self, tag: str):
+        self.flush()
+        if tag.lower() in SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag: str):
+        self.flush()
+        if tag.lower() in SKIPPED_TAGS and self.skip_depth > 0:
+            self.skip_depth -= 1
+
+    def data(self, text: str):
+        if not self.skip_depth and not self.done:
+            self._pending.append(text)
+
+    def flush(self):
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        for line in text.splitlines():
+            for phrase in line.strip().split("  "):
+                phrase = phrase.strip()
+                if phrase:
+                    # +1 for the joining newline
+                    self.length += len(phrase) + (1 if self.phrases else 0)
+                    self.phrases.append(phrase)
+
+    def text(self) -> str:
+        self.flush()
+        return "\n".join(self.phrases)[:self.max_chars]
+
+class _StdlibBackend(HTMLParser):
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+class _LxmlTarget:
+    def __init__(self, collector: _TextCollector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag)
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return None
+
+def resolve_parser(parser: Optional[str] = None) -> str:
+    """
+    Maps a CRAWL_PARSER setting ('auto', 'lxml' or 'html.parser') to an available backend.
+    """
+    parser = (parser or Config.CRAWL_PARSER).lower()
+    if parser in ("auto", "lxml"):
+        return "lxml" if etree is not None else "html.parser"
+    return "html.parser"
+
+class StreamingTextExtractor:
+    """
+    Incremental HTML-to-text extractor.
+
+    Bytes are fed as they arrive from the network; `feed` returns True once enough
+    visible text has been collected, so the caller can stop reading the body.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, encoding: Optional[str] = None, parser: Optional[str] = None):
+        self.collector = _TextCollector(max_chars or Config.CRAWL_MAX_CHARS)
+        self.parser = resolve_parser(parser)
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder(self._codec(encoding))(errors="replace")
+        if self.parser == "lxml":
+            self._backend = etree.HTMLParser(target=_LxmlTarget(self.collector))
+        else:
+            self._backend = _StdlibBackend(self.collector)
+
+    @staticmethod
+    def _codec(encoding: Optional[str]) -> str:
+        try:
+            return codecs.lookup(encoding).name if encoding else "utf-8"
+        except LookupError:
+            return "utf-8"
+
+    @property
+    def done(self) -> bool:
+        return self.collector.done
+
+    def feed(self, data: bytes) -> bool:
+        if self.done:
+            return True
+        self.bytes_read += len(data)
+        self._backend.feed(self._decoder.decode(data))
+        return self.done
+
+    def close(self) -> str:
+        if not self.done:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self._backend.feed(tail)
+        try:
+            self._backend.close()
+        except Exception:
+            # lxml raises on empty documents; whatever was collected is still valid
+            pass
+        return self.collector.text()
+
+def extract_text(html: bytes, max_chars: Optional[int] = None, encoding: Optional[str] = None,
+                 parser: Optional[str] = None, chunk_size: int = 64 * 1024) -> str:
+    """
+    Extracts visible text from an in-memory document, stopping early once `max_chars` is reached.
+    """
+    extractor = StreamingTextExtractor(max_chars=max_chars, encoding=encoding, parser=parser)
+    for start in range(0, len(html), chunk_size):
+        if extractor.feed(html[start:start + chunk_size]):
+            break
+    return extractor.close()
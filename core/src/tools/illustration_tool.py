@@ -3,7 +3,9 @@ import asyncio
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
+from src.model_factory import structured_output
 from src.tools.serper_tool import SerperTool
+from src.tracing import traced
 
 class IllustrationDecision(BaseModel):
     # decision: Literal["search", "generate"]  <- Removed: We now strictly generate code.
@@ -24,8 +26,9 @@ class IllustrationTool:
     def __init__(self, model: BaseChatModel, serper_tool: SerperTool):
         self.model = model
         self.serper_tool = serper_tool
-        self.decision_maker = model.with_structured_output(IllustrationDecision)
+        self.decision_maker = structured_output(model, IllustrationDecision)
 
+    @traced("tool.illustrate")
     async def illustrate(self, topic: str, description: str) -> Optional[Dict[str, Any]]:
         # 1. Decide strategy (Now strictly which library to use)
         decision = await self._decide_strategy(topic, description)
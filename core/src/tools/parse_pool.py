@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from src.config import Config
+from src.tools.html_extractor import extract_text
+
+class ParsePool:
+    """
+    Process pool for CPU-bound HTML-to-text extraction, so parsing runs on other
+    cores instead of competing with the worker's event loop for the GIL.
+
+    Page bytes go in and extracted text comes back. Child processes are recycled
+    after `max_tasks_per_child` pages, which bounds memory growth from parser leaks.
+    A pool broken by a crashed child is rebuilt once before the error propagates.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_tasks_per_child: Optional[int] = None):
+        self.max_workers = max_workers or Config.CRAWL_PARSE_PROCESSES
+        self.max_tasks_per_child = max_tasks_per_child or Config.CRAWL_PARSE_MAX_TASKS_PER_CHILD
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Pages submitted and not yet extracted (queued for or running in a child process)
+        self.pending = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # max_tasks_per_child cannot be combined with fork
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._pool
+
+    async def extract(self, data: bytes, encoding: Optional[str] = None) -> str:
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._executor(), extract_text, data, Config.CRAWL_MAX_CHARS, encoding, Config.CRAWL_PARSER)
+        except BrokenProcessPool:
+            print("Parse pool broken, restarting it")
+            self.shutdown(wait=False)
+            return await loop.run_in_executor(self._executor(), extract_text, data, Config.CRAWL_MAX_CHARS, encoding, Config.CRAWL_PARSER)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+_shared_pool: Optional[ParsePool] = None
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """
+    Returns the process-wide parse pool, or None when CRAWL_PARSE_PROCESSES is 0
+    (pages are then extracted inline while streaming).
+    """
+    global _shared_pool
+    if Config.CRAWL_PARSE_PROCESSES <= 0:
+        return None
+    if _shared_pool is None:
+        _shared_pool = ParsePool()
+    return _shared_pool
+
+def shutdown_parse_pool():
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.shutdown()
+        _shared_pool = None
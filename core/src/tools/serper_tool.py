@@ -1,17 +1,28 @@
+import hashlib
 import requests
 import json
 from typing import List, Dict, Optional
 from src.config import Config
+from src.http_client import HttpClient, get_http_client
+from src.tools.cache import ToolCache, get_tool_cache, normalize_query
+from src.tools.singleflight import SingleFlight, get_single_flight
+from src.tracing import span
+from src.workloads import get_workload
 
 class SerperTool:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[HttpClient] = None, cache: Optional[ToolCache] = None,
+                 single_flight: Optional[SingleFlight] = None):
         self.api_key = api_key or Config.SERPER_API_KEY
         if not self.api_key:
             # We don't raise error immediately to allow instantiation for testing, 
             # but search will fail if key is missing.
             pass
         
-        self.url = "https://google.serper.dev/search"
+        self.url = Config.SERPER_URL
+        # Fall back to the process-wide pooled client / result cache / single-flight when not injected
+        self.http_client = http_client
+        self.cache = cache
+        self.single_flight = single_flight
 
     def search(self, query: str, k: int = 5) -> List[Dict[str, str]]:
         """
@@ -33,34 +44,84 @@ class SerperTool:
         try:
             response = requests.post(self.url, headers=headers, data=payload)
             response.raise_for_status()
-            results = response.json()
-            
-            structured_results = []
-            
-            # Handle 'organic' results
-            if "organic" in results:
-                for result in results["organic"]:
-                    structured_results.append({
-                        "title": result.get("title", ""),
-                        "url": result.get("link", ""),
-                        "content": result.get("snippet", "")
-                    })
-            
-            # Fallback if no organic results but 'answerBox' exists
-            if not structured_results and "answerBox" in results:
-                 box = results["answerBox"]
-                 structured_results.append({
-                     "title": box.get("title", "Answer"),
-                     "url": "",
-                     "content": box.get("snippet", "") or box.get("answer", "")
-                 })
-
-            return structured_results
+            return self._parse_results(response.json())
 
         except Exception as e:
             print(f"Error searching Serper: {e}")
             return []
 
+    async def asearch(self, query: str, k: int = 5) -> List[Dict[str, str]]:
+        """
+        Async version of `search` that goes through the shared pooled HTTP client.
+        Non-empty results are cached by normalized query, and concurrent identical
+        searches share a single request. Both are scoped to the API key, so tenants
+        with their own keys never share results or failures.
+        """
+        if not self.api_key:
+             raise ValueError("SERPER_API_KEY is not set")
+
+        with span("tool.search", query=query, k=k) as search_span:
+            try:
+                cache = self.cache or get_tool_cache()
+                flight = self.single_flight or get_single_flight()
+                key = f"{self._key_hash}|{normalize_query(query)}|{k}"
+                results = await flight.do("search", key, lambda: cache.get_or_fetch(
+                    "search",
+                    key,
+                    lambda: self._fetch_search(query, k),
+                    Config.SEARCH_CACHE_TTL,
+                ))
+                search_span.set(results=len(results))
+                return results
+
+            except Exception as e:
+                print(f"Error searching Serper: {e}")
+                search_span.set(error=str(e))
+                return []
+
+    @property
+    def _key_hash(self) -> str:
+        return hashlib.sha256(self.api_key.encode()).hexdigest()[:16]
+
+    async def _fetch_search(self, query: str, k: int) -> List[Dict[str, str]]:
+        headers = {
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json"
+        }
+        payload = json.dumps({
+            "q": query,
+            "num": k
+        })
+
+        client = self.http_client or get_http_client()
+        async with get_workload("search").slot():
+            response = await client.post(self.url, headers=headers, content=payload)
+        response.raise_for_status()
+        return self._parse_results(response.json())
+
+    def _parse_results(self, results: Dict) -> List[Dict[str, str]]:
+        structured_results = []
+        
+        # Handle 'organic' results
+        if "organic" in results:
+            for result in results["organic"]:
+                structured_results.append({
+                    "title": result.get("title", ""),
+                    "url": result.get("link", ""),
+                    "content": result.get("snippet", "")
+                })
+        
+        # Fallback if no organic results but 'answerBox' exists
+        if not structured_results and "answerBox" in results:
+             box = results["answerBox"]
+             structured_results.append({
+                 "title": box.get("title", "Answer"),
+                 "url": "",
+                 "content": box.get("snippet", "") or box.get("answer", "")
+             })
+
+        return structured_results
+
     def search_images(self, query: str, k: int = 5) -> List[Dict[str, str]]:
         """
         Executes a Google Image Search using Serper API.
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight fetch.
+
+    The first caller (the leader) starts the fetch as its own task; callers that arrive
+    while it is running await the same task instead of issuing a duplicate request.
+    Waiters are shielded, so a caller that times out or is cancelled does not cancel
+    the fetch for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.leaders: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    async def do(self, namespace: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = (namespace, key)
+        task = self._in_flight.get(flight_key)
+        if task is not None:
+            self.coalesced[namespace] = self.coalesced.get(namespace, 0) + 1
+            return await asyncio.shield(task)
+
+        self.leaders[namespace] = self.leaders.get(namespace, 0) + 1
+        task = asyncio.ensure_future(fetch())
+        self._in_flight[flight_key] = task
+        task.add_done_callback(lambda t: self._finish(flight_key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key: Tuple[str, str], task: asyncio.Task):
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leaders": dict(self.leaders),
+            "coalesced": dict(self.coalesced),
+            "in_flight": len(self._in_flight),
+        }
+
+_shared_flight: Optional[SingleFlight] = None
+
+def get_single_flight() -> SingleFlight:
+    """
+    Returns the process-wide SingleFlight shared by all tool instances.
+    """
+    global _shared_flight
+    if _shared_flight is None:
+        _shared_flight = SingleFlight()
+    return _shared_flight
@@ -0,0 +1,366 @@
+import asyncio
+import functools
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from src.config import Config
+
+class Span:
+    """
+    One timed operation of a task. Spans of a task share its trace_id and point at
+    the span they ran in (parent_id), so a trace reads as a tree: process_task, then
+    planning, each section's graph nodes, their tool and LLM calls, and the conclusion.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds from start to end (or to now, while the span is open).
+        """
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class _NoopSpan:
+    """
+    Handed out while tracing is off, so instrumented code can always call `set`.
+    """
+
+    name = trace_id = span_id = parent_id = error = None
+    attributes: Dict[str, Any] = {}
+    duration = 0.0
+
+    def set(self, **attributes: Any):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span():
+    """
+    The innermost open span of the running task (tasks inherit it from the code that created them).
+    """
+    return _current_span.get() or NOOP_SPAN
+
+def trace_id_for(request_id: Optional[str]) -> str:
+    """
+    Trace id of a task: its requestId when that is a UUID (so a request's trace can be
+    looked up by its id), a random one otherwise.
+    """
+    try:
+        return UUID(str(request_id)).hex
+    except ValueError:
+        return uuid.uuid4().hex
+
+class JsonlExporter:
+    """
+    Appends finished spans, one JSON object per line, to a local file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span):
+        # Buffered by the file object; written out on flush
+        self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    async def flush(self):
+        self._file.flush()
+
+    async def aclose(self):
+        self._file.close()
+
+class OtlpExporter:
+    """
+    Sends finished spans to an OpenTelemetry collector (or anything accepting OTLP/HTTP
+    JSON on /v1/traces), in batches of up to `batch_size` every `flush_interval` seconds.
+    At most `max_queue` spans are held; beyond that new spans are dropped rather than
+    slowing the worker down.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_queue: Optional[int] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size or Config.TRACE_BATCH_SIZE
+        self.flush_interval = Config.TRACE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_queue = max_queue or Config.TRACE_MAX_QUEUE
+        self._client = httpx.AsyncClient(timeout=Config.API_TIMEOUT, transport=transport)
+        self._spans: List[Span] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, span: Span):
+        if len(self._spans) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._spans.append(span)
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+            except RuntimeError:
+                # No running loop: the spans go out on the next flush
+                pass
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        while self._spans:
+            batch, self._spans = self._spans[:self.batch_size], self._spans[self.batch_size:]
+            try:
+                response = await self._client.post(self.endpoint, json=self._payload(batch))
+                response.raise_for_status()
+                self.exported += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                print(f"Failed to export {len(batch)} spans: {e}")
+
+    def _payload(self, batch: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "prism.worker"}, "spans": [span.to_otlp() for span in batch]}],
+        }]}
+
+    async def aclose(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        await self._client.aclose()
+
+class Tracer:
+    """
+    Records spans and hands finished ones to the exporter and to any listeners
+    (callables taking the span). With neither, `span` hands out a no-op span and
+    costs next to nothing.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self.listeners: List[Callable[[Span], None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None or bool(self.listeners)
+
+    def start_span(self, name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None, **attributes: Any) -> Span:
+        """
+        Starts a span without making it current (for spans that begin and end in
+        different callbacks, like LLM calls). Defaults to a child of the current span.
+        """
+        parent = parent or _current_span.get()
+        if trace_id is None:
+            trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        for listener in self.listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                print(f"Span listener failed: {e}")
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Any]:
+        """
+        Times the enclosed block as a span, current for the code (and tasks created) inside it.
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, trace_id=trace_id, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An async generator finished in another context than it started in
+                pass
+
+    def callbacks(self) -> List[AsyncCallbackHandler]:
+        return [TracingCallback(self)] if self.enabled else []
+
+    async def flush(self):
+        if self.exporter is not None:
+            await self.exporter.flush()
+
+    async def aclose(self):
+        if self.exporter is not None:
+            await self.exporter.aclose()
+
+class TracingCallback(AsyncCallbackHandler):
+    """
+    Attached to every chat model by ModelFactory: records each call of the model as an
+    `llm.call` span, a child of the span the call was made in, with the provider, model,
+    time to first streamed token and token counts.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[UUID, Span] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                                  metadata: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        metadata = metadata or {}
+        self._spans[run_id] = self.tracer.start_span(
+            "llm.call",
+            provider=metadata.get("ls_provider"),
+            model=metadata.get("ls_model_name"),
+        )
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.get(run_id)
+        if span is not None and "first_token_ms" not in span.attributes:
+            span.set(first_token_ms=round(span.duration * 1000, 3))
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.set(**token_usage(response))
+            self.tracer.end_span(span)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span, error)
+
+def token_usage(response) -> Dict[str, int]:
+    """
+    Input/output/total token counts of an LLM result, from the provider's usage report.
+    """
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return {
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage["total_tokens"],
+        }
+    counts = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for generations in getattr(response, "generations", []):
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            for key in counts:
+                counts[key] += metadata.get(key, 0)
+    return counts if counts["total_tokens"] else {}
+
+_tracer = Tracer()
+
+def create_exporter(kind: Optional[str] = None):
+    kind = (kind or Config.TRACE_EXPORTER).lower()
+    if kind == "jsonl":
+        return JsonlExporter(Config.TRACE_FILE)
+    if kind == "otlp":
+        return OtlpExporter(Config.TRACE_OTLP_ENDPOINT, Config.TRACE_SERVICE_NAME)
+    if kind not in ("", "none"):
+        print(f"Unknown TRACE_EXPORTER '{kind}', tracing disabled")
+    return None
+
+def configure_tracer(exporter=None) -> Tracer:
+    """
+    Sets up the process-wide tracer with `exporter`, or the one selected by TRACE_EXPORTER.
+    """
+    _tracer.exporter = exporter if exporter is not None else create_exporter()
+    return _tracer
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str, trace_id: Optional[str] = None, **attributes: Any):
+    """
+    `with span("tool.search", query=query) as s:` on the process-wide tracer.
+    """
+    return _tracer.span(name, trace_id=trace_id, **attributes)
+
+def traced(name: str):
+    """
+    Decorator recording every call of an async function as a span.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with _tracer.span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,79 +1,67 @@
-import json
 import redis.asyncio as redis
 import time
 import sys
 import os
 import asyncio
+import signal
 import traceback
-from concurrent.futures import ThreadPoolExecutor
+
+# Startup time includes importing the agent and SDK modules below
+STARTED_AT = time.perf_counter()
 
 # Ensure src is in python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config import Config
-from src.model_factory import ModelFactory
+from src.model_factory import ModelFactory, get_model_pool
 from src.agents.planning_agent import PlanningAgent
 from src.agents.conclusion_agent import ConclusionAgent
 from src.agents.researcher_agent import ResearcherAgent
 from src.api_client import ApiClient
+from src.http_client import close_http_client
+from src.publisher import create_publisher
+from src.payloads import UpdateTemplate
+from src.task_source import create_task_source
+from src.task_intake import TaskIntake
+from src.serialization import get_serializer
+from src.rate_limiter import configure_rate_limiter
+from src.tools.cache import configure_tool_cache
+from src.tools.parse_pool import shutdown_parse_pool
+from src.tracing import configure_tracer, current_span, span, trace_id_for
+from src.metrics import start_worker_metrics
+from src.workloads import log_workload_stats
 
-class RedisPublisher:
-    def __init__(self, redis_client):
-        self.redis = redis_client
+async def run_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations=True, serper_api_key=None):
+    tasks = start_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations, serper_api_key)
+    return await asyncio.gather(*tasks)
 
-    async def publish_update(self, payload):
-        channel = "updates"
-        try:
-            await self.redis.publish(channel, json.dumps(payload))
-            print(f"Published update to {channel}: {payload['type']} - {payload.get('payload', {}).get('status')}")
-        except Exception as e:
-            print(f"Failed to publish update: {e}")
+def start_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations=True, serper_api_key=None):
+    """
+    Starts one research task per plan section and returns the tasks in plan order.
+    """
+    updates = UpdateTemplate(user_id, request_id, chat_id)
 
-async def run_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations=True, serper_api_key=None):
     # Create callback factory
     def create_callback(section_index, section_title):
-        loop = asyncio.get_running_loop()
+        message = f"Researching: {section_title}"
         def callback(event_type, data):
-            # Construct payload
-            payload = {
-                "target_user_id": user_id,
-                "type": "agent_update",
-                "payload": {
-                    "agent": "Researcher",
-                    "status": "action",
-                    "message": f"Researching: {section_title}",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id,
-                        "event_type": event_type,
-                        "section_index": section_index,
-                        "topic": section_title,
-                        **data
-                    }
-                }
-            }
-            # Fire and forget async publish since we are in the loop (or use create_task)
-            loop.create_task(publisher.publish_update(payload))
+            payload = updates.update("Researcher", "action", message, {
+                "event_type": event_type,
+                "section_index": section_index,
+                "topic": section_title,
+                **data
+            })
+            # Non-blocking publish; progress events may be dropped if the publish queue is full
+            publisher.publish_nowait(payload)
         return callback
 
     async def process_section(i, section):
         # Notify start
-        await publisher.publish_update({
-             "target_user_id": user_id,
-             "type": "agent_update",
-             "payload": {
-                 "agent": "Researcher",
-                 "status": "action",
-                 "message": f"Starting research for: {section.title}",
-                 "data": {
-                     "requestId": request_id,
-                     "chatId": chat_id,
-                     "event_type": "research_started",
-                     "section_index": i,
-                     "topic": section.title
-                 }
-             }
-        })
+        await publisher.publish_update(updates.update("Researcher", "action", f"Starting research for: {section.title}", {
+            "event_type": "research_started",
+            "section_index": i,
+            "topic": section.title
+        }))
         
         callback = create_callback(i, section.title)
         agent = ResearcherAgent(model, serper_api_key=serper_api_key or Config.SERPER_API_KEY, event_callback=callback, include_illustrations=include_illustrations)
@@ -81,15 +69,17 @@ async def run_parallel_research(model, plan, user_id, request_id, chat_id, publi
         
         # Save intermediate draft
         try:
-            loop = asyncio.get_running_loop()
             save_payload = {
                 "title": section.title, 
                 "content": result["content"], 
                 "status": "draft",
                 "illustration": result.get("illustration")
             }
-            # Run blocking sync API call in executor
-            await loop.run_in_executor(None, api_client.save_research_result, request_id, save_payload)
+            if Config.API_WRITE_BEHIND:
+                # Written in the background, batched with other drafts
+                await api_client.queue_research_result(request_id, save_payload)
+            else:
+                await api_client.save_research_result(request_id, save_payload)
         except Exception as e:
             print(f"Failed to save intermediate result: {e}")
 
@@ -101,40 +91,27 @@ async def run_parallel_research(model, plan, user_id, request_id, chat_id, publi
         }
 
     # Run all sections in parallel
-    return await asyncio.gather(*[process_section(i, s) for i, s in enumerate(plan.sections)])
+    return [asyncio.create_task(process_section(i, s)) for i, s in enumerate(plan.sections)]
 
-async def run_conclusion(model, query, sections_content, publisher, user_id, request_id, chat_id):
+async def run_conclusion(model, query, sections_content, publisher, user_id, request_id, chat_id, section_titles=None):
     conclusion_agent = ConclusionAgent(model)
+    updates = UpdateTemplate(user_id, request_id, chat_id)
     final_report = ""
     
     # We use a simple counter to help frontend if needed, though they just append
     chunk_index = 0
     
-    async for chunk in conclusion_agent.generate_report_stream(query, sections_content):
+    async for chunk in conclusion_agent.generate_report_stream(query, sections_content, section_titles):
         final_report += chunk
-        await publisher.publish_update({
-            "target_user_id": user_id,
-            "type": "agent_update",
-            "payload": {
-                "agent": "Conclusion",
-                "status": "output",
-                "message": "Generating report...",
-                "data": {
-                    "requestId": request_id,
-                    "chatId": chat_id,
-                    "event_type": "report_chunk",
-                    "chunk": chunk,
-                    "chunk_index": chunk_index
-                }
-            }
-        })
+        await publisher.publish_update(updates.report_chunk(chunk, chunk_index))
         chunk_index += 1
         
     return final_report
 
 async def process_task(task_data, r, publisher, api_client, sem):
     try:
-        payload = json.loads(task_data)
+        # The intake's scheduler has usually decoded the payload already
+        payload = task_data if isinstance(task_data, dict) else get_serializer().loads(task_data)
         print(f"Processing task: {payload.get('requestId')}")
         
         request_id = payload.get("requestId")
@@ -142,45 +119,25 @@ async def process_task(task_data, r, publisher, api_client, sem):
         query = payload.get("query")
         config = payload.get("config", {})
         chat_id = payload.get("chatId")
+        updates = UpdateTemplate(user_id, request_id, chat_id)
         
         # Extract options
         include_illustrations = config.get("includeIllustrations", True)
         serper_api_key = config.get("serperApiKey")
         
-        # 1. Initialize Model
+        # 1. Initialize Model (reused from the model pool for a recently seen provider/model/key)
         try:
+            setup_start = time.perf_counter()
             model = ModelFactory.get_model(config)
+            print(f"Model ready for {request_id} in {(time.perf_counter() - setup_start) * 1000:.1f}ms (pool: {get_model_pool().stats()})")
         except Exception as e:
             print(f"Error creating model: {e}")
-            await publisher.publish_update({
-                "target_user_id": user_id,
-                "type": "agent_error",
-                "payload": {
-                    "agent": "System",
-                    "status": "error",
-                    "message": f"Error initializing model: {str(e)}",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id
-                    }
-                }
-            })
+            current_span().set(error=str(e))
+            await publisher.publish_update(updates.error(f"Error initializing model: {str(e)}"))
             return
 
         # 2. Planning Phase
-        await publisher.publish_update({
-            "target_user_id": user_id,
-            "type": "agent_update",
-            "payload": {
-                "agent": "Planner",
-                "status": "thinking",
-                "message": "Analyzing query and generating plan...",
-                "data": {
-                    "requestId": request_id,
-                    "chatId": chat_id
-                }
-            }
-        })
+        await publisher.publish_update(updates.update("Planner", "thinking", "Analyzing query and generating plan..."))
 
         try:
             planner = PlanningAgent(model)
@@ -193,51 +150,38 @@ async def process_task(task_data, r, publisher, api_client, sem):
             # Convert Pydantic model to dict
             toc = [s.title for s in plan.sections]
             
-            await publisher.publish_update({
-                "target_user_id": user_id, 
-                "type": "agent_update",
-                "payload": {
-                    "agent": "Planner",
-                    "status": "action",
-                    "message": "Research plan created.",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id,
-                        "event_type": "plan_created",
-                        "toc": toc,
-                        "full_plan": plan.model_dump()
-                    }
-                }
-            })
+            await publisher.publish_update(updates.update("Planner", "action", "Research plan created.", {
+                "event_type": "plan_created",
+                "toc": toc,
+                "full_plan": plan.model_dump()
+            }))
             
             print(f"Plan created for {request_id}: {toc}")
 
             # 3. Research Phase (Parallel)
-            sections_content = await run_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations, serper_api_key)
+            section_tasks = start_parallel_research(model, plan, user_id, request_id, chat_id, publisher, api_client, include_illustrations, serper_api_key)
+            if not Config.PIPELINED_CONCLUSION:
+                sections_content = await asyncio.gather(*section_tasks)
+            else:
+                # Conclusion consumes the section tasks in plan order while later sections are still researching
+                sections_content = section_tasks
             
             # 4. Conclusion Phase
-            await publisher.publish_update({
-                "target_user_id": user_id,
-                "type": "agent_update",
-                "payload": {
-                    "agent": "Conclusion",
-                    "status": "thinking",
-                    "message": "Aggregating findings and writing final report...",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id
-                    }
-                }
-            })
+            await publisher.publish_update(updates.update("Conclusion", "thinking", "Aggregating findings and writing final report..."))
 
             # Run async streaming conclusion
-            final_report = await run_conclusion(model, query, sections_content, publisher, user_id, request_id, chat_id)
+            try:
+                final_report = await run_conclusion(model, query, sections_content, publisher, user_id, request_id, chat_id, section_titles=toc)
+            finally:
+                # No-op for finished sections; stops orphaned research if the conclusion failed
+                for section_task in section_tasks:
+                    section_task.cancel()
 
             # 5. Save Final Result
             if chat_id:
-                loop = asyncio.get_running_loop()
-                # Run blocking sync API call in executor
-                await loop.run_in_executor(None, api_client.save_final_response, chat_id, final_report)
+                # This task's section drafts still queued for write-behind are saved before the final report
+                await api_client.flush(request_id)
+                await api_client.save_final_response(chat_id, final_report)
                 print(f"Final report saved for chat {chat_id}")
 
                 # Generate Title
@@ -259,63 +203,31 @@ async def process_task(task_data, r, publisher, api_client, sem):
                          
                     title = title.strip().replace('"', '')
                     
-                    await publisher.publish_update({
-                        "target_user_id": user_id,
-                        "type": "agent_update",
-                        "payload": {
-                            "agent": "Worker",
-                            "status": "output",
-                            "message": "Title generated.",
-                            "data": {
-                                "requestId": request_id, 
-                                "event_type": "title_generated",
-                                "title": title,
-                                "chatId": chat_id
-                            }
-                        }
-                    })
+                    await publisher.publish_update(updates.update("Worker", "output", "Title generated.", {
+                        "event_type": "title_generated",
+                        "title": title
+                    }))
                     print(f"Generated title: {title}")
                 except Exception as e:
                     print(f"Failed to generate title: {e}")
             else:
                 print("Warning: No chatId in task payload. Cannot save final message.")
 
-            await publisher.publish_update({
-                "target_user_id": user_id,
-                "type": "agent_update",
-                "payload": {
-                    "agent": "Worker",
-                    "status": "output",
-                    "message": "Research completed.",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id,
-                        "event_type": "completed",
-                        "report_preview": final_report[:200] + "..."
-                    }
-                }
-            })
+            await publisher.publish_update(updates.update("Worker", "output", "Research completed.", {
+                "event_type": "completed",
+                "report_preview": final_report[:200] + "..."
+            }))
 
         except Exception as e:
             print(f"Error in planning/execution: {e}")
+            current_span().set(error=str(e))
             traceback.print_exc()
             
-            await publisher.publish_update({
-                "target_user_id": user_id,
-                "type": "agent_error",
-                "payload": {
-                    "agent": "System",
-                    "status": "error",
-                    "message": f"Execution failed: {str(e)}",
-                    "data": {
-                        "requestId": request_id,
-                        "chatId": chat_id
-                    }
-                }
-            })
+            await publisher.publish_update(updates.error(f"Execution failed: {str(e)}"))
 
     except Exception as e:
         print(f"Critical error processing task: {e}")
+        current_span().set(error=str(e))
         traceback.print_exc()
     finally:
         sem.release()
@@ -330,35 +242,77 @@ async def main():
         print(f"Failed to connect to Redis: {e}")
         sys.exit(1)
 
-    publisher = RedisPublisher(r)
+    # Batches updates into pipelined PUBLISH round-trips (PUBLISH_BATCHING)
+    publisher = create_publisher(r)
     api_client = ApiClient()
+    # Search/crawl results are shared across tasks (and pods, via Redis)
+    configure_tool_cache(r)
+    # LLM calls are throttled per provider key (LLM_RPM, LLM_TPM), shared across pods with LLM_RATE_LIMIT_BACKEND=redis
+    rate_limiter = configure_rate_limiter(r)
+    rate_stats = asyncio.create_task(rate_limiter.log_stats(Config.LLM_RATE_STATS_INTERVAL)) if Config.LLM_RATE_STATS_INTERVAL > 0 else None
+    # Search, crawl and API saves have separate slot pools (SEARCH_CONCURRENCY, CRAWL_CONCURRENCY, API_MAX_CONNECTIONS)
+    workload_stats = asyncio.create_task(log_workload_stats(Config.WORKLOAD_STATS_INTERVAL)) if Config.WORKLOAD_STATS_INTERVAL > 0 else None
+    # Per-task spans, exported to a JSONL file or an OTLP collector (TRACE_EXPORTER)
+    tracer = configure_tracer()
     
     # Concurrency control
     max_concurrent = int(os.getenv("MAX_CONCURRENT_TASKS", 50))
     sem = asyncio.Semaphore(max_concurrent)
 
-    print(f"Waiting for tasks on 'research_tasks' (Max concurrent: {max_concurrent})...")
-    while True:
+    # Task intake: list (BLPOP) or stream consumer group (TASK_SOURCE)
+    source = create_task_source(r)
+    await source.setup()
+
+    # Prefetching intake: pops tasks in batches as slots free up (TASK_FETCH_BATCH, TASK_PREFETCH)
+    intake = TaskIntake(source, lambda task: run_task(task, r, source, publisher, api_client, sem), sem, max_concurrent)
+
+    # Prometheus endpoint (METRICS_PORT): latencies, error rates and saturation (slot utilization, queue depths)
+    metrics_server = loop_lag = None
+    if Config.METRICS_PORT > 0:
         try:
-            # Acquire semaphore before fetching task
-            await sem.acquire()
-            
-            # blpop returns (key, value) or None if timeout/connection lost
-            # We use timeout=0 for blocking indefinite, but in loop we might want to handle disconnects
-            # redis.asyncio blpop
-            task = await r.blpop("research_tasks", timeout=0)
-            
-            if task:
-                queue_name, data = task
-                # Create background task
-                asyncio.create_task(process_task(data, r, publisher, api_client, sem))
-            else:
-                sem.release()
-                
-        except Exception as e:
-            print(f"Error in worker loop: {e}")
-            sem.release() # Ensure we don't leak semaphore permits on error
-            await asyncio.sleep(1)
+            _, metrics_server, loop_lag = await start_worker_metrics(intake, publisher, api_client, rate_limiter, tracer)
+        except OSError as e:
+            print(f"Failed to start metrics endpoint on port {Config.METRICS_PORT}: {e}")
+
+    # SIGTERM (pod shutdown) cancels the intake so the cleanup below runs
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+
+    print(f"Worker ready in {time.perf_counter() - STARTED_AT:.2f}s")
+    print(f"Waiting for tasks from {Config.TASK_SOURCE} source (Max concurrent: {max_concurrent})...")
+    try:
+        await intake.run()
+    finally:
+        for stats_task in (rate_stats, workload_stats):
+            if stats_task is not None:
+                stats_task.cancel()
+        if metrics_server is not None:
+            await metrics_server.aclose()
+            await loop_lag.aclose()
+        # Buffered tasks that never started go back to the queue
+        await intake.close()
+        await source.close()
+        await publisher.aclose()
+        await api_client.aclose()
+        await tracer.aclose()
+        await close_http_client()
+        shutdown_parse_pool()
+
+async def run_task(task, r, source, publisher, api_client, sem):
+    payload = task.payload if isinstance(task.payload, dict) else {}
+    request_id = payload.get("requestId")
+    # Root span of the task's trace; its trace id is the requestId
+    with span("process_task", trace_id=trace_id_for(request_id), request_id=request_id, user_id=payload.get("userId"),
+              provider=(payload.get("config") or {}).get("provider")):
+        await process_task(task.payload or task.data, r, publisher, api_client, sem)
+    # Acknowledge only after processing, so a worker dying mid-task leaves it for another one
+    await source.ack(task)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except asyncio.CancelledError:
+        # Stopped by SIGTERM
+        print("Worker stopped")
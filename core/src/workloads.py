@@ -0,0 +1,101 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from src.config import Config
+
+class Workload:
+    """
+    A named, separately sized slot pool for one kind of I/O (search, crawl or
+    persistence).
+
+    Operations hold a slot while they talk to the outside world, so a workload that
+    stalls (crawls waiting out their timeouts) can use up only its own slots. Other
+    workloads keep their share of connections and are not queued behind it.
+    Queue depth, wait time and failures are tracked per workload.
+    """
+
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.started = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.busy_total = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.monotonic()
+        wait = started_at - queued_at
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.started += 1
+        self.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.busy_total += time.monotonic() - started_at
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "started": self.started,
+            "failed": self.failed,
+            "avg_wait": round(self.wait_total / self.started, 3) if self.started else 0.0,
+            "max_wait": round(self.wait_max, 3),
+            "avg_busy": round(self.busy_total / self.started, 3) if self.started else 0.0,
+        }
+
+_workloads: Dict[str, Workload] = {}
+
+def _size(name: str) -> int:
+    return {
+        "search": Config.SEARCH_CONCURRENCY,
+        "crawl": Config.CRAWL_CONCURRENCY,
+        "persistence": Config.API_MAX_CONNECTIONS,
+    }.get(name, Config.HTTP_MAX_CONNECTIONS)
+
+def get_workload(name: str) -> Workload:
+    """
+    Returns the process-wide workload `name`, sized from Config on first use.
+    """
+    workload = _workloads.get(name)
+    if workload is None:
+        workload = _workloads[name] = Workload(name, _size(name))
+    return workload
+
+def workload_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: workload.stats() for name, workload in _workloads.items()}
+
+async def log_workload_stats(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        for name, stats in workload_stats().items():
+            print(f"Workload {name}: " + " ".join(f"{key}={value}" for key, value in stats.items()))
+
+def reset_workloads(sizes: Optional[Dict[str, int]] = None):
+    """
+    Drops the process-wide workloads (they are rebuilt from Config, or `sizes`, on next use).
+    """
+    _workloads.clear()
+    for name, size in (sizes or {}).items():
+        _workloads[name] = Workload(name, size)
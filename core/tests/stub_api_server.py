@@ -0,0 +1,88 @@
+"""
+Local stand-in for the API's worker endpoints, used by the ApiClient tests and
+benchmarks/bench_api_client.py. Runs a threaded HTTP/1.1 (keep-alive) server on a free
+port, records every POST and counts TCP connections. Responses can be delayed, and
+failures queued up front.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubApiServer:
+    def __init__(self, latency: float = 0.0, batch_endpoint: bool = True):
+        self.latency = latency
+        self.batch_endpoint = batch_endpoint
+        self.requests = []
+        self.results = []
+        self.messages = []
+        self.connections = 0
+        # Status codes returned (in order) before requests start succeeding
+        self.failures = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if stub.latency:
+                    threading.Event().wait(stub.latency)
+                with stub._lock:
+                    stub.requests.append((self.path, body, dict(self.headers)))
+                    status = stub.failures.pop(0) if stub.failures else None
+                if status is not None:
+                    return self._reply(status, {"success": False})
+
+                if self.path.startswith("/api/research/worker/result/"):
+                    with stub._lock:
+                        stub.results.append((self.path.rsplit("/", 1)[1], body["content"]))
+                    return self._reply(200, {"success": True, "data": {"result": {}}})
+                if self.path == "/api/research/worker/results" and stub.batch_endpoint:
+                    with stub._lock:
+                        stub.results.extend((item["requestId"], item["content"]) for item in body["results"])
+                    return self._reply(200, {"success": True, "data": {"count": len(body["results"])}})
+                if self.path.startswith("/api/chats/") and self.path.endswith("/messages/worker"):
+                    with stub._lock:
+                        stub.messages.append((self.path.split("/")[3], body["content"]))
+                    return self._reply(200, {"success": True, "data": {"message": {}}})
+                self._reply(404, {"success": False})
+
+        return Handler
+
+    def start(self) -> "StubApiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
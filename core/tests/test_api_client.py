@@ -0,0 +1,163 @@
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api_client import ApiClient
+from tests.stub_api_server import StubApiServer
+
+class TestApiClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stub = StubApiServer().start()
+        self.addCleanup(self.stub.stop)
+        self.print_patch = patch("builtins.print")
+        self.print_patch.start()
+        self.addCleanup(self.print_patch.stop)
+
+    def client(self, **kwargs):
+        kwargs.setdefault("backoff", 0.001)
+        return ApiClient(base_url=self.stub.url, **kwargs)
+
+    async def test_saves_over_one_pooled_connection(self):
+        client = self.client()
+        for i in range(5):
+            await client.save_research_result("req-1", {"title": f"Section {i}"})
+        await client.save_final_response("chat-1", "Report")
+        await client.aclose()
+
+        self.assertEqual(len(self.stub.results), 5)
+        self.assertEqual(self.stub.messages, [("chat-1", "Report")])
+        self.assertEqual(self.stub.connections, 1)
+        path, body, headers = self.stub.requests[-1]
+        self.assertEqual(body, {"content": "Report", "role": "assistant"})
+        self.assertIn("x-worker-secret", {key.lower() for key in headers})
+
+    async def test_retries_transient_failures(self):
+        self.stub.failures = [503, 429]
+        client = self.client(retries=3)
+        await client.save_research_result("req-1", {"title": "Section"})
+        await client.aclose()
+
+        self.assertEqual(len(self.stub.results), 1)
+        self.assertEqual(client.stats()["retried"], 2)
+
+    async def test_gives_up_after_retries(self):
+        self.stub.failures = [503] * 5
+        client = self.client(retries=2)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.save_research_result("req-1", {"title": "Section"})
+        await client.aclose()
+        self.assertEqual(client.stats()["requests"], 3)
+
+    async def test_client_errors_are_not_retried(self):
+        self.stub.failures = [400]
+        client = self.client(retries=3)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.save_research_result("req-1", {"title": "Section"})
+        await client.aclose()
+        self.assertEqual(client.stats()["requests"], 1)
+
+    async def test_possibly_committed_writes_are_not_retried(self):
+        for status in (502, 504):
+            self.stub.failures = [status]
+            client = self.client(retries=3)
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.save_final_response("chat-1", "Report")
+            await client.aclose()
+            self.assertEqual(client.stats()["requests"], 1)
+
+        attempts = []
+
+        def read_timeout(request):
+            attempts.append(request)
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        client = ApiClient(base_url="http://api", retries=3, backoff=0.001, transport=httpx.MockTransport(read_timeout))
+        with self.assertRaises(httpx.ReadTimeout):
+            await client.save_research_results([("req-1", {"title": "Section"})])
+        await client.aclose()
+        self.assertEqual(len(attempts), 1)
+
+    async def test_connection_errors_are_retried(self):
+        attempts = []
+
+        def refuse_once(request):
+            attempts.append(request)
+            if len(attempts) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"success": True})
+
+        client = ApiClient(base_url="http://api", retries=3, backoff=0.001, transport=httpx.MockTransport(refuse_once))
+        await client.save_final_response("chat-1", "Report")
+        await client.aclose()
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(client.stats()["retried"], 1)
+
+    async def test_write_behind_batches_drafts(self):
+        client = self.client(flush_interval=0.05, batch_size=10)
+        await asyncio.gather(*[client.queue_research_result("req-1", {"title": f"Section {i}"}) for i in range(8)])
+        # Queueing does not wait for the write
+        self.assertEqual(self.stub.results, [])
+        await client.flush()
+        await client.aclose()
+
+        self.assertEqual(len(self.stub.results), 8)
+        self.assertEqual(client.stats()["batches"], 1)
+        self.assertEqual([path for path, _, _ in self.stub.requests], ["/api/research/worker/results"])
+
+    async def test_write_behind_falls_back_without_batch_endpoint(self):
+        self.stub.batch_endpoint = False
+        client = self.client(flush_interval=0.05)
+        for i in range(3):
+            await client.queue_research_result("req-1", {"title": f"Section {i}"})
+        await client.aclose()
+
+        self.assertEqual(len(self.stub.results), 3)
+        self.assertEqual(client.stats()["written"], 3)
+        self.assertFalse(client._batch_supported)
+
+    async def test_write_behind_failure_does_not_block_flush(self):
+        self.stub.failures = [500]
+        client = self.client(flush_interval=0)
+        await client.queue_research_result("req-1", {"title": "Section"})
+        await asyncio.wait_for(client.flush(), 2)
+        await client.aclose()
+        self.assertEqual(client.stats()["failed"], 1)
+
+    async def test_flush_waits_only_for_own_request(self):
+        self.stub.latency = 0.01
+        client = self.client(flush_interval=0.01, batch_size=5)
+        stop = asyncio.Event()
+
+        async def other_task():
+            # Another task keeps the shared queue busy
+            i = 0
+            while not stop.is_set():
+                await client.queue_research_result("req-other", {"title": f"Other {i}"})
+                i += 1
+                await asyncio.sleep(0.005)
+
+        producers = [asyncio.create_task(other_task()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await client.queue_research_result("req-1", {"title": "Mine"})
+        await asyncio.wait_for(client.flush("req-1"), 2)
+
+        self.assertIn(("req-1", {"title": "Mine"}), self.stub.results)
+        self.assertNotIn("req-1", client._pending)
+        stop.set()
+        await asyncio.gather(*producers)
+        await client.aclose()
+
+    async def test_flush_of_request_without_drafts_returns(self):
+        client = self.client()
+        await asyncio.wait_for(client.flush("req-none"), 1)
+        await client.aclose()
+
+if __name__ == '__main__':
+    unittest.main()
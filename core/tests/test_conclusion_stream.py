@@ -64,5 +64,132 @@ class TestConclusionStream(unittest.IsolatedAsyncioTestCase):
         # Our mock returns <sources></sources>, so we can only check for that or update mock
         self.assertIn('<sources></sources>', full_output)
 
+    @patch('src.agents.conclusion_agent.ChatPromptTemplate')
+    async def test_refined_section_is_repaired_while_streaming(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Summary Text"))
+
+        async def mock_astream(*args, **kwargs):
+            # Placeholder split across chunks, stray '&', missing closing tags
+            for piece in ['<section title="S1"><text>R&D <illus', 'tration_place', 'holder/> more']:
+                yield AIMessage(content=piece)
+        mock_chain.astream = mock_astream
+
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        sections = [{
+            "title": "S1", "content": "Draft", "sources": [],
+            "illustration": {"type": "image", "url": "http://img/1.png", "alt": "Chart"},
+        }]
+        output = "".join([c async for c in self.agent.generate_report_stream("Q", sections)])
+
+        self.assertIn(
+            '<section title="S1"><text>R&amp;D </text>\n<image src="http://img/1.png" alt="Chart" />\n<text> more</text></section>',
+            output,
+        )
+
+    @patch('src.agents.conclusion_agent.ChatPromptTemplate')
+    async def test_pipelined_sections_stream_in_plan_order(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Summary Text"))
+        contexts = []
+
+        async def mock_astream(input_dict, *args, **kwargs):
+            contexts.append(input_dict["context"])
+            yield AIMessage(content=f'<section title="{input_dict["title"]}">\n<text>\n{input_dict["draft"]}\n</text>\n</section>')
+        mock_chain.astream = mock_astream
+
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        async def research(title, delay):
+            await asyncio.sleep(delay)
+            return {"title": title, "content": f"{title} draft", "sources": []}
+
+        # Section 2 finishes before Section 1; output must still follow plan order
+        tasks = [asyncio.create_task(research("Section 1", 0.05)), asyncio.create_task(research("Section 2", 0))]
+
+        chunks = []
+        async for chunk in self.agent.generate_report_stream("Test Query", tasks, ["Section 1", "Section 2"]):
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                # The summary is streamed before any section research has finished
+                self.assertFalse(tasks[0].done())
+
+        full_output = "".join(chunks)
+        self.assertIn("Executive Summary", chunks[0])
+        self.assertLess(full_output.index('title="Section 1"'), full_output.index('title="Section 2"'))
+        # Section 2 is refined with Section 1 already in its context
+        self.assertIn("Section 1 draft", contexts[1])
+
+    @patch('src.agents.conclusion_agent.ChatPromptTemplate')
+    async def test_parallel_mode_refines_concurrently_and_yields_in_order(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Summary Text"))
+        contexts = {}
+        in_flight = 0
+        peak = 0
+
+        async def mock_astream(input_dict, *args, **kwargs):
+            nonlocal in_flight, peak
+            title = input_dict["title"]
+            contexts[title] = input_dict["context"]
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Earlier sections are slower, so later ones finish first
+            await asyncio.sleep(0.03 if title == "Section 1" else 0.01)
+            in_flight -= 1
+            yield AIMessage(content=f'<section title="{title}">')
+            yield AIMessage(content=f'<text>{title} refined</text></section>')
+        mock_chain.astream = mock_astream
+
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        agent = ConclusionAgent(self.mock_model, mode="parallel")
+        sections = [
+            {"title": f"Section {i}", "content": f"# Heading {i}\nSection {i} key fact. More detail here.", "sources": []}
+            for i in range(1, 4)
+        ]
+
+        output = "".join([chunk async for chunk in agent.generate_report_stream("Test Query", sections)])
+
+        self.assertEqual(peak, 3)
+        positions = [output.index(f'<section title="Section {i}">') for i in range(1, 4)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("Section 1 refined</text></section><section", output)
+        # Compact context: summary + digests of earlier sections only, never refined XML
+        self.assertIn("Summary Text", contexts["Section 3"])
+        self.assertIn("Section 1 key fact.", contexts["Section 3"])
+        self.assertIn("Section 2 key fact.", contexts["Section 3"])
+        self.assertNotIn("Section 3 key fact.", contexts["Section 3"])
+        self.assertNotIn("refined", contexts["Section 3"])
+
+    @patch('src.agents.conclusion_agent.ChatPromptTemplate')
+    async def test_parallel_mode_propagates_section_errors(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Summary Text"))
+
+        async def mock_astream(input_dict, *args, **kwargs):
+            if input_dict["title"] == "Broken":
+                raise RuntimeError("provider error")
+            yield AIMessage(content="<section></section>")
+        mock_chain.astream = mock_astream
+
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        agent = ConclusionAgent(self.mock_model, mode="parallel")
+        sections = [{"title": "Fine", "content": "x"}, {"title": "Broken", "content": "y"}]
+
+        with self.assertRaises(RuntimeError):
+            async for _ in agent.generate_report_stream("Test Query", sections):
+                pass
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.context_builder import ContextBuilder, BM25, tokenize, estimate_tokens
+
+class TestContextBuilder(unittest.TestCase):
+    def test_dedupe_by_url_keeps_longer_content(self):
+        builder = ContextBuilder()
+        sources = builder.dedupe([
+            {"title": "Snippet", "url": "https://a.com/x/", "content": "short"},
+            {"title": "Other", "url": "https://b.com", "content": "other text"},
+            {"title": "Crawl", "url": "https://A.com/x#top", "content": "much longer crawled content"},
+        ])
+        self.assertEqual([s["title"] for s in sources], ["Crawl", "Other"])
+        self.assertEqual(sources[0]["content"], "much longer crawled content")
+
+    def test_dedupe_by_content_hash_and_drops_empty(self):
+        builder = ContextBuilder()
+        sources = builder.dedupe([
+            {"title": "A", "url": "https://a.com", "content": "Same  Content"},
+            {"title": "B", "url": "https://b.com", "content": "same content"},
+            {"title": "C", "url": "", "content": ""},
+        ])
+        self.assertEqual([s["title"] for s in sources], ["A"])
+
+    def test_dedupe_against_incorporated_sources(self):
+        builder = ContextBuilder()
+        incorporated = [{"title": "Snippet", "url": "https://a.com", "content": "short snippet"}]
+        sources = builder.dedupe([
+            {"title": "Same snippet", "url": "https://a.com/", "content": "short"},
+            {"title": "Full crawl", "url": "https://a.com", "content": "short snippet and the full article"},
+            {"title": "Mirror", "url": "https://mirror.com", "content": "Short  snippet"},
+        ], incorporated)
+        self.assertEqual([s["title"] for s in sources], ["Full crawl"])
+
+    def test_chunk_respects_size(self):
+        builder = ContextBuilder(chunk_chars=20)
+        chunks = builder.chunk("line one\nline two\nline three\n" + "x" * 45)
+        self.assertTrue(all(len(c) <= 20 for c in chunks))
+        self.assertEqual(sum(c.count("x") for c in chunks), 45)
+
+    def test_bm25_prefers_matching_document(self):
+        docs = [tokenize("cooking pasta recipes"), tokenize("quantum entanglement experiments"), tokenize("weather today")]
+        scores = BM25(docs).score(tokenize("quantum entanglement"))
+        self.assertEqual(scores.index(max(scores)), 1)
+        self.assertEqual(scores[0], 0)
+
+    def test_build_ranks_and_respects_budget(self):
+        builder = ContextBuilder(token_budget=120, chunk_chars=200)
+        relevant = "Quantum entanglement links particles so measuring one affects the other."
+        filler = "Unrelated gardening advice about tomatoes and watering schedules."
+        results = [
+            {"title": "Garden", "url": "https://garden.com", "content": "\n".join([filler] * 6)},
+            {"title": "Physics", "url": "https://physics.com", "content": relevant},
+        ]
+        context = builder.build("Quantum entanglement", "How entangled particles behave", results)
+
+        self.assertIn("Physics", context)
+        self.assertIn(relevant, context)
+        self.assertLessEqual(estimate_tokens(context), 120)
+
+    def test_build_keeps_source_order_and_numbering(self):
+        builder = ContextBuilder()
+        results = [
+            {"title": "First", "url": "https://1.com", "content": "alpha topic"},
+            {"title": "Second", "url": "https://2.com", "content": "beta topic"},
+        ]
+        context = builder.build("topic", "", results)
+        self.assertLess(context.index("Source 1: First"), context.index("Source 2: Second"))
+
+    def test_pack_skips_sent_chunks_and_reports_packed_ones(self):
+        builder = ContextBuilder(token_budget=40, chunk_chars=40)
+        content = "\n".join(f"solar line number {i}" for i in range(6))
+        results = [{"title": "Long", "url": "u1", "content": content}]
+
+        first, packed = builder.pack("solar", "", results)
+        self.assertTrue(packed)
+        second, more = builder.pack("solar", "", results, sent=set(packed))
+        self.assertTrue(more)
+        self.assertFalse(set(packed) & set(more))
+        # Nothing left once every chunk was sent
+        all_keys = {builder.chunk_key(text) for text in builder.chunk(content)}
+        self.assertEqual(builder.pack("solar", "", results, sent=all_keys), ("", []))
+
+    def test_build_empty(self):
+        self.assertEqual(ContextBuilder().build("t", "d", []), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+import httpx
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.crawler_tool import CrawlerTool
+from src.http_client import HttpClient
+from src.tools.cache import ToolCache
+from src.tools.singleflight import SingleFlight
+
+PAGE = """<html><head><style>body { color: red; }</style><script>var x = 1;</script></head>
+<body><h1>Heading</h1><p>First   paragraph.</p><p>Second  paragraph.</p></body></html>"""
+
+class TestCrawlerTool(unittest.IsolatedAsyncioTestCase):
+    async def test_acrawl_extracts_visible_text(self):
+        client = HttpClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+        ))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]))
+
+        text = await tool.acrawl("http://test.com")
+        await client.aclose()
+
+        self.assertIn("Heading", text)
+        self.assertIn("First", text)
+        self.assertIn("Second", text)
+        self.assertNotIn("var x", text)
+        self.assertNotIn("color: red", text)
+
+    async def test_acrawl_http_error(self):
+        client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]))
+
+        text = await tool.acrawl("http://test.com/missing")
+        await client.aclose()
+
+        self.assertTrue(text.startswith("Error crawling http://test.com/missing"))
+
+    async def test_acrawl_rejects_non_html(self):
+        client = HttpClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=b"%PDF-1.7 ...", headers={"Content-Type": "application/pdf"})
+        ))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]))
+
+        text = await tool.acrawl("http://test.com/paper.pdf")
+        await client.aclose()
+
+        self.assertIn("unsupported content type 'application/pdf'", text)
+
+    async def test_acrawl_stops_reading_large_pages(self):
+        chunks_sent = []
+
+        async def body():
+            for i in range(1000):
+                chunks_sent.append(i)
+                yield ("<p>" + "lorem ipsum " * 100 + "</p>").encode()
+
+        client = HttpClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=body(), headers={"Content-Type": "text/html"})
+        ))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]))
+
+        text = await tool.acrawl("http://test.com/huge")
+        await client.aclose()
+
+        self.assertEqual(len(text), 10000)
+        self.assertLess(len(chunks_sent), 50)
+
+    async def test_inline_extraction_does_not_block_the_loop(self):
+        # Tag-heavy page without enough text to stop early: parsed to the end
+        page = b"<html><body>" + b"<div><span><b></b></span></div>" * 60000 + b"</body></html>"
+        client = HttpClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=page, headers={"Content-Type": "text/html"})
+        ))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]))
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await tool.acrawl("http://test.com/tags")
+        elapsed = time.perf_counter() - start
+        ticking.cancel()
+        await client.aclose()
+
+        self.assertGreater(len(gaps), 10)
+        self.assertLess(max(gaps), max(0.05, elapsed / 4))
+
+    async def test_acrawl_serves_repeat_urls_from_cache(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+
+        client = HttpClient(transport=httpx.MockTransport(handler))
+        tool = CrawlerTool(http_client=client, cache=ToolCache())
+
+        first = await tool.acrawl("http://Test.com/page/?utm_source=x")
+        second = await tool.acrawl("http://test.com/page")
+        await client.aclose()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(requests_seen), 1)
+        self.assertEqual(tool.cache.stats()["hits"], {"crawl": 1})
+
+    async def test_concurrent_acrawl_of_same_url_is_coalesced(self):
+        requests_seen = []
+
+        async def handler(request):
+            requests_seen.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+
+        client = HttpClient(transport=httpx.MockTransport(handler))
+        flight = SingleFlight()
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]), single_flight=flight)
+
+        results = await asyncio.gather(*[tool.acrawl("http://test.com/page") for _ in range(4)])
+        await client.aclose()
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(requests_seen), 1)
+        self.assertEqual(flight.stats()["coalesced"], {"crawl": 3})
+
+class TestHttpClient(unittest.IsolatedAsyncioTestCase):
+    async def test_per_host_limit(self):
+        in_flight = {"a.com": 0, "b.com": 0}
+        peak = {"a.com": 0, "b.com": 0}
+
+        async def handler(request):
+            host = request.url.host
+            in_flight[host] += 1
+            peak[host] = max(peak[host], in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return httpx.Response(200, text="ok")
+
+        client = HttpClient(max_connections_per_host=2, transport=httpx.MockTransport(handler))
+        urls = [f"http://a.com/{i}" for i in range(6)] + [f"http://b.com/{i}" for i in range(6)]
+        await asyncio.gather(*[client.get(url) for url in urls])
+        await client.aclose()
+
+        self.assertEqual(peak["a.com"], 2)
+        self.assertEqual(peak["b.com"], 2)
+
+    async def test_idle_host_slots_are_dropped(self):
+        release = asyncio.Event()
+
+        async def handler(request):
+            if request.url.host == "slow.com":
+                await release.wait()
+            return httpx.Response(200, text="ok")
+
+        client = HttpClient(max_connections_per_host=1, transport=httpx.MockTransport(handler))
+        await asyncio.gather(*[client.get(f"http://host{i}.com/") for i in range(50)])
+        self.assertEqual(client._host_slots, {})
+
+        # A holder and a waiter keep the host's slot; it goes once both are done
+        slow = [asyncio.create_task(client.get("http://slow.com/")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(list(client._host_slots), ["slow.com"])
+        self.assertEqual(client._host_slots["slow.com"].users, 2)
+
+        waiter = asyncio.create_task(client.get("http://slow.com/waiter"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        self.assertEqual(client._host_slots["slow.com"].users, 2)
+
+        release.set()
+        await asyncio.gather(*slow)
+        self.assertEqual(client._host_slots, {})
+        await client.aclose()
+
+if __name__ == '__main__':
+    unittest.main()
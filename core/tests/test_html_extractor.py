@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools import html_extractor
+from src.tools.html_extractor import StreamingTextExtractor, extract_text, is_html_content_type
+from src.tools.crawler_tool import CrawlerTool
+
+PAGE = """<!DOCTYPE html><html><head><title>Café  menu</title>
+<style>body { color: red; }</style><script>var x = "<p>not text</p>";</script></head>
+<body><!-- a comment --><h1>Heading &amp; more</h1>
+<p>First   paragraph
+   spanning lines.</p><ul><li>one</li><li>two  three</li></ul>
+<script type="text/javascript">console.log("hidden")</script><p>Ünïcode – text</p></body></html>"""
+
+BACKENDS = ["html.parser"] + (["lxml"] if html_extractor.etree is not None else [])
+
+class TestStreamingTextExtractor(unittest.TestCase):
+    def test_matches_beautifulsoup_pipeline(self):
+        expected = CrawlerTool()._extract_text(PAGE)
+        for parser in BACKENDS:
+            with self.subTest(parser=parser):
+                self.assertEqual(extract_text(PAGE.encode("utf-8"), parser=parser), expected)
+
+    def test_byte_by_byte_feeding_handles_multibyte_characters(self):
+        data = PAGE.encode("utf-8")
+        for parser in BACKENDS:
+            with self.subTest(parser=parser):
+                extractor = StreamingTextExtractor(parser=parser)
+                for i in range(len(data)):
+                    extractor.feed(data[i:i + 1])
+                text = extractor.close()
+                self.assertIn("Ünïcode – text", text)
+                self.assertNotIn("hidden", text)
+
+    def test_stops_reading_once_enough_text(self):
+        paragraph = "<p>" + "word " * 40 + "</p>"
+        data = ("<html><body>" + paragraph * 5000 + "</body></html>").encode()
+        for parser in BACKENDS:
+            with self.subTest(parser=parser):
+                extractor = StreamingTextExtractor(max_chars=500, parser=parser)
+                done = False
+                for start in range(0, len(data), 4096):
+                    if extractor.feed(data[start:start + 4096]):
+                        done = True
+                        break
+                text = extractor.close()
+                self.assertTrue(done)
+                self.assertEqual(len(text), 500)
+                self.assertLess(extractor.bytes_read, len(data) / 10)
+
+    def test_declared_encoding(self):
+        data = "<p>naïve</p>".encode("latin-1")
+        self.assertEqual(extract_text(data, encoding="iso-8859-1"), "naïve")
+        # Unknown charsets fall back to utf-8 instead of failing
+        self.assertEqual(extract_text(b"<p>plain</p>", encoding="x-unknown"), "plain")
+
+    def test_is_html_content_type(self):
+        self.assertTrue(is_html_content_type("text/html; charset=utf-8"))
+        self.assertTrue(is_html_content_type("application/xhtml+xml"))
+        self.assertTrue(is_html_content_type(None))
+        self.assertFalse(is_html_content_type("application/pdf"))
+        self.assertFalse(is_html_content_type("image/png"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import MetricsRegistry, MetricsServer, LoopLagMonitor, WorkerMetrics
+from src.tracing import Tracer
+from src.workloads import get_workload, reset_workloads
+
+class FakeIntake:
+    max_concurrent = 4
+
+    async def stats(self):
+        return {"in_flight": 3, "buffered": 2, "slot_utilization": 0.75, "queue_depth": 12}
+
+class FakePublisher:
+    def stats(self):
+        return {"queued": 5, "failed": 1, "dropped": 7}
+
+class FakeApiClient:
+    def stats(self):
+        return {"queued": 2, "failed": 0, "retried": 4}
+
+class FakeRateLimiter:
+    def stats(self):
+        return {"openai:abc": {"in_flight": 2, "waiting": 9, "rate_limited": 1, "scale": 0.5}}
+
+class TestMetricsRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls", ("tool",))
+        gauge = registry.gauge("in_flight", "In flight")
+        histogram = registry.histogram("duration_seconds", "Duration", ("phase",), buckets=(0.1, 1.0))
+        counter.inc(tool="search")
+        counter.inc(2, tool="search")
+        counter.inc(tool='say "hi"\n')
+        gauge.set(3)
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value, phase="plan")
+
+        text = await registry.render()
+
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{tool="search"} 3.0', text)
+        self.assertIn('calls_total{tool="say \\"hi\\"\\n"} 1.0', text)
+        self.assertIn("in_flight 3.0", text)
+        self.assertIn('duration_seconds_bucket{phase="plan",le="0.1"} 2', text)
+        self.assertIn('duration_seconds_bucket{phase="plan",le="1.0"} 3', text)
+        self.assertIn('duration_seconds_bucket{phase="plan",le="+Inf"} 4', text)
+        self.assertIn('duration_seconds_sum{phase="plan"} 5.65', text)
+        self.assertIn('duration_seconds_count{phase="plan"} 4', text)
+
+    async def test_failing_collector_does_not_break_render(self):
+        registry = MetricsRegistry()
+        registry.gauge("up", "Up").set(1)
+
+        def broken():
+            raise RuntimeError("gone")
+
+        registry.collectors.append(broken)
+        with patch("builtins.print"):
+            self.assertIn("up 1.0", await registry.render())
+
+class TestWorkerMetrics(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_workloads({"search": 30})
+        self.addCleanup(reset_workloads)
+
+    async def test_spans_feed_latencies_and_counters(self):
+        metrics = WorkerMetrics()
+        tracer = Tracer()
+        tracer.listeners.append(metrics.observe_span)
+
+        with tracer.span("process_task") as task_span:
+            with tracer.span("planning.generate_plan"):
+                pass
+            with tracer.span("tool.search") as search:
+                search.set(error="timeout")
+            with tracer.span("tool.crawl"):
+                pass
+            llm = tracer.start_span("llm.call", provider="openai", model="gpt-4o")
+            llm.set(first_token_ms=120.0, input_tokens=100, output_tokens=20, total_tokens=120)
+            tracer.end_span(llm)
+            task_span.set(error="Execution failed")
+
+        text = await metrics.registry.render()
+        self.assertIn('prism_worker_phase_duration_seconds_count{phase="planning.generate_plan"} 1', text)
+        self.assertIn('prism_worker_tool_calls_total{tool="search",outcome="error"} 1.0', text)
+        self.assertIn('prism_worker_tool_calls_total{tool="crawl",outcome="ok"} 1.0', text)
+        self.assertIn('prism_worker_llm_calls_total{provider="openai",model="gpt-4o",outcome="ok"} 1.0', text)
+        self.assertIn('prism_worker_llm_tokens_total{provider="openai",model="gpt-4o",direction="input"} 100.0', text)
+        self.assertIn('prism_worker_llm_time_to_first_token_seconds_count{provider="openai",model="gpt-4o"} 1', text)
+        self.assertIn('prism_worker_tasks_total{outcome="error"} 1.0', text)
+
+    async def test_collects_saturation_gauges_at_scrape(self):
+        metrics = WorkerMetrics()
+        loop_lag = LoopLagMonitor()
+        loop_lag.max_lag = 0.25
+        metrics.watch(FakeIntake(), FakePublisher(), FakeApiClient(), FakeRateLimiter(), loop_lag)
+        async with get_workload("search").slot():
+            text = await metrics.registry.render()
+
+        self.assertIn("prism_worker_tasks_in_flight 3.0", text)
+        self.assertIn("prism_worker_task_slot_utilization 0.75", text)
+        self.assertIn("prism_worker_task_queue_depth 12.0", text)
+        self.assertIn("prism_worker_publish_dropped_total 7.0", text)
+        self.assertIn("prism_worker_api_retries_total 4.0", text)
+        self.assertIn('prism_worker_workload_in_flight{workload="search"} 1.0', text)
+        self.assertIn('prism_worker_llm_waiting{limit="openai:abc"} 9.0', text)
+        self.assertIn("prism_worker_event_loop_lag_seconds 0.25", text)
+
+class TestMetricsServer(unittest.IsolatedAsyncioTestCase):
+    async def test_serves_metrics(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc()
+        server = await MetricsServer(registry, host="127.0.0.1", port=0).start()
+        self.addAsyncCleanup(server.aclose)
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}") as client:
+            response = await client.get("/metrics")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+            self.assertIn("requests_total 1.0", response.text)
+            self.assertEqual((await client.get("/healthz")).text, "ok\n")
+            self.assertEqual((await client.get("/other")).status_code, 404)
+            self.assertEqual((await client.post("/metrics")).status_code, 405)
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+    async def test_detects_blocked_loop(self):
+        monitor = LoopLagMonitor(interval=0.01).start()
+        await asyncio.sleep(0.02)
+        # A synchronous call holding the loop
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        await monitor.aclose()
+        self.assertGreater(monitor.take_max(), 0.05)
+        self.assertLess(monitor.take_max(), 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.model_factory import ModelFactory, ModelPool, structured_output
+
+class TestModelPool(unittest.TestCase):
+    def test_reuses_model_for_same_key(self):
+        pool = ModelPool(max_entries=4, idle_ttl=0)
+        key = ModelPool.key("openai", "gpt-4o", "sk-1")
+        first = pool.get(key, object)
+        self.assertIs(pool.get(key, object), first)
+        self.assertEqual(pool.stats()["hits"], 1)
+        self.assertEqual(pool.stats()["misses"], 1)
+
+    def test_key_separates_model_and_api_key(self):
+        key = ModelPool.key("openai", "gpt-4o", "sk-1")
+        self.assertNotEqual(key, ModelPool.key("openai", "gpt-4o-mini", "sk-1"))
+        self.assertNotEqual(key, ModelPool.key("openai", "gpt-4o", "sk-2"))
+        self.assertNotIn("sk-1", "".join(key))
+
+    def test_lru_eviction(self):
+        pool = ModelPool(max_entries=2, idle_ttl=0)
+        a, b, c = (ModelPool.key("openai", m, "sk") for m in ("a", "b", "c"))
+        model_a = pool.get(a, object)
+        pool.get(b, object)
+        pool.get(a, object)
+        # b is least recently used
+        pool.get(c, object)
+        self.assertIs(pool.get(a, object), model_a)
+        self.assertEqual(pool.stats()["evictions"], 1)
+        self.assertEqual(pool.stats()["size"], 2)
+        pool.get(b, object)
+        self.assertEqual(pool.stats()["misses"], 4)
+
+    def test_idle_expiry(self):
+        pool = ModelPool(max_entries=4, idle_ttl=60)
+        key = ModelPool.key("openai", "gpt-4o", "sk-1")
+        with patch("src.model_factory.time.monotonic", return_value=1000):
+            first = pool.get(key, object)
+        with patch("src.model_factory.time.monotonic", return_value=1059):
+            self.assertIs(pool.get(key, object), first)
+        with patch("src.model_factory.time.monotonic", return_value=1200):
+            self.assertIsNot(pool.get(key, object), first)
+        self.assertEqual(pool.stats()["expired"], 1)
+
+    def test_disabled(self):
+        pool = ModelPool(max_entries=0, idle_ttl=0)
+        key = ModelPool.key("openai", "gpt-4o", "sk-1")
+        self.assertIsNot(pool.get(key, object), pool.get(key, object))
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_derived_runnables_cached_with_pooled_model(self):
+        pool = ModelPool(max_entries=1, idle_ttl=0)
+        model = pool.get(ModelPool.key("openai", "a", "sk"), object)
+        built = []
+        build = lambda: built.append(1) or object()
+
+        first = pool.derived(model, "schema", build)
+        self.assertIs(pool.derived(model, "schema", build), first)
+        self.assertEqual(len(built), 1)
+
+        # Evicting the model drops its derived runnables; unpooled models are not cached
+        pool.get(ModelPool.key("openai", "b", "sk"), object)
+        self.assertIsNot(pool.derived(model, "schema", build), first)
+        pool.derived(model, "schema", build)
+        self.assertEqual(len(built), 3)
+
+class TestModelFactory(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("src.model_factory._model_pool", ModelPool(max_entries=4, idle_ttl=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_config_shares_client(self):
+        config = {"provider": "openai", "model": "gpt-4o", "apiKey": "sk-test"}
+        model = ModelFactory.get_model(config)
+        self.assertIs(ModelFactory.get_model(dict(config)), model)
+        self.assertIsNot(ModelFactory.get_model({**config, "apiKey": "sk-other"}), model)
+
+    def test_structured_output_is_cached_per_model(self):
+        from src.agents.planning_agent import ResearchPlan
+        model = ModelFactory.get_model({"provider": "openai", "model": "gpt-4o", "apiKey": "sk-test"})
+        self.assertIs(structured_output(model, ResearchPlan), structured_output(model, ResearchPlan))
+
+    def test_missing_api_key(self):
+        with self.assertRaises(ValueError):
+            ModelFactory.get_model({"provider": "openai"})
+
+if __name__ == '__main__':
+    unittest.main()
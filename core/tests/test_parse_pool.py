@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+import httpx
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.parse_pool import ParsePool
+from src.tools.html_extractor import extract_text
+from src.tools.crawler_tool import CrawlerTool
+from src.tools.cache import ToolCache
+from src.http_client import HttpClient
+
+PAGE = b"<html><head><script>var x = 1;</script></head><body><h1>Title</h1><p>Some  body text.</p></body></html>"
+
+class TestParsePool(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(max_workers=1, max_tasks_per_child=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    async def test_extract_matches_inline(self):
+        self.assertEqual(await self.pool.extract(PAGE, "utf-8"), extract_text(PAGE, encoding="utf-8"))
+
+    async def test_children_are_recycled(self):
+        # More tasks than max_tasks_per_child must still all complete
+        for _ in range(5):
+            self.assertIn("Title", await self.pool.extract(PAGE))
+
+    async def test_crawler_offloads_to_pool(self):
+        client = HttpClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=PAGE, headers={"Content-Type": "text/html; charset=utf-8"})
+        ))
+        tool = CrawlerTool(http_client=client, cache=ToolCache([]), parse_pool=self.pool)
+
+        text = await tool.acrawl("http://test.com")
+        await client.aclose()
+
+        self.assertEqual(text, "Title\nSome\nbody text.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.payloads import UpdateTemplate
+from src.serialization import JsonSerializer, OrjsonSerializer, orjson
+
+class TestUpdateTemplate(unittest.TestCase):
+    def setUp(self):
+        self.updates = UpdateTemplate("user-1", "req-1", "chat-1")
+
+    def test_update_matches_envelope(self):
+        self.assertEqual(self.updates.update("Planner", "action", "Research plan created.", {"event_type": "plan_created", "toc": ["A"]}), {
+            "target_user_id": "user-1",
+            "type": "agent_update",
+            "payload": {
+                "agent": "Planner",
+                "status": "action",
+                "message": "Research plan created.",
+                "data": {"requestId": "req-1", "chatId": "chat-1", "event_type": "plan_created", "toc": ["A"]},
+            },
+        })
+
+    def test_updates_do_not_share_data(self):
+        first = self.updates.update("Planner", "thinking", "...")
+        first["payload"]["data"]["extra"] = True
+        self.assertNotIn("extra", self.updates.update("Planner", "thinking", "...")["payload"]["data"])
+
+    def test_error(self):
+        error = self.updates.error("Execution failed: boom")
+        self.assertEqual(error["type"], "agent_error")
+        self.assertEqual(error["payload"]["agent"], "System")
+        self.assertEqual(error["payload"]["status"], "error")
+        self.assertEqual(error["payload"]["data"], {"requestId": "req-1", "chatId": "chat-1"})
+
+    def test_report_chunk(self):
+        self.assertEqual(
+            self.updates.report_chunk("text", 3).to_dict(),
+            self.updates.update("Conclusion", "output", "Generating report...", {"event_type": "report_chunk", "chunk": "text", "chunk_index": 3}),
+        )
+
+    def test_report_chunk_encodes_like_full_serialization(self):
+        serializers = [JsonSerializer()] + ([OrjsonSerializer()] if orjson is not None else [])
+        for serializer in serializers:
+            for chunk in ["text", 'quote " and \\ backslash', "caf\u00e9 \u2603\n", ""]:
+                update = self.updates.report_chunk(chunk, 12)
+                encoded = update.encode(serializer)
+                self.assertEqual(encoded, serializer.dumps(update.to_dict()))
+                self.assertEqual(serializer.loads(encoded), update.to_dict())
+
+    def test_report_chunk_encodes_replacement_chunk(self):
+        serializer = JsonSerializer()
+        data = serializer.loads(self.updates.report_chunk("Hel", 4).encode(serializer, "Hello"))["payload"]["data"]
+        self.assertEqual((data["chunk"], data["chunk_index"]), ("Hello", 4))
+
+    def test_envelope_is_serialized_once_per_serializer(self):
+        serializer = JsonSerializer()
+        calls = []
+        dumps = serializer.dumps
+        serializer.dumps = lambda obj: calls.append(obj) or dumps(obj)
+        for i in range(3):
+            self.updates.report_chunk("x", i).encode(serializer)
+        # The envelope and its two marks once, then only the chunk and index per event
+        self.assertEqual(calls[3:], ["x", 0, "x", 1, "x", 2])
+
+if __name__ == '__main__':
+    unittest.main()
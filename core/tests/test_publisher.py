@@ -0,0 +1,172 @@
+import unittest
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.payloads import UpdateTemplate
+from src.publisher import BatchingPublisher, RedisPublisher
+from src.serialization import JsonSerializer, OrjsonSerializer, orjson
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def publish(self, channel, message):
+        self.commands.append((channel, message))
+
+    async def execute(self):
+        self.redis.executes += 1
+        if self.redis.fail:
+            raise ConnectionError("redis down")
+        self.redis.messages.extend(json.loads(m) for _, m in self.commands)
+
+class FakeRedis:
+    def __init__(self):
+        self.messages = []
+        self.executes = 0
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+def update(request_id, event_type, **data):
+    return {
+        "target_user_id": "u1",
+        "type": "agent_update",
+        "payload": {"agent": "Worker", "status": "output", "data": {"requestId": request_id, "event_type": event_type, **data}},
+    }
+
+class TestBatchingPublisher(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_shares_one_round_trip(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=0.01)
+        for i in range(20):
+            await publisher.publish_update(update("r1", "tool_start", query=f"q{i}"))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(redis.executes, 1)
+        self.assertEqual([m["payload"]["data"]["query"] for m in redis.messages], [f"q{i}" for i in range(20)])
+        await publisher.aclose()
+
+    async def test_size_threshold_flushes_without_waiting(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=10, max_batch=5)
+        for i in range(5):
+            await publisher.publish_update(update("r1", "tool_start", query=f"q{i}"))
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(redis.messages), 5)
+        await publisher.aclose()
+
+    async def test_consecutive_report_chunks_merge_per_request(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=10)
+        await publisher.publish_update(update("r1", "report_chunk", chunk="Hel", chunk_index=0))
+        await publisher.publish_update(update("r2", "report_chunk", chunk="Oth", chunk_index=0))
+        await publisher.publish_update(update("r1", "report_chunk", chunk="lo", chunk_index=1))
+        await publisher.publish_update(update("r1", "completed"))
+        await publisher.publish_update(update("r1", "report_chunk", chunk="!", chunk_index=2))
+        await publisher.aclose()
+
+        events = [(m["payload"]["data"]["requestId"], m["payload"]["data"]["event_type"], m["payload"]["data"].get("chunk")) for m in redis.messages]
+        self.assertEqual(events, [
+            ("r1", "report_chunk", "Hello"),
+            ("r2", "report_chunk", "Oth"),
+            ("r1", "completed", None),
+            ("r1", "report_chunk", "!"),
+        ])
+        self.assertEqual(redis.messages[0]["payload"]["data"]["chunk_index"], 0)
+        self.assertEqual(publisher.merged, 1)
+
+    async def test_full_queue_drops_oldest_progress_event(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=10, max_batch=100, max_queue=3)
+        publisher.publish_nowait(update("r1", "tool_start", query="old"))
+        await publisher.publish_update(update("r1", "plan_created"))
+        publisher.publish_nowait(update("r1", "tool_start", query="mid"))
+        publisher.publish_nowait(update("r1", "tool_start", query="new"))
+        await publisher.aclose()
+
+        self.assertEqual(
+            [m["payload"]["data"].get("query", m["payload"]["data"]["event_type"]) for m in redis.messages],
+            ["plan_created", "mid", "new"],
+        )
+        self.assertEqual(publisher.dropped, 1)
+
+    async def test_full_queue_applies_backpressure_to_important_events(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=0.01, max_batch=100, max_queue=2)
+        await publisher.publish_update(update("r1", "a"))
+        await publisher.publish_update(update("r1", "b"))
+        # Waits for the flusher instead of dropping
+        await asyncio.wait_for(publisher.publish_update(update("r1", "c")), 1)
+        await publisher.aclose()
+
+        self.assertEqual([m["payload"]["data"]["event_type"] for m in redis.messages], ["a", "b", "c"])
+        self.assertEqual(publisher.dropped, 0)
+
+    async def test_failed_flush_is_counted(self):
+        redis = FakeRedis()
+        redis.fail = True
+        publisher = BatchingPublisher(redis, flush_interval=0.01)
+        await publisher.publish_update(update("r1", "a"))
+        await publisher.aclose()
+        self.assertEqual(publisher.stats()["failed"], 1)
+        self.assertEqual(publisher.stats()["published"], 0)
+
+    async def test_unserializable_update_is_skipped_alone(self):
+        redis = FakeRedis()
+        publisher = BatchingPublisher(redis, flush_interval=0.01)
+        await publisher.publish_update(update("r1", "a"))
+        await publisher.publish_update(update("r2", "bad", value=object()))
+        await publisher.publish_update(update("r3", "c"))
+        with patch("builtins.print"):
+            await publisher.aclose()
+
+        self.assertEqual([m["payload"]["data"]["requestId"] for m in redis.messages], ["r1", "r3"])
+        self.assertEqual(publisher.stats()["failed"], 1)
+        self.assertEqual(publisher.stats()["published"], 2)
+        self.assertEqual(redis.executes, 1)
+
+    async def test_templated_report_chunks_merge_and_splice(self):
+        serializers = [JsonSerializer()] + ([OrjsonSerializer()] if orjson is not None else [])
+        for serializer in serializers:
+            redis = FakeRedis()
+            publisher = BatchingPublisher(redis, flush_interval=10, serializer=serializer)
+            first, second = UpdateTemplate("u1", "r1", "c1"), UpdateTemplate("u2", "r2", "c2")
+            await publisher.publish_update(first.report_chunk("Hel", 0))
+            await publisher.publish_update(second.report_chunk("Oth", 0))
+            await publisher.publish_update(first.report_chunk('lo "x"', 1))
+            await publisher.aclose()
+
+            self.assertEqual(redis.messages, [
+                first.report_chunk('Hello "x"', 0).to_dict(),
+                second.report_chunk("Oth", 0).to_dict(),
+            ])
+            self.assertEqual(publisher.merged, 1)
+
+class TestRedisPublisher(unittest.IsolatedAsyncioTestCase):
+    async def test_templated_report_chunk_is_published_spliced(self):
+        class Redis:
+            messages = []
+
+            async def publish(self, channel, message):
+                self.messages.append(json.loads(message))
+
+        redis = Redis()
+        publisher = RedisPublisher(redis, serializer=JsonSerializer())
+        updates = UpdateTemplate("u1", "r1", "c1")
+        with patch("builtins.print"):
+            await publisher.publish_update(updates.report_chunk("text", 7))
+            await publisher.publish_update(updates.update("Worker", "completed", "Done"))
+
+        self.assertEqual(redis.messages, [updates.report_chunk("text", 7).to_dict(), updates.update("Worker", "completed", "Done")])
+        self.assertEqual(publisher.stats()["published"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
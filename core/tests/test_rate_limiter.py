@@ -0,0 +1,202 @@
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+try:
+    import lupa
+    from fakeredis import FakeAsyncRedis
+except ImportError:
+    # Lua scripting in fakeredis needs lupa
+    FakeAsyncRedis = None
+
+from src.rate_limiter import (
+    TokenBuckets, RedisTokenBuckets, ProviderLimit, RateLimitCallback, LLMRateLimiter, is_rate_limit_error, retry_after, _parse_duration
+)
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("Error code: 429 - rate limit exceeded")
+        self.response = FakeResponse(headers or {})
+
+class FailingChatModel(FakeListChatModel):
+    error: Exception = None
+
+    async def _agenerate(self, *args, **kwargs):
+        raise self.error
+
+class TestTokenBuckets(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_wait(self):
+        buckets = TokenBuckets()
+        # 60 rpm -> a burst of 10 requests, then one per second
+        for _ in range(10):
+            self.assertEqual(await buckets.take("k", 60, 0, 0), 0.0)
+        wait = await buckets.take("k", 60, 0, 0)
+        self.assertGreater(wait, 0.9)
+        self.assertLessEqual(wait, 1.0)
+
+    async def test_denied_call_spends_nothing(self):
+        buckets = TokenBuckets()
+        # Token bucket holds 1000; the request bucket is untouched when tokens are short
+        self.assertEqual(await buckets.take("k", 60, 6000, 900), 0.0)
+        self.assertGreater(await buckets.take("k", 60, 6000, 900), 0)
+        self.assertAlmostEqual(buckets._bucket("k")["requests"], 9, places=1)
+
+    async def test_oversized_call_waits_for_full_bucket(self):
+        buckets = TokenBuckets()
+        self.assertEqual(await buckets.take("k", 0, 6000, 50000), 0.0)
+
+    async def test_adjust_puts_bucket_into_debt(self):
+        buckets = TokenBuckets()
+        await buckets.take("k", 0, 6000, 100)
+        await buckets.adjust("k", 2000)
+        # 1000 - 100 - 2000 = -1100 -> 1100 tokens short at 100 tokens/s
+        self.assertAlmostEqual(await buckets.take("k", 0, 6000, 0), 11, delta=0.1)
+
+    async def test_backoff(self):
+        buckets = TokenBuckets()
+        await buckets.backoff("k", 5)
+        self.assertGreater(await buckets.take("k", 0, 0, 0), 4.9)
+        self.assertEqual(await buckets.take("other", 0, 0, 0), 0.0)
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis with lupa is not installed")
+class TestRedisTokenBuckets(unittest.IsolatedAsyncioTestCase):
+    async def test_budget_is_shared_between_workers(self):
+        redis_client = FakeAsyncRedis()
+        pod_a, pod_b = RedisTokenBuckets(redis_client), RedisTokenBuckets(redis_client)
+        for pod in (pod_a, pod_b) * 5:
+            self.assertEqual(await pod.take("k", 60, 0, 0), 0.0)
+        self.assertGreater(await pod_a.take("k", 60, 0, 0), 0.9)
+        self.assertGreater(await pod_b.take("k", 60, 0, 0), 0.9)
+
+    async def test_adjust_and_backoff(self):
+        buckets = RedisTokenBuckets(FakeAsyncRedis())
+        await buckets.take("k", 0, 6000, 100)
+        await buckets.adjust("k", 2000)
+        self.assertAlmostEqual(await buckets.take("k", 0, 6000, 0), 11, delta=0.1)
+        await buckets.backoff("other", 3)
+        self.assertGreater(await buckets.take("other", 60, 0, 0), 2.9)
+        self.assertEqual(buckets.errors, 0)
+
+class TestRateLimitErrors(unittest.TestCase):
+    def test_parse_duration(self):
+        self.assertEqual(_parse_duration("2"), 2.0)
+        self.assertEqual(_parse_duration("20ms"), 0.02)
+        self.assertEqual(_parse_duration("6m0s"), 360.0)
+        self.assertEqual(_parse_duration("1.5s"), 1.5)
+        self.assertIsNone(_parse_duration("Wed, 21 Oct 2015 07:28:00 GMT"))
+
+    def test_detects_rate_limit_errors(self):
+        self.assertTrue(is_rate_limit_error(FakeRateLimitError()))
+        self.assertTrue(is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED")))
+        self.assertFalse(is_rate_limit_error(ValueError("bad request")))
+
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after(FakeRateLimitError({"retry-after-ms": "1500"})), 1.5)
+        self.assertEqual(retry_after(FakeRateLimitError({"retry-after": "3", "x-ratelimit-reset-tokens": "7s"})), 7.0)
+        self.assertIsNone(retry_after(FakeRateLimitError()))
+        self.assertIsNone(retry_after(ValueError("no response")))
+
+class TestProviderLimit(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_cap(self):
+        limit = ProviderLimit("k", 0, 0, 2, TokenBuckets())
+        await limit.acquire()
+        await limit.acquire()
+        third = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0.01)
+        self.assertFalse(third.done())
+        self.assertEqual(limit.stats()["waiting"], 1)
+        limit.release()
+        await asyncio.wait_for(third, 1)
+        self.assertEqual(limit.stats()["in_flight"], 2)
+
+    async def test_waits_for_budget_and_records_wait(self):
+        limit = ProviderLimit("k", 600, 0, 0, TokenBuckets())
+        # A burst of 100, then one request every 0.1s
+        for _ in range(100):
+            await limit.acquire()
+        await limit.acquire()
+        stats = limit.stats()
+        self.assertEqual(stats["calls"], 101)
+        self.assertEqual(stats["delayed"], 1)
+        self.assertGreater(stats["max_wait"], 0.05)
+
+    async def test_rate_limit_backs_off_and_recovers(self):
+        buckets = TokenBuckets()
+        limit = ProviderLimit("k", 600, 0, 0, buckets)
+        with patch("builtins.print"):
+            await limit.rate_limited_by_provider(2)
+        self.assertEqual(limit.scale, 0.5)
+        self.assertGreater(await buckets.take("k", 600, 0, 0), 1.9)
+
+        with patch("builtins.print"):
+            await limit.rate_limited_by_provider()
+        self.assertEqual(limit.scale, 0.25)
+        limit.succeeded()
+        self.assertAlmostEqual(limit.scale, 0.3)
+        self.assertEqual(limit.stats()["rate_limited"], 2)
+
+class TestRateLimitCallback(unittest.IsolatedAsyncioTestCase):
+    async def test_wraps_chain_calls(self):
+        limit = ProviderLimit("k", 0, 0, 1, TokenBuckets())
+        model = FakeListChatModel(responses=["one", "two"], callbacks=[RateLimitCallback(limit)])
+        chain = ChatPromptTemplate.from_messages([("user", "{topic}")]) | model
+
+        results = await asyncio.gather(chain.ainvoke({"topic": "a"}), chain.ainvoke({"topic": "b"}))
+
+        self.assertEqual(sorted(r.content for r in results), ["one", "two"])
+        stats = limit.stats()
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+
+    async def test_streamed_calls_release_their_slot(self):
+        limit = ProviderLimit("k", 0, 0, 1, TokenBuckets())
+        model = FakeListChatModel(responses=["streamed"], callbacks=[RateLimitCallback(limit)])
+
+        chunks = [chunk.content async for chunk in model.astream("hello")]
+
+        self.assertEqual("".join(chunks), "streamed")
+        self.assertEqual(limit.stats()["in_flight"], 0)
+
+    async def test_provider_429_triggers_backoff(self):
+        buckets = TokenBuckets()
+        limit = ProviderLimit("k", 0, 0, 1, buckets)
+        model = FailingChatModel(responses=[], callbacks=[RateLimitCallback(limit)])
+        model.error = FakeRateLimitError({"retry-after": "4"})
+
+        with patch("builtins.print"):
+            with self.assertRaises(FakeRateLimitError):
+                await model.ainvoke("hello")
+
+        self.assertEqual(limit.stats()["in_flight"], 0)
+        self.assertEqual(limit.stats()["rate_limited"], 1)
+        self.assertGreater(await buckets.take("k", 0, 0, 0), 3.9)
+
+class TestLLMRateLimiter(unittest.TestCase):
+    def test_limits_are_keyed_by_provider_and_api_key(self):
+        limiter = LLMRateLimiter()
+        self.assertIs(limiter.limit_for("openai", "sk-1"), limiter.limit_for("openai", "sk-1"))
+        self.assertIsNot(limiter.limit_for("openai", "sk-1"), limiter.limit_for("openai", "sk-2"))
+        self.assertIsNot(limiter.limit_for("openai", "sk-1"), limiter.limit_for("anthropic", "sk-1"))
+        # The key never contains the API key itself
+        self.assertTrue(all("sk-" not in key for key in limiter.stats()))
+
+    def test_disabled(self):
+        with patch("src.rate_limiter.Config.LLM_RATE_LIMIT_ENABLED", False):
+            self.assertEqual(LLMRateLimiter().callbacks("openai", "sk-1"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.report_context import ReportContext, extract_key_points, section_digest
+
+DRAFT = """## Background
+Quantum computers use qubits. They can be in superposition.
+
+Entanglement links qubits together. Measuring one affects the other.
+
+- Error correction is the main obstacle. It needs many physical qubits.
+"""
+
+class TestKeyPoints(unittest.TestCase):
+    def test_extract_key_points(self):
+        self.assertEqual(extract_key_points(DRAFT), [
+            "Background",
+            "Quantum computers use qubits.",
+            "Entanglement links qubits together.",
+            "Error correction is the main obstacle.",
+        ])
+
+    def test_extract_key_points_limits(self):
+        self.assertEqual(len(extract_key_points(DRAFT, max_points=2)), 2)
+        self.assertEqual(extract_key_points("x" * 500, max_point_chars=50), ["x" * 50])
+
+    def test_section_digest(self):
+        digest = section_digest({"title": "Qubits", "content": DRAFT}, max_points=2)
+        self.assertEqual(digest, "Section: Qubits\nKey points:\n- Background\n- Quantum computers use qubits.\n\n")
+
+def section_xml(n: int) -> str:
+    return (
+        f'<section title="Part {n}">\n<text>\nClaim {n} about qubits is stated here. More detail follows.\n\n'
+        f'Second claim {n} is here.\n</text>\n'
+        f'<link url="https://example.com/{n}" title="Source {n}"/>\n'
+        f'<link url="https://example.com/shared" title="Shared"/>\n</section>'
+    )
+
+class TestReportContext(unittest.TestCase):
+    def test_render_keeps_titles_claims_and_sources(self):
+        context = ReportContext(token_budget=1000)
+        context.set_summary("Short summary.")
+        context.add_section("Part 1", section_xml(1))
+        context.add_section("Part 2", section_xml(2))
+        rendered = context.render()
+
+        self.assertIn("Executive Summary:\nShort summary.", rendered)
+        self.assertIn("## Part 1\n- Claim 1 about qubits is stated here.\n- Second claim 1 is here.", rendered)
+        self.assertIn("- Source 2 (https://example.com/2)", rendered)
+        # Sources are listed once
+        self.assertEqual(rendered.count("https://example.com/shared"), 1)
+        self.assertNotIn("<link", rendered)
+
+    def test_render_stays_within_budget(self):
+        context = ReportContext(token_budget=120)
+        context.set_summary("Short summary.")
+        for n in range(1, 80):
+            context.add_section(f"Part {n}", section_xml(n))
+        rendered = context.render()
+
+        self.assertLessEqual(len(rendered), 120 * 4)
+        # The most recent section survives; older ones are elided
+        self.assertIn("## Part 79", rendered)
+        self.assertIn("earlier sections omitted", rendered)
+
+    def test_claims_trimmed_before_sections(self):
+        context = ReportContext(token_budget=60)
+        context.set_summary("S.")
+        context.add_section("Part 1", section_xml(1))
+        context.add_section("Part 2", section_xml(2))
+        rendered = context.render()
+
+        self.assertIn("## Part 1", rendered)
+        self.assertIn("## Part 2", rendered)
+        self.assertNotIn("Second claim", rendered)
+
+    def test_zero_budget_keeps_full_xml(self):
+        context = ReportContext(token_budget=0)
+        context.set_summary("Short summary.")
+        context.add_section("Part 1", section_xml(1))
+        self.assertEqual(context.render(), f"Executive Summary:\nShort summary.\n\n{section_xml(1)}\n\n")
+
+if __name__ == '__main__':
+    unittest.main()
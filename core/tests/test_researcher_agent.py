@@ -9,6 +9,7 @@ from langchain_core.messages import AIMessage
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.agents.researcher_agent import ResearcherAgent, GapAnalysis, Action, IllustrationCheck
+from src.context_builder import ContextBuilder
 
 class TestResearcherAgent(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
@@ -87,21 +88,84 @@ class TestResearcherAgent(unittest.IsolatedAsyncioTestCase):
 
     async def test_search_node(self):
         state = {"pending_actions": [{"tool": "search", "query_or_url": "q1"}]}
-        self.agent.serper_tool.search.return_value = [{"title": "R1", "url": "u1", "content": "c1"}]
+        self.agent.serper_tool.asearch = AsyncMock(return_value=[{"title": "R1", "url": "u1", "content": "c1"}])
         
-        # search_node uses loop.run_in_executor
         result = await self.agent.search_node(state)
         self.assertEqual(len(result["search_results"]), 1)
-        self.agent.serper_tool.search.assert_called_with("q1", 3)
+        self.agent.serper_tool.asearch.assert_awaited_with("q1", 3)
 
     async def test_crawl_node(self):
         state = {"pending_actions": [{"tool": "crawl", "query_or_url": "http://test.com"}]}
-        self.agent.crawler_tool.crawl.return_value = "Crawled Content"
+        self.agent.crawler_tool.acrawl = AsyncMock(return_value="Crawled Content")
         
         result = await self.agent.search_node(state)
         self.assertEqual(len(result["search_results"]), 1)
         self.assertEqual(result["search_results"][0]["content"], "Crawled Content")
-        self.agent.crawler_tool.crawl.assert_called_with("http://test.com")
+        self.agent.crawler_tool.acrawl.assert_awaited_with("http://test.com")
+
+    async def test_search_node_concurrent_keeps_action_order(self):
+        state = {"pending_actions": [
+            {"tool": "search", "query_or_url": "slow"},
+            {"tool": "crawl", "query_or_url": "http://fast.com"},
+            {"tool": "search", "query_or_url": "fast"},
+        ]}
+
+        async def fake_search(query, k):
+            await asyncio.sleep(0.05 if query == "slow" else 0)
+            return [{"title": query, "url": f"u-{query}", "content": query}]
+
+        self.agent.serper_tool.asearch = AsyncMock(side_effect=fake_search)
+        self.agent.crawler_tool.acrawl = AsyncMock(return_value="Crawled")
+
+        result = await self.agent.search_node(state)
+        self.assertEqual([r["url"] for r in result["search_results"]], ["u-slow", "http://fast.com", "u-fast"])
+
+    async def test_search_node_partial_failure_and_timeout(self):
+        events = []
+        self.agent.event_callback = lambda event_type, data: events.append((event_type, data))
+        self.agent.action_timeout = 0.05
+        state = {"pending_actions": [
+            {"tool": "search", "query_or_url": "ok"},
+            {"tool": "search", "query_or_url": "boom"},
+            {"tool": "crawl", "query_or_url": "http://hang.com"},
+        ]}
+
+        async def fake_search(query, k):
+            if query == "boom":
+                raise RuntimeError("serper down")
+            return [{"title": query, "url": "u-ok", "content": query}]
+
+        async def hanging_crawl(url):
+            await asyncio.sleep(1)
+            return "never"
+
+        self.agent.serper_tool.asearch = AsyncMock(side_effect=fake_search)
+        self.agent.crawler_tool.acrawl = AsyncMock(side_effect=hanging_crawl)
+
+        result = await self.agent.search_node(state)
+        self.assertEqual([r["url"] for r in result["search_results"]], ["u-ok"])
+        errors = [data for event_type, data in events if event_type == "tool_error"]
+        self.assertEqual(sorted(e["query"] for e in errors), ["boom", "http://hang.com"])
+
+    async def test_search_node_bounded_concurrency(self):
+        self.agent.action_concurrency = 2
+        in_flight = 0
+        peak = 0
+
+        async def fake_search(query, k):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return []
+
+        self.agent.serper_tool.asearch = AsyncMock(side_effect=fake_search)
+        state = {"pending_actions": [{"tool": "search", "query_or_url": f"q{i}"} for i in range(6)]}
+
+        await self.agent.search_node(state)
+        self.assertEqual(peak, 2)
+        self.assertEqual(self.agent.serper_tool.asearch.await_count, 6)
 
     @patch('src.agents.researcher_agent.ChatPromptTemplate')
     async def test_synthesize_node(self, mock_prompt_cls):
@@ -125,6 +189,148 @@ class TestResearcherAgent(unittest.IsolatedAsyncioTestCase):
         result = await self.agent.synthesize_node(state)
         self.assertEqual(result["draft"], "Updated Draft")
 
+    @patch('src.agents.researcher_agent.ChatPromptTemplate')
+    async def test_synthesize_node_incremental_sends_only_new_results(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Updated Draft"))
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        self.agent.incremental_synthesis = True
+        state = {
+            "topic": "T",
+            "description": "D",
+            "draft": "Old",
+            "synthesized_chunks": [ContextBuilder.chunk_key("already used")],
+            "search_results": [
+                {"title": "Old source", "url": "u1", "content": "already used"},
+                {"title": "New source", "url": "u2", "content": "fresh material"},
+            ]
+        }
+
+        result = await self.agent.synthesize_node(state)
+        context = mock_chain.ainvoke.call_args[0][0]["context"]
+        self.assertIn("New source", context)
+        self.assertNotIn("Old source", context)
+        self.assertEqual(result["synthesized_chunks"], [ContextBuilder.chunk_key("already used"),
+                                                        ContextBuilder.chunk_key("fresh material")])
+
+    @patch('src.agents.researcher_agent.ChatPromptTemplate')
+    async def test_synthesize_node_incremental_skips_llm_without_new_material(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock()
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        self.agent.incremental_synthesis = True
+        state = {
+            "topic": "T",
+            "description": "D",
+            "draft": "Old",
+            "synthesized_chunks": [ContextBuilder.chunk_key("already used")],
+            "search_results": [
+                {"title": "Old source", "url": "u1", "content": "already used"},
+                {"title": "Duplicate", "url": "u1", "content": "already used"},
+            ]
+        }
+
+        result = await self.agent.synthesize_node(state)
+        mock_chain.ainvoke.assert_not_called()
+        self.assertEqual(result, {})
+
+    @patch('src.agents.researcher_agent.ChatPromptTemplate')
+    async def test_synthesize_node_incremental_resends_material_cut_by_budget(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Updated Draft"))
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        self.agent.incremental_synthesis = True
+        self.agent.context_builder = ContextBuilder(token_budget=60, chunk_chars=400)
+        state = {
+            "topic": "Solar panels",
+            "description": "Panel efficiency",
+            "draft": "",
+            "synthesized_chunks": [],
+            "search_results": [
+                {"title": "Relevant", "url": "u1", "content": "Solar panels efficiency figures. " * 5},
+                {"title": "Leftover", "url": "u2", "content": "Unrelated gardening notes. " * 5},
+            ]
+        }
+
+        # Revision 1: only one source fits the budget
+        state.update(await self.agent.synthesize_node(state))
+        context = mock_chain.ainvoke.call_args[0][0]["context"]
+        self.assertIn("Relevant", context)
+        self.assertNotIn("Leftover", context)
+
+        # Revision 2: the leftover is sent, the packed source is not repeated
+        state["search_results"] = state["search_results"] + [{"title": "Empty", "url": "u3", "content": ""}]
+        state.update(await self.agent.synthesize_node(state))
+        context = mock_chain.ainvoke.call_args[0][0]["context"]
+        self.assertIn("Leftover", context)
+        self.assertNotIn("Relevant", context)
+        self.assertEqual(len(state["synthesized_chunks"]), 2)
+
+    @patch('src.agents.researcher_agent.ChatPromptTemplate')
+    async def test_synthesize_node_incremental_walks_through_source_larger_than_budget(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Updated Draft"))
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        self.agent.incremental_synthesis = True
+        self.agent.context_builder = ContextBuilder(token_budget=40, chunk_chars=60)
+        lines = [f"Solar panel fact number {i} about efficiency." for i in range(6)]
+        state = {
+            "topic": "Solar panels",
+            "description": "Efficiency",
+            "draft": "",
+            "synthesized_chunks": [],
+            "search_results": [{"title": "Long crawl", "url": "u1", "content": "\n".join(lines)}],
+        }
+
+        sent = []
+        for _ in range(6):
+            update = await self.agent.synthesize_node(state)
+            if "draft" not in update:
+                break
+            state.update(update)
+            context = mock_chain.ainvoke.call_args[0][0]["context"]
+            sent.extend(line for line in lines if line in context)
+
+        # Every chunk of the crawl reaches the draft exactly once
+        self.assertEqual(sorted(sent), sorted(lines))
+
+    @patch('src.agents.researcher_agent.ChatPromptTemplate')
+    async def test_synthesize_node_full_mode_sends_everything(self, mock_prompt_cls):
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value=AIMessage(content="Updated Draft"))
+        mock_prompt = MagicMock()
+        mock_prompt.__or__.return_value = mock_chain
+        mock_prompt_cls.from_messages.return_value = mock_prompt
+
+        self.agent.incremental_synthesis = False
+        state = {
+            "topic": "T",
+            "description": "D",
+            "draft": "Old",
+            "synthesized_chunks": [ContextBuilder.chunk_key("already used")],
+            "search_results": [
+                {"title": "Old source", "url": "u1", "content": "already used"},
+                {"title": "New source", "url": "u2", "content": "fresh material"},
+            ]
+        }
+
+        await self.agent.synthesize_node(state)
+        context = mock_chain.ainvoke.call_args[0][0]["context"]
+        self.assertIn("Old source", context)
+        self.assertIn("New source", context)
+
     @patch('src.agents.researcher_agent.ChatPromptTemplate')
     async def test_illustrate_node_needed(self, mock_prompt_cls):
         # Setup mock chain behavior
@@ -195,5 +401,42 @@ class TestResearcherAgent(unittest.IsolatedAsyncioTestCase):
         agent.illustration_checker.ainvoke.assert_not_called()
         agent.illustration_tool.illustrate.assert_not_called()
 
+    async def test_agents_share_one_compiled_graph(self):
+        other = ResearcherAgent(self.mock_model, serper_api_key="fake")
+        self.assertIs(self.agent.graph, other.graph)
+
+        # Each run dispatches the graph's nodes to its own agent
+        events = {"a": [], "b": []}
+        for name, agent in (("a", self.agent), ("b", other)):
+            agent.event_callback = lambda event, data, name=name: events[name].append(event)
+
+            async def check_gaps(state, agent=agent, name=name):
+                await asyncio.sleep(0.01)
+                agent.event_callback("gap_detected", {})
+                return {"pending_actions": [], "draft": f"Draft {name}"}
+
+            agent.check_gaps = check_gaps
+            agent.include_illustrations = False
+
+        result_a, result_b = await asyncio.gather(
+            self.agent.run_research("Topic A", "Desc"), other.run_research("Topic B", "Desc")
+        )
+
+        self.assertEqual(result_a["content"], "Draft a")
+        self.assertEqual(result_b["content"], "Draft b")
+        self.assertEqual(events, {"a": ["gap_detected"], "b": ["gap_detected"]})
+
+    async def test_max_revisions_reaches_graph_state(self):
+        agent = ResearcherAgent(self.mock_model, serper_api_key="fake", include_illustrations=False, max_revisions=1)
+        seen = []
+
+        async def check_gaps(state):
+            seen.append(state["max_revisions"])
+            return {"pending_actions": [], "draft": "Draft"}
+
+        agent.check_gaps = check_gaps
+        await agent.run_research("Topic", "Desc")
+        self.assertEqual(seen, [1])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import json
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scheduler import FairScheduler
+from src.task_source import QueuedTask
+
+def task(user_id, name, **config):
+    return QueuedTask(json.dumps({"requestId": name, "userId": user_id, "config": config}))
+
+def drain(scheduler, release=True):
+    order = []
+    while (next_task := scheduler.pop()) is not None:
+        order.append(next_task.payload["requestId"])
+        if release:
+            scheduler.release(next_task)
+    return order
+
+class TestFairScheduler(unittest.TestCase):
+    def test_heavy_user_does_not_starve_others(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        for i in range(5):
+            scheduler.push(task("heavy", f"h{i}"))
+        scheduler.push(task("light", "l0"))
+
+        self.assertEqual(drain(scheduler), ["h0", "l0", "h1", "h2", "h3", "h4"])
+
+    def test_late_arrival_is_interleaved(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        for i in range(4):
+            scheduler.push(task("heavy", f"h{i}"))
+        for expected in ("h0", "h1"):
+            started = scheduler.pop()
+            self.assertEqual(started.payload["requestId"], expected)
+            scheduler.release(started)
+        scheduler.push(task("light", "l0"))
+        # Virtual time has advanced, so the newcomer alternates with the backlog instead of waiting behind it
+        self.assertEqual(drain(scheduler), ["h2", "l0", "h3"])
+
+    def test_weights_share_proportionally(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        for i in range(4):
+            scheduler.push(task("a", f"a{i}", weight=2))
+            scheduler.push(task("b", f"b{i}"))
+        self.assertEqual(drain(scheduler)[:6], ["a0", "a1", "b0", "a2", "a3", "b1"])
+
+    def test_priority_levels(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        scheduler.push(task("a", "low", priority="low"))
+        scheduler.push(task("b", "normal"))
+        scheduler.push(task("c", "high", priority="high"))
+        scheduler.push(task("d", "high2", priority=0))
+        self.assertEqual(drain(scheduler), ["high", "high2", "normal", "low"])
+
+    def test_user_cap(self):
+        scheduler = FairScheduler(user_max_concurrent=2)
+        for i in range(4):
+            scheduler.push(task("heavy", f"h{i}"))
+        self.assertEqual(scheduler.eligible(), 2)
+
+        started = drain(scheduler, release=False)
+        self.assertEqual(started, ["h0", "h1"])
+        self.assertEqual(scheduler.eligible(), 0)
+        self.assertEqual(len(scheduler), 2)
+
+        scheduler.push(task("light", "l0"))
+        self.assertEqual(drain(scheduler, release=False), ["l0"])
+
+    def test_max_held_refuses_tasks_of_capped_user(self):
+        scheduler = FairScheduler(user_max_concurrent=2)
+        accepted = [scheduler.push(task("heavy", f"h{i}"), max_held=1) for i in range(5)]
+        # Two can start, one more may wait
+        self.assertEqual(accepted, [True, True, True, False, False])
+        self.assertTrue(scheduler.push(task("light", "l0"), max_held=1))
+        self.assertEqual(len(scheduler), 4)
+
+    def test_invalid_payload_and_config(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        scheduler.push(QueuedTask(b"not json"))
+        scheduler.push(task("a", "a0", priority="urgent", weight="heavy"))
+        self.assertEqual(scheduler.pop().payload, {})
+        self.assertEqual(scheduler.pop().payload["requestId"], "a0")
+        self.assertIsNone(scheduler.pop())
+
+    def test_drain_returns_tasks_in_push_order(self):
+        scheduler = FairScheduler(user_max_concurrent=1)
+        for name, user_id, priority in [("a0", "a", "low"), ("b0", "b", "high"), ("a1", "a", "normal"), ("c0", "c", "normal")]:
+            scheduler.push(task(user_id, name, priority=priority))
+        self.assertEqual(scheduler.pop().payload["requestId"], "b0")
+
+        self.assertEqual([t.payload["requestId"] for t in scheduler.drain()], ["a0", "a1", "c0"])
+        self.assertEqual(len(scheduler), 0)
+        self.assertIsNone(scheduler.pop())
+
+    def test_wait_metrics(self):
+        scheduler = FairScheduler(user_max_concurrent=0)
+        queued = task("a", "a0")
+        queued.received_at -= 2
+        scheduler.push(queued)
+        drain(scheduler, release=False)
+
+        stats = scheduler.stats()["a"]
+        self.assertEqual((stats["queued"], stats["running"], stats["dispatched"]), (0, 1, 1))
+        self.assertGreaterEqual(stats["avg_wait"], 2)
+        self.assertGreaterEqual(stats["max_wait"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
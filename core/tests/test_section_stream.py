@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.section_stream import SectionStreamRepairer
+
+VALID = (
+    '<section title="Qubits">\n<text>\nQubits & gates: `a<b && c` is code, &amp; stays.\n</text>\n'
+    '<illustration_placeholder/>\n<text>\nMore text.\n</text>\n'
+    '<sources>\n<link url="https://example.com" title="Example" />\n</sources>\n</section>'
+)
+
+def run(text, chunk_size=1, **kwargs):
+    repairer = SectionStreamRepairer(**kwargs)
+    output = "".join(repairer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size))
+    return output + repairer.close(), repairer
+
+class TestSectionStreamRepairer(unittest.TestCase):
+    def test_output_independent_of_chunking(self):
+        outputs = {run(VALID, size, illustration_xml="<image />")[0] for size in (1, 2, 3, 7, 64, len(VALID))}
+        self.assertEqual(len(outputs), 1)
+
+    def test_placeholder_split_across_chunks(self):
+        output, _ = run(VALID, 1, illustration_xml="\n<image src=\"x.png\" alt=\"X\" />\n")
+        self.assertIn('</text>\n\n<image src="x.png" alt="X" />\n\n<text>', output)
+        self.assertNotIn("illustration_placeholder", output)
+
+    def test_escapes_stray_characters_outside_code(self):
+        output, repairer = run(VALID, 5)
+        self.assertIn("Qubits &amp; gates: `a<b && c` is code, &amp; stays.", output)
+        self.assertEqual(repairer.repairs, 1)
+
+    def test_escapes_stray_less_than(self):
+        output, _ = run('<section title="A"><text>x < 5 and y <= 3</text></section>', 4)
+        self.assertEqual(output, '<section title="A"><text>x &lt; 5 and y &lt;= 3</text></section>')
+
+    def test_inline_html_passes_through(self):
+        output, repairer = run('<section title="A"><text>H<sub>2</sub>O<br/></text></section>', 3)
+        self.assertEqual(output, '<section title="A"><text>H<sub>2</sub>O<br/></text></section>')
+        self.assertEqual(repairer.repairs, 0)
+
+    def test_closes_unbalanced_tags(self):
+        output, _ = run('<section title="A">\n<text>\nTruncated answer', 4)
+        self.assertEqual(output, '<section title="A">\n<text>\nTruncated answer</text></section>')
+
+    def test_missing_text_close_before_sources(self):
+        output, _ = run('<section title="A"><text>Body<sources><link url="u" title="t"></link></sources></section>', 6)
+        self.assertEqual(output, '<section title="A"><text>Body</text><sources><link url="u" title="t" /></sources></section>')
+
+    def test_drops_content_outside_section_and_wraps_loose_content(self):
+        raw = 'Sure, here it is:\n```xml\n<section title="A">\nLoose **markdown**\n</section>\n```\nHope this helps!'
+        output, _ = run(raw, 3)
+        self.assertEqual(output, '<section title="A">\n<text>Loose **markdown**\n</text></section>')
+
+    def test_opens_section_when_missing(self):
+        output, _ = run('<text>Body</text>', 2, title='Say "hi"')
+        self.assertEqual(output, '<section title="Say &quot;hi&quot;">\n<text>Body</text></section>')
+
+    def test_duplicate_placeholder_removed(self):
+        raw = '<section title="A"><text>a <illustration_placeholder/> b</text><illustration_placeholder/></section>'
+        output, _ = run(raw, 4, illustration_xml="<image />")
+        self.assertEqual(output, '<section title="A"><text>a </text><image /><text> b</text></section>')
+
+    def test_placeholder_without_illustration_dropped(self):
+        output, _ = run('<section title="A"><illustration_placeholder/></section>', 5)
+        self.assertEqual(output, '<section title="A"></section>')
+
+if __name__ == '__main__':
+    unittest.main()
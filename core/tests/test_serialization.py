@@ -0,0 +1,34 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import serialization
+from src.serialization import JsonSerializer, OrjsonSerializer, create_serializer
+
+PAYLOAD = {"target_user_id": "u", "payload": {"data": {"chunk": "héllo <b>", "chunk_index": 1, "toc": ["A", "B"]}}}
+
+class TestSerialization(unittest.TestCase):
+    def test_json_round_trip(self):
+        serializer = JsonSerializer()
+        self.assertEqual(serializer.loads(serializer.dumps(PAYLOAD)), PAYLOAD)
+
+    @unittest.skipIf(serialization.orjson is None, "orjson not installed")
+    def test_orjson_round_trip_and_interop(self):
+        serializer = OrjsonSerializer()
+        encoded = serializer.dumps(PAYLOAD)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(JsonSerializer().loads(encoded), PAYLOAD)
+        self.assertEqual(serializer.loads(JsonSerializer().dumps(PAYLOAD)), PAYLOAD)
+
+    def test_create_serializer(self):
+        self.assertEqual(create_serializer("json").name, "json")
+        with patch.object(serialization, "orjson", None):
+            self.assertEqual(create_serializer("auto").name, "json")
+            self.assertEqual(create_serializer("orjson").name, "json")
+
+if __name__ == '__main__':
+    unittest.main()
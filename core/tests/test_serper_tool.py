@@ -1,12 +1,18 @@
 import unittest
 import sys
 import os
+import json
+import asyncio
+import httpx
 from unittest.mock import patch, MagicMock
 
 # Ensure core/src is in path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.tools.serper_tool import SerperTool
+from src.http_client import HttpClient
+from src.tools.cache import ToolCache
+from src.tools.singleflight import SingleFlight
 
 class TestSerperTool(unittest.TestCase):
 
@@ -60,5 +66,64 @@ class TestSerperTool(unittest.TestCase):
              with self.assertRaises(ValueError):
                 tool.search("test")
 
+class TestSerperToolAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_asearch_uses_pooled_client(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={
+                "organic": [
+                    {"title": "Test Title", "link": "http://test.com", "snippet": "Test snippet"}
+                ]
+            })
+
+        client = HttpClient(transport=httpx.MockTransport(handler))
+        tool = SerperTool(api_key="test-key", http_client=client, cache=ToolCache([]))
+
+        results = await tool.asearch("test query", 3)
+        await client.aclose()
+
+        self.assertEqual(results, [{"title": "Test Title", "url": "http://test.com", "content": "Test snippet"}])
+        self.assertEqual(len(requests_seen), 1)
+        self.assertEqual(requests_seen[0].headers["X-API-KEY"], "test-key")
+        self.assertEqual(json.loads(requests_seen[0].content), {"q": "test query", "num": 3})
+
+    async def test_asearch_http_error_returns_empty(self):
+        client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+        tool = SerperTool(api_key="test-key", http_client=client, cache=ToolCache([]))
+
+        results = await tool.asearch("test query")
+        await client.aclose()
+
+        self.assertEqual(results, [])
+
+    async def test_asearch_is_scoped_to_api_key(self):
+        requests_seen = []
+
+        async def handler(request):
+            requests_seen.append(request.headers["X-API-KEY"])
+            await asyncio.sleep(0.01)
+            if request.headers["X-API-KEY"] == "bad-key":
+                return httpx.Response(403)
+            return httpx.Response(200, json={"organic": [{"title": "T", "link": "http://t.com", "snippet": "S"}]})
+
+        client = HttpClient(transport=httpx.MockTransport(handler))
+        cache = ToolCache([])
+        flight = SingleFlight()
+        bad = SerperTool(api_key="bad-key", http_client=client, cache=cache, single_flight=flight)
+        good = SerperTool(api_key="good-key", http_client=client, cache=cache, single_flight=flight)
+
+        # Concurrent identical queries under different keys do not share the failing request
+        failed, found = await asyncio.gather(bad.asearch("test query"), good.asearch("test query"))
+        # Nor does a cached result leak to another key
+        again = await bad.asearch("test query")
+        await client.aclose()
+
+        self.assertEqual(failed, [])
+        self.assertEqual(len(found), 1)
+        self.assertEqual(again, [])
+        self.assertEqual(sorted(requests_seen), ["bad-key", "bad-key", "good-key"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.singleflight import SingleFlight
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_fetch(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*[flight.do("crawl", "u", fetch) for _ in range(5)])
+
+        self.assertEqual(results, ["value"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {"leaders": {"crawl": 1}, "coalesced": {"crawl": 4}, "in_flight": 0})
+
+    async def test_different_keys_are_not_coalesced(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0)
+            return 1
+
+        await asyncio.gather(flight.do("search", "a", fetch), flight.do("search", "b", fetch), flight.do("crawl", "a", fetch))
+        self.assertEqual(flight.stats()["coalesced"], {})
+
+    async def test_sequential_calls_fetch_again(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(await flight.do("search", "q", fetch), 1)
+        self.assertEqual(await flight.do("search", "q", fetch), 2)
+
+    async def test_exception_reaches_every_waiter(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*[flight.do("crawl", "u", fetch) for _ in range(3)], return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("crawl", "u", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("crawl", "u", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, "done")
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+if __name__ == '__main__':
+    unittest.main()
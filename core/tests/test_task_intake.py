@@ -0,0 +1,199 @@
+import unittest
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from fakeredis import FakeAsyncRedis
+except ImportError:
+    FakeAsyncRedis = None
+
+from src.scheduler import FairScheduler
+from src.task_intake import TaskIntake
+from src.task_source import ListTaskSource, QueuedTask, StreamTaskSource
+
+class FakeSource:
+    def __init__(self, tasks):
+        self.tasks = list(tasks)
+        self.requested = []
+
+    async def fetch(self, count):
+        self.requested.append(count)
+        while not self.tasks:
+            await asyncio.sleep(0.001)
+        batch, self.tasks = self.tasks[:count], self.tasks[count:]
+        return [QueuedTask(data) for data in batch]
+
+    async def requeue(self, tasks):
+        self.tasks[:0] = [task.data for task in tasks]
+
+    async def defer(self, tasks):
+        self.tasks.extend(task.data for task in tasks)
+
+    async def stats(self):
+        return {"queue_depth": len(self.tasks)}
+
+class TestTaskIntake(unittest.IsolatedAsyncioTestCase):
+    async def start(self, source, max_concurrent, prefetch, batch_size=16, scheduler=None, **kwargs):
+        self.release = asyncio.Event()
+        self.started = []
+        sem = asyncio.Semaphore(max_concurrent)
+
+        async def handler(task):
+            self.started.append(task.data)
+            try:
+                await self.release.wait()
+            finally:
+                sem.release()
+
+        intake = TaskIntake(source, handler, sem, max_concurrent, prefetch=prefetch, batch_size=batch_size, scheduler=scheduler,
+                            **kwargs)
+        self.runner = asyncio.create_task(intake.run())
+        await asyncio.sleep(0.01)
+        return intake
+
+    async def asyncTearDown(self):
+        self.runner.cancel()
+        try:
+            await self.runner
+        except asyncio.CancelledError:
+            pass
+
+    async def test_burst_fills_all_slots_in_one_fetch(self):
+        source = FakeSource([f"t{i}" for i in range(10)])
+        intake = await self.start(source, max_concurrent=4, prefetch=2)
+
+        self.assertEqual(source.requested[0], 6)
+        self.assertEqual(self.started, ["t0", "t1", "t2", "t3"])
+        self.assertEqual(len(intake.scheduler), 2)
+
+        stats = await intake.stats()
+        self.assertEqual(stats["slot_utilization"], 1.0)
+        self.assertEqual(stats["buffered"], 2)
+        self.assertEqual(stats["queue_depth"], 4)
+        self.assertEqual(stats["fetches"], 1)
+
+    async def test_freed_slots_start_prefetched_tasks(self):
+        source = FakeSource([f"t{i}" for i in range(10)])
+        intake = await self.start(source, max_concurrent=4, prefetch=2)
+
+        self.release.set()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.started, [f"t{i}" for i in range(10)])
+        self.assertEqual(intake.in_flight, 0)
+
+    async def test_batch_size_caps_fetch(self):
+        source = FakeSource([f"t{i}" for i in range(10)])
+        await self.start(source, max_concurrent=8, prefetch=0, batch_size=3)
+        self.assertEqual(source.requested[:3], [3, 3, 2])
+        self.assertEqual(len(self.started), 8)
+
+    async def test_capped_user_does_not_block_others(self):
+        tasks = [json.dumps({"userId": "heavy", "requestId": f"h{i}"}) for i in range(6)]
+        tasks.append(json.dumps({"userId": "light", "requestId": "l0"}))
+        source = FakeSource(tasks)
+        intake = await self.start(source, max_concurrent=4, prefetch=0, scheduler=FairScheduler(user_max_concurrent=2))
+
+        # Tasks of the capped user are buffered while the fetcher keeps pulling for others
+        self.assertEqual([json.loads(t)["requestId"] for t in self.started], ["h0", "l0", "h1"])
+        self.assertEqual(intake.in_flight, 3)
+        self.assertEqual(len(intake.scheduler), 4)
+
+    async def test_flood_from_capped_user_goes_back_to_the_queue(self):
+        tasks = [json.dumps({"userId": "heavy", "requestId": f"h{i}"}) for i in range(50)]
+        tasks.append(json.dumps({"userId": "light", "requestId": "l0"}))
+        source = FakeSource(tasks)
+        intake = await self.start(source, max_concurrent=4, prefetch=0, batch_size=8, max_buffer=5, user_max_held=3,
+                                  defer_backoff=0.001, scheduler=FairScheduler(user_max_concurrent=2))
+
+        # The capped user's backlog does not count towards max_buffer, so the fetcher reaches the other user
+        for _ in range(100):
+            if "l0" in [json.loads(t)["requestId"] for t in self.started]:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(sorted(json.loads(t)["requestId"] for t in self.started), ["h0", "h1", "l0"])
+        # ...but holds only three of its tasks; the rest went back to the queue for other workers
+        self.assertEqual(len(intake.scheduler), 3)
+        self.assertEqual(len(source.tasks), 45)
+        self.assertEqual((await intake.stats())["deferred"], intake.deferred)
+        self.assertGreater(intake.deferred, 0)
+
+    async def test_max_held_bounds_the_buffer(self):
+        source = FakeSource([json.dumps({"userId": "heavy", "requestId": f"h{i}"}) for i in range(50)])
+        intake = await self.start(source, max_concurrent=4, prefetch=0, max_buffer=5, max_held=10, user_max_held=100,
+                                  scheduler=FairScheduler(user_max_concurrent=2))
+        self.assertEqual(len(intake.scheduler), 10)
+        self.assertEqual(len(source.tasks), 38)
+
+    async def test_close_requeues_buffered_tasks(self):
+        source = FakeSource([f"t{i}" for i in range(10)])
+        intake = await self.start(source, max_concurrent=4, prefetch=2)
+        self.runner.cancel()
+        try:
+            await self.runner
+        except asyncio.CancelledError:
+            pass
+
+        with patch("builtins.print"):
+            await intake.close()
+        self.assertEqual(source.tasks, [f"t{i}" for i in range(4, 10)])
+        self.assertEqual(len(intake.scheduler), 0)
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis not installed")
+class TestPrefetchRequeue(unittest.IsolatedAsyncioTestCase):
+    async def run_and_close(self, source, max_concurrent=2, prefetch=3):
+        sem = asyncio.Semaphore(max_concurrent)
+        started = []
+
+        async def handler(task):
+            started.append(task.data)
+            await asyncio.Event().wait()
+
+        intake = TaskIntake(source, handler, sem, max_concurrent, prefetch=prefetch)
+        runner = asyncio.create_task(intake.run())
+        await asyncio.sleep(0.05)
+        runner.cancel()
+        try:
+            await runner
+        except asyncio.CancelledError:
+            pass
+        for running in list(intake._running):
+            running.cancel()
+        with patch("builtins.print"):
+            await intake.close()
+        await source.close()
+        return started
+
+    async def test_list_prefetch_is_pushed_back_on_close(self):
+        redis = FakeAsyncRedis()
+        await redis.rpush("tasks", *[f"t{i}" for i in range(10)])
+
+        started = await self.run_and_close(ListTaskSource(redis, key="tasks"))
+
+        self.assertEqual(started, [b"t0", b"t1"])
+        # The three prefetched tasks are back at the head, ahead of the untouched ones
+        self.assertEqual(await redis.lrange("tasks", 0, -1), [f"t{i}".encode() for i in range(2, 10)])
+
+    async def test_stream_prefetch_is_reclaimed_by_another_worker(self):
+        redis = FakeAsyncRedis()
+        first = StreamTaskSource(redis, stream="tasks", group="workers", consumer="c1", block=0.01, claim_idle=0.05)
+        await first.setup()
+        for i in range(5):
+            await redis.xadd("tasks", {"data": f"t{i}"})
+
+        started = await self.run_and_close(first)
+        self.assertEqual(started, [b"t0", b"t1"])
+
+        other = StreamTaskSource(redis, stream="tasks", group="workers", consumer="c2", block=0.01, claim_idle=0.05)
+        await asyncio.sleep(0.1)
+        reclaimed = await other.fetch(5)
+        await other.close()
+        self.assertEqual(sorted(task.data for task in reclaimed), [f"t{i}".encode() for i in range(5)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from fakeredis import FakeAsyncRedis
+except ImportError:
+    FakeAsyncRedis = None
+
+from src.task_source import ListTaskSource, StreamTaskSource
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis not installed")
+class TestStreamTaskSource(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeAsyncRedis()
+        self.sources = []
+
+    async def asyncTearDown(self):
+        for source in self.sources:
+            await source.close()
+
+    async def make_source(self, consumer, **kwargs):
+        kwargs.setdefault("claim_interval", 0)
+        source = StreamTaskSource(self.redis, stream="tasks", group="workers", consumer=consumer, block=0.01, **kwargs)
+        await source.setup()
+        self.sources.append(source)
+        return source
+
+    async def add_tasks(self, count):
+        for i in range(count):
+            await self.redis.xadd("tasks", {"data": f'{{"requestId": "r{i}"}}'})
+
+    async def test_fetch_reads_a_batch(self):
+        source = await self.make_source("c1")
+        await self.add_tasks(5)
+
+        tasks = await source.fetch(3)
+        self.assertEqual([t.data for t in tasks], [b'{"requestId": "r0"}', b'{"requestId": "r1"}', b'{"requestId": "r2"}'])
+        self.assertEqual(len(await source.fetch(3)), 2)
+        self.assertEqual(await source.fetch(3), [])
+
+    async def test_setup_is_idempotent(self):
+        await self.make_source("c1")
+        await self.make_source("c2")
+
+    async def test_ack_removes_entry(self):
+        source = await self.make_source("c1")
+        await self.add_tasks(1)
+        [task] = await source.fetch(1)
+
+        await source.ack(task)
+        stats = await source.stats()
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["acked"], 1)
+        self.assertEqual(await self.redis.xlen("tasks"), 0)
+
+    async def test_defer_moves_entry_to_end_for_any_consumer(self):
+        source = await self.make_source("c1")
+        await self.add_tasks(2)
+        [first] = await source.fetch(1)
+
+        await source.defer([first])
+        stats = await source.stats()
+        self.assertEqual(stats["pending"], 0)
+        other = await self.make_source("c2")
+        self.assertEqual([t.data for t in await other.fetch(5)], [b'{"requestId": "r1"}', b'{"requestId": "r0"}'])
+
+    async def test_stalled_task_is_reclaimed_by_another_consumer(self):
+        crashed = await self.make_source("crashed", claim_idle=0.05)
+        await self.add_tasks(1)
+        [lost] = await crashed.fetch(1)
+
+        survivor = await self.make_source("survivor", claim_idle=0.05)
+        self.assertEqual(await survivor.fetch(1), [])
+        await asyncio.sleep(0.06)
+        [reclaimed] = await survivor.fetch(1)
+
+        self.assertEqual(reclaimed.entry_id, lost.entry_id)
+        self.assertEqual(survivor.claimed, 1)
+
+    async def test_task_over_delivery_limit_is_dead_lettered(self):
+        source = await self.make_source("c1", claim_idle=0.001, max_deliveries=2)
+        await self.add_tasks(1)
+        await source.fetch(1)
+        for _ in range(3):
+            await asyncio.sleep(0.002)
+            tasks = await source.fetch(1)
+
+        self.assertEqual(tasks, [])
+        self.assertEqual(source.dead_lettered, 1)
+        self.assertEqual(await self.redis.xlen("tasks:dead"), 1)
+        self.assertEqual(await self.redis.xlen("tasks"), 0)
+
+    async def test_heartbeat_keeps_running_task(self):
+        source = await self.make_source("c1", claim_idle=0.1, heartbeat_interval=0.02)
+        await self.add_tasks(1)
+        await source.fetch(1)
+
+        other = await self.make_source("c2", claim_idle=0.1)
+        await asyncio.sleep(0.15)
+        self.assertEqual(await other.fetch(1), [])
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis not installed")
+class TestListTaskSource(unittest.IsolatedAsyncioTestCase):
+    async def test_fetch_pops_a_batch(self):
+        redis = FakeAsyncRedis()
+        await redis.rpush("tasks", "a", "b", "c")
+        source = ListTaskSource(redis, key="tasks")
+
+        self.assertEqual([t.data for t in await source.fetch(2)], [b"a", b"b"])
+        self.assertEqual([t.data for t in await source.fetch(5)], [b"c"])
+        self.assertEqual((await source.stats())["queue_depth"], 0)
+
+    async def test_requeue_pushes_back_in_order(self):
+        redis = FakeAsyncRedis()
+        await redis.rpush("tasks", "a", "b", "c", "d")
+        source = ListTaskSource(redis, key="tasks")
+
+        fetched = await source.fetch(3)
+        await source.requeue(fetched[1:])
+        self.assertEqual(await redis.lrange("tasks", 0, -1), [b"b", b"c", b"d"])
+
+    async def test_defer_pushes_to_tail(self):
+        redis = FakeAsyncRedis()
+        await redis.rpush("tasks", "a", "b", "c")
+        source = ListTaskSource(redis, key="tasks")
+
+        await source.defer(await source.fetch(1))
+        self.assertEqual(await redis.lrange("tasks", 0, -1), [b"b", b"c", b"a"])
+
+    async def test_fallback_without_blmpop(self):
+        redis = FakeAsyncRedis()
+        await redis.rpush("tasks", "a", "b", "c")
+        source = ListTaskSource(redis, key="tasks")
+
+        async def unsupported(*args, **kwargs):
+            raise Exception("ERR unknown command 'BLMPOP'")
+        redis.blmpop = unsupported
+
+        self.assertEqual([t.data for t in await source.fetch(2)], [b"a", b"b"])
+        self.assertEqual([t.data for t in await source.fetch(1)], [b"c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.cache import ToolCache, MemoryCacheTier, RedisCacheTier, normalize_query, normalize_url
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+        self.ttls[key] = ex
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+class TestNormalization(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Quantum   Computing\n"), normalize_query("quantum computing"))
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url("HTTPS://Example.com:443/a/b/?b=2&utm_source=news&a=1#section"),
+            "https://example.com/a/b?a=1&b=2",
+        )
+        self.assertEqual(normalize_url("http://example.com"), "http://example.com/")
+        self.assertEqual(normalize_url("http://example.com:8080/x"), "http://example.com:8080/x")
+
+class TestToolCache(unittest.IsolatedAsyncioTestCase):
+    async def test_get_or_fetch_counts_hits_and_misses(self):
+        cache = ToolCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return [{"title": "t"}]
+
+        first = await cache.get_or_fetch("search", "q", fetch, 60)
+        second = await cache.get_or_fetch("search", "q", fetch, 60)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], {"search": 1})
+        self.assertEqual(cache.stats()["misses"], {"search": 1})
+
+    async def test_empty_results_are_not_cached(self):
+        cache = ToolCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return []
+
+        await cache.get_or_fetch("search", "q", fetch, 60)
+        await cache.get_or_fetch("search", "q", fetch, 60)
+        self.assertEqual(len(calls), 2)
+
+    async def test_memory_tier_lru_eviction(self):
+        tier = MemoryCacheTier(max_entries=2, max_bytes=1024)
+        cache = ToolCache([tier])
+        await cache.set("crawl", "a", "A", 60)
+        await cache.set("crawl", "b", "B", 60)
+        await cache.get("crawl", "a")  # a is now most recent
+        await cache.set("crawl", "c", "C", 60)
+
+        self.assertEqual(await cache.get("crawl", "a"), "A")
+        self.assertIsNone(await cache.get("crawl", "b"))
+        self.assertEqual(tier.evictions, 1)
+
+    async def test_memory_tier_byte_bound(self):
+        tier = MemoryCacheTier(max_entries=100, max_bytes=50)
+        cache = ToolCache([tier])
+        await cache.set("crawl", "a", "x" * 30, 60)
+        await cache.set("crawl", "b", "y" * 30, 60)
+        self.assertLessEqual(tier.size_bytes, 50)
+        self.assertEqual(len(tier), 1)
+        # Larger than the whole tier: never stored
+        await cache.set("crawl", "c", "z" * 100, 60)
+        self.assertIsNone(await cache.get("crawl", "c"))
+
+    async def test_memory_tier_ttl(self):
+        cache = ToolCache([MemoryCacheTier()])
+        with patch("src.tools.cache.time.monotonic", return_value=1000.0):
+            await cache.set("search", "q", ["r"], 10)
+        with patch("src.tools.cache.time.monotonic", return_value=1011.0):
+            self.assertIsNone(await cache.get("search", "q"))
+
+    async def test_redis_tier_hit_backfills_memory(self):
+        redis_client = FakeRedis()
+        key = ToolCache.key("search", "q")
+        redis_client.store["tool_cache:" + key] = json.dumps(["shared"]).encode()
+        memory = MemoryCacheTier()
+        cache = ToolCache([memory, RedisCacheTier(redis_client)])
+
+        self.assertEqual(await cache.get("search", "q"), ["shared"])
+        self.assertEqual(await memory.get(key), ["shared"])
+
+    async def test_redis_tier_set_uses_ttl(self):
+        redis_client = FakeRedis()
+        cache = ToolCache([RedisCacheTier(redis_client)])
+        await cache.set("crawl", "u", "text", 123)
+        self.assertEqual(redis_client.ttls["tool_cache:" + ToolCache.key("crawl", "u")], 123)
+
+    async def test_redis_errors_do_not_fail_fetch(self):
+        tier = RedisCacheTier(BrokenRedis())
+        cache = ToolCache([tier])
+
+        async def fetch():
+            return "fresh"
+
+        self.assertEqual(await cache.get_or_fetch("crawl", "u", fetch, 60), "fresh")
+        self.assertEqual(tier.errors, 2)
+
+if __name__ == '__main__':
+    unittest.main()
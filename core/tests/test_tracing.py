@@ -0,0 +1,194 @@
+import unittest
+import sys
+import os
+import asyncio
+import json
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.tracing import (
+    Tracer, JsonlExporter, OtlpExporter, TracingCallback, NOOP_SPAN, configure_tracer, current_span, span, trace_id_for, token_usage
+)
+from src.agents.researcher_agent import ResearcherAgent
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    async def flush(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def named(self, name):
+        return [span for span in self.spans if span.name == name]
+
+class TestTracer(unittest.IsolatedAsyncioTestCase):
+    async def test_spans_nest_across_tasks(self):
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+
+        async def child(i):
+            with tracer.span("child", index=i):
+                await asyncio.sleep(0.01)
+
+        with tracer.span("root", trace_id="ab" * 16) as root:
+            await asyncio.gather(*[asyncio.create_task(child(i)) for i in range(3)])
+
+        children = [span for span in exporter.spans if span.name == "child"]
+        self.assertEqual(len(children), 3)
+        self.assertTrue(all(span.parent_id == root.span_id for span in children))
+        self.assertTrue(all(span.trace_id == "ab" * 16 for span in exporter.spans))
+        self.assertIsNone(root.parent_id)
+        self.assertGreaterEqual(root.duration, 0.01)
+        self.assertIs(current_span(), NOOP_SPAN)
+
+    async def test_error_is_recorded(self):
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+        with self.assertRaises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        self.assertEqual(exporter.spans[0].error, "ValueError: boom")
+        self.assertEqual(exporter.spans[0].to_otlp()["status"]["code"], 2)
+
+    def test_disabled_tracer_hands_out_noop_span(self):
+        tracer = Tracer()
+        with tracer.span("noop", query="q") as s:
+            s.set(results=3)
+            self.assertIs(s, NOOP_SPAN)
+            self.assertIs(current_span(), NOOP_SPAN)
+        self.assertEqual(tracer.callbacks(), [])
+
+    def test_listeners_see_finished_spans(self):
+        tracer = Tracer()
+        seen = []
+        tracer.listeners.append(lambda span: seen.append((span.name, span.end_ns is not None)))
+        with tracer.span("listened"):
+            pass
+        self.assertEqual(seen, [("listened", True)])
+
+    def test_trace_id_for_request(self):
+        self.assertEqual(trace_id_for("1b4e28ba-2fa1-11d2-883f-0016d3cca427"), "1b4e28ba2fa111d2883f0016d3cca427")
+        self.assertEqual(len(trace_id_for("not-a-uuid")), 32)
+        self.assertNotEqual(trace_id_for(None), trace_id_for(None))
+
+class TestExporters(unittest.IsolatedAsyncioTestCase):
+    async def test_jsonl_exporter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            tracer = Tracer(JsonlExporter(path))
+            with tracer.span("root", request_id="req-1"):
+                with tracer.span("tool.search", query="q") as s:
+                    s.set(results=2)
+            await tracer.aclose()
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([r["name"] for r in records], ["tool.search", "root"])
+        self.assertEqual(records[0]["parent_id"], records[1]["span_id"])
+        self.assertEqual(records[0]["attributes"], {"query": "q", "results": 2})
+
+    async def test_otlp_exporter_batches_to_collector(self):
+        requests = []
+
+        def collector(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, json={})
+
+        exporter = OtlpExporter("http://collector/v1/traces", "prism-worker", batch_size=2, flush_interval=60,
+                                transport=httpx.MockTransport(collector))
+        tracer = Tracer(exporter)
+        for i in range(3):
+            with tracer.span("section", index=i, cached=False, score=0.5):
+                pass
+        await tracer.aclose()
+
+        self.assertEqual(len(requests), 2)
+        resource = requests[0]["resourceSpans"][0]
+        self.assertEqual(resource["resource"]["attributes"][0], {"key": "service.name", "value": {"stringValue": "prism-worker"}})
+        spans = resource["scopeSpans"][0]["spans"]
+        self.assertEqual(len(spans), 2)
+        self.assertEqual(spans[0]["attributes"], [
+            {"key": "index", "value": {"intValue": "0"}},
+            {"key": "cached", "value": {"boolValue": False}},
+            {"key": "score", "value": {"doubleValue": 0.5}},
+        ])
+        self.assertEqual(exporter.exported, 3)
+
+    async def test_otlp_exporter_drops_when_collector_fails(self):
+        exporter = OtlpExporter("http://collector/v1/traces", "prism-worker", max_queue=2, flush_interval=60,
+                                transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+        tracer = Tracer(exporter)
+        for _ in range(3):
+            with tracer.span("s"):
+                pass
+        with patch("builtins.print"):
+            await tracer.aclose()
+        self.assertEqual(exporter.exported, 0)
+        self.assertEqual(exporter.dropped, 3)
+
+class TestTracingCallback(unittest.IsolatedAsyncioTestCase):
+    async def test_llm_calls_are_child_spans(self):
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+        model = FakeListChatModel(responses=["one", "streamed"], callbacks=[TracingCallback(tracer)])
+        chain = ChatPromptTemplate.from_messages([("user", "{topic}")]) | model
+
+        with tracer.span("section") as section:
+            await chain.ainvoke({"topic": "a"})
+            chunks = [chunk.content async for chunk in model.astream("hello")]
+
+        self.assertEqual("".join(chunks), "streamed")
+        calls = exporter.named("llm.call")
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(call.parent_id == section.span_id for call in calls))
+        self.assertIn("first_token_ms", calls[1].attributes)
+        self.assertIsNotNone(calls[0].end_ns)
+
+    def test_token_usage(self):
+        response = SimpleNamespace(llm_output={"token_usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}})
+        self.assertEqual(token_usage(response), {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+
+        message = SimpleNamespace(usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+        response = SimpleNamespace(llm_output=None, generations=[[SimpleNamespace(message=message)]])
+        self.assertEqual(token_usage(response), {"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+        self.assertEqual(token_usage(SimpleNamespace(llm_output=None, generations=[])), {})
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def test_researcher_graph_nodes_are_traced(self):
+        exporter = ListExporter()
+        configure_tracer(exporter)
+        self.addCleanup(configure_tracer)
+
+        model = MagicMock()
+        agent = ResearcherAgent(model, serper_api_key="fake", include_illustrations=False)
+
+        async def check_gaps(state):
+            return {"pending_actions": [], "draft": "Draft"}
+
+        agent.check_gaps = check_gaps
+        with span("process_task") as root:
+            await agent.run_research("Topic", "Desc")
+
+        section = exporter.named("researcher.section")[0]
+        self.assertEqual(section.parent_id, root.span_id)
+        check = exporter.named("researcher.check_gaps")[0]
+        self.assertEqual(check.parent_id, section.span_id)
+        self.assertEqual(check.attributes["topic"], "Topic")
+
+if __name__ == '__main__':
+    unittest.main()
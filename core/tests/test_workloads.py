@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Ensure core/src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.workloads import Workload, get_workload, reset_workloads, workload_stats
+
+class TestWorkload(unittest.IsolatedAsyncioTestCase):
+    async def test_caps_concurrency_and_reports_queue_depth(self):
+        workload = Workload("crawl", 2)
+        release = asyncio.Event()
+
+        async def op():
+            async with workload.slot():
+                await release.wait()
+
+        ops = [asyncio.create_task(op()) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        stats = workload.stats()
+        self.assertEqual(stats["in_flight"], 2)
+        self.assertEqual(stats["queue_depth"], 3)
+
+        release.set()
+        await asyncio.gather(*ops)
+        stats = workload.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["started"], 5)
+        self.assertGreater(stats["max_wait"], 0)
+
+    async def test_failures_release_the_slot(self):
+        workload = Workload("search", 1)
+        with self.assertRaises(ValueError):
+            async with workload.slot():
+                raise ValueError("boom")
+        async with workload.slot():
+            pass
+        self.assertEqual(workload.stats()["failed"], 1)
+        self.assertEqual(workload.stats()["in_flight"], 0)
+
+    async def test_stalled_workload_does_not_block_others(self):
+        reset_workloads({"crawl": 2, "search": 2})
+        self.addCleanup(reset_workloads)
+        stalled = asyncio.Event()
+
+        async def stalled_crawl():
+            async with get_workload("crawl").slot():
+                await stalled.wait()
+
+        crawls = [asyncio.create_task(stalled_crawl()) for _ in range(4)]
+        await asyncio.sleep(0.01)
+
+        async def search():
+            async with get_workload("search").slot():
+                return "results"
+
+        self.assertEqual(await asyncio.wait_for(search(), 1), "results")
+        self.assertEqual(workload_stats()["crawl"]["queue_depth"], 2)
+
+        stalled.set()
+        await asyncio.gather(*crawls)
+
+if __name__ == '__main__':
+    unittest.main()